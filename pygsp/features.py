@@ -55,9 +55,20 @@ def compute_norm_tig(g, **kwargs):
         The filter or filter bank.
     kwargs: dict
         Additional parameters to be passed to the
-        :func:`pygsp.filters.Filter.filter` method.
+        :func:`pygsp.filters.Filter.filter` method. If none but an integer
+        ``order`` (and ``method='chebyshev'``) are given, the norms are
+        computed from the sparse frame of the Chebyshev approximation (see
+        :meth:`pygsp.filters.Filter.compute_sparse_frame`), whose atoms are
+        localized. Otherwise, from the dense frame.
     """
-    tig = compute_tig(g, **kwargs)
+    # Set by utils.filterbank_handler, the frame is of the whole bank.
+    kwargs.pop('i', None)
+    order = kwargs.get('order', 30)
+    if (set(kwargs) <= {'method', 'order'} and isinstance(order, int)
+            and kwargs.get('method', 'chebyshev') == 'chebyshev'):
+        tig = g.compute_sparse_frame(order=order)
+        return np.sqrt(np.asarray(tig.multiply(tig).sum(axis=1))).squeeze(1)
+    tig = g.compute_frame(**kwargs)
     return np.linalg.norm(tig, axis=1, ord=2)
 
 
@@ -75,8 +86,7 @@ def compute_spectrogram(G, atom=None, M=100, **kwargs):
     M : int (optional)
         Number of samples on the spectral scale. (default = 100)
     kwargs: dict
-        Additional parameters to be passed to the
-        :func:`pygsp.filters.Filter.filter` method.
+        Additional parameters to be passed to :func:`compute_norm_tig`.
     """
 
     if not atom:
@@ -18,9 +18,12 @@ The :class:`Filter` base class implements a common interface to all filters:
     Filter.filter
     Filter.analyze
     Filter.synthesize
+    Filter.filter_chunks
+    Filter.filter_to_file
     Filter.complement
     Filter.inverse
     Filter.compute_frame
+    Filter.compute_sparse_frame
     Filter.estimate_frame_bounds
     Filter.plot
     Filter.localize
@@ -100,9 +103,16 @@ account the cost of the necessary eigendecomposition of the graph Laplacian).
 .. autosummary::
 
     compute_cheby_coeff
+    compute_cheby_order
     compute_jackson_cheby_coeff
     cheby_op
+    cheby_analysis
+    cheby_synthesis
+    cheby_clenshaw
+    cheby_mapping
+    ChebyshevOperator
     cheby_rect
+    SpectralDensity
 
 **Lanczos algorithm**
 
@@ -110,6 +120,8 @@ account the cost of the necessary eigendecomposition of the graph Laplacian).
 
     lanczos
     lanczos_op
+    lanczos_analysis
+    lanczos_synthesis
 
 """
 
@@ -136,11 +148,20 @@ _FILTERS = [
 ]
 _APPROXIMATIONS = [
     'compute_cheby_coeff',
+    'compute_cheby_order',
     'compute_jackson_cheby_coeff',
     'cheby_op',
+    'cheby_analysis',
+    'cheby_synthesis',
+    'cheby_clenshaw',
+    'cheby_mapping',
+    'ChebyshevOperator',
     'cheby_rect',
+    'SpectralDensity',
     'lanczos',
-    'lanczos_op'
+    'lanczos_op',
+    'lanczos_analysis',
+    'lanczos_synthesis',
 ]
 
 __all__ = _FILTERS + _APPROXIMATIONS
@@ -44,39 +44,6 @@ class Abspline(Filter):
 
     def __init__(self, G, Nf=6, lpfactor=20, scales=None):
 
-        def kernel_abspline3(x, alpha, beta, t1, t2):
-            M = np.array([[1, t1, t1**2, t1**3],
-                          [1, t2, t2**2, t2**3],
-                          [0, 1, 2*t1, 3*t1**2],
-                          [0, 1, 2*t2, 3*t2**2]])
-            v = np.array([1, 1, t1**(-alpha) * alpha * t1**(alpha - 1),
-                          -beta*t2**(- beta - 1) * t2**beta])
-            a = np.linalg.solve(M, v)
-
-            r1 = x <= t1
-            r2 = (x >= t1)*(x < t2)
-            r3 = (x >= t2)
-
-            if isinstance(x, np.float64):
-
-                if r1:
-                    r = x[r1]**alpha * t1**(-alpha)
-                if r2:
-                    r = a[0] + a[1] * x + a[2] * x**2 + a[3] * x**3
-                if r3:
-                    r = x[r3]**(-beta) * t2**beta
-
-            else:
-                r = np.zeros(x.shape)
-
-                x2 = x[r2]
-
-                r[r1] = x[r1]**alpha * t1**(-alpha)
-                r[r2] = a[0] + a[1] * x2 + a[2] * x2**2 + a[3] * x2**3
-                r[r3] = x[r3]**(-beta) * t2 ** beta
-
-            return r
-
         self.lpfactor = lpfactor
 
         lmin = G.lmax / lpfactor
@@ -85,23 +52,45 @@ class Abspline(Filter):
             scales = utils.compute_log_scales(lmin, G.lmax, Nf - 1)
         self.scales = scales
 
-        gb = lambda x: kernel_abspline3(x, 2, 2, 1, 2)
-        gl = lambda x: np.exp(-np.power(x, 4))
+        # Cubic spline which joins x**alpha and x**(-beta) on [t1, t2].
+        alpha, beta, t1, t2 = 2, 2, 1, 2
+        M = np.array([[1, t1, t1**2, t1**3],
+                      [1, t2, t2**2, t2**3],
+                      [0, 1, 2*t1, 3*t1**2],
+                      [0, 1, 2*t2, 3*t2**2]])
+        v = np.array([1, 1, t1**(-alpha) * alpha * t1**(alpha - 1),
+                      -beta*t2**(- beta - 1) * t2**beta])
+        a = np.linalg.solve(M, v)
+
+        def band_pass(x):
+            x = np.asanyarray(x)
+            r1 = x <= t1
+            r2 = (x >= t1) & (x < t2)
+            r3 = (x >= t2)
+            r = np.zeros(x.shape)
+            x2 = x[r2]
+            r[r1] = x[r1]**alpha * t1**(-alpha)
+            r[r2] = a[0] + a[1] * x2 + a[2] * x2**2 + a[3] * x2**3
+            r[r3] = x[r3]**(-beta) * t2 ** beta
+            return r
 
-        lminfac = .4 * lmin
+        def kernel(x, scale, gain, low_pass):
+            x = scale * x
+            # Low-pass for the first filter, band-pass for the others.
+            y = np.where(low_pass, np.exp(-x**4), band_pass(x))
+            return gain * y
 
-        g = [lambda x: 1.2 * np.exp(-1) * gl(x / lminfac)]
-        for i in range(0, Nf - 1):
-            g.append(lambda x, i=i: gb(self.scales[i] * x))
+        xstar = optimize.minimize_scalar(lambda x: -band_pass(x),
+                                         bounds=(1, 2), method='bounded')
+        gamma_l = band_pass(xstar.x)
 
-        f = lambda x: -gb(x)
-        xstar = optimize.minimize_scalar(f, bounds=(1, 2),
-                                         method='bounded')
-        gamma_l = -f(xstar.x)
-        lminfac = .6 * lmin
-        g[0] = lambda x: gamma_l * gl(x / lminfac)
+        kernels = self._vectorize(
+            kernel,
+            scale=np.concatenate([[1 / (0.6 * lmin)], scales]),
+            gain=np.concatenate([[gamma_l], np.ones(Nf - 1)]),
+            low_pass=np.arange(Nf) == 0)
 
-        super(Abspline, self).__init__(G, g)
+        super(Abspline, self).__init__(G, kernels)
 
     def _get_extra_repr(self):
         return dict(lpfactor='{:.2f}'.format(self.lpfactor))
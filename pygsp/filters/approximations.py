@@ -1,19 +1,38 @@
 # -*- coding: utf-8 -*-
 
+import copy
+import os
+import multiprocessing
+
 import numpy as np
-from scipy import sparse
+from scipy import sparse, linalg, fftpack
+from scipy.sparse import linalg as splinalg
 
 from pygsp import utils
 
+try:
+    # Sparse-dense product accumulating in place (Y += A X).
+    from scipy.sparse._sparsetools import csr_matvecs as _csr_matvecs
+except ImportError:
+    _csr_matvecs = None
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8.
+    shared_memory = None
+
 
 _logger = utils.build_logger(__name__)
 
 
-@utils.filterbank_handler
 def compute_cheby_coeff(f, m=30, N=None, *args, **kwargs):
     r"""
     Compute Chebyshev coefficients for a Filterbank.
 
+    The kernels are evaluated once at the ``N`` Chebyshev nodes and the
+    coefficients of all the filters are obtained together with a discrete
+    cosine transform (DCT-II), i.e., in :math:`O(N_f N \log N)`.
+
     Parameters
     ----------
     f : Filter
@@ -26,16 +45,29 @@ def compute_cheby_coeff(f, m=30, N=None, *args, **kwargs):
         (default = m + 1)
     i : int
         Index of the Filterbank element to compute
-        (default = 0)
+        (default: all the filters)
 
     Returns
     -------
     c : ndarray
-        Matrix of Chebyshev coefficients
+        Matrix of Chebyshev coefficients, of shape ``(Nf, m+1)``, or vector
+        of length ``m+1`` if the filterbank has a single filter or ``i`` is
+        given.
+
+    Examples
+    --------
+    >>> G = graphs.Ring(N=20)
+    >>> G.estimate_lmax()
+    >>> g = filters.Heat(G, scale=[1, 10])
+    >>> c = filters.compute_cheby_coeff(g, m=10)
+    >>> c.shape
+    (2, 11)
+    >>> filters.compute_cheby_coeff(g, m=10, i=1).shape
+    (11,)
 
     """
     G = f.G
-    i = kwargs.pop('i', 0)
+    i = kwargs.pop('i', None)
 
     if not N:
         N = m + 1
@@ -44,15 +76,96 @@ def compute_cheby_coeff(f, m=30, N=None, *args, **kwargs):
 
     a1 = (a_arange[1] - a_arange[0]) / 2
     a2 = (a_arange[1] + a_arange[0]) / 2
-    c = np.zeros(m + 1)
 
     tmpN = np.arange(N)
     num = np.cos(np.pi * (tmpN + 0.5) / N)
-    for o in range(m + 1):
-        c[o] = 2. / N * np.dot(f._kernels[i](a1 * num + a2),
-                               np.cos(np.pi * o * (tmpN + 0.5) / N))
+    y = f.evaluate(a1 * num + a2)
+
+    if m < N:
+        # c[o] = 2/N sum_n y[n] cos(pi o (n+1/2) / N), the DCT-II of y.
+        c = fftpack.dct(y, type=2, axis=-1)[:, :m + 1] / N
+    else:
+        # The DCT only gives N coefficients. Quadrature for the higher orders.
+        cos = np.cos(np.pi * np.outer(tmpN + 0.5, np.arange(m + 1)) / N)
+        c = 2. / N * y.dot(cos)
+
+    if i is not None:
+        return c[i]
+    elif f.Nf <= 1:
+        return c[0]
+    else:
+        return c
+
 
-    return c
+def compute_cheby_order(f, tol=1e-6, max_order=200):
+    r"""
+    Smallest Chebyshev orders approximating a filter bank within a tolerance.
+
+    The coefficients of each filter are computed up to ``max_order``. The
+    order of a filter is the smallest degree :math:`m` such that the sup-norm
+    error of the truncated expansion on :math:`[0, \lambda_{max}]` is below
+    the tolerance. The sup-norm is measured on a fine grid.
+
+    Parameters
+    ----------
+    f : Filter
+        Filter bank.
+    tol : float
+        Maximum absolute error of the approximation (default = 1e-6).
+    max_order : int
+        Maximum order (default = 200). Discontinuous filters, like
+        :class:`Rectangular`, cannot be approximated within a small tolerance
+        by polynomials. A warning is issued if the tolerance is not reached.
+
+    Returns
+    -------
+    orders : ndarray
+        Order of each filter, at least 1.
+    errors : ndarray
+        Sup-norm error of the approximation of each filter at its order.
+
+    Examples
+    --------
+    >>> G = graphs.Ring(N=20)
+    >>> G.estimate_lmax()
+    >>> g = filters.Heat(G, scale=[1, 10])
+    >>> orders, errors = filters.compute_cheby_order(g, tol=1e-6)
+    >>> orders
+    array([ 5, 12])
+    >>> np.all(errors < 1e-6)
+    True
+
+    """
+    c = np.atleast_2d(f._get_cheby_coeff(max_order))
+
+    # Sup-norm error of the partial sums on a fine grid of [-1, 1].
+    x = np.cos(np.linspace(0, np.pi, max(1000, 4 * max_order)))
+    y = f.evaluate(f.G.lmax / 2. * (x + 1))
+    y = np.atleast_2d(y)
+    errors = np.empty_like(c)
+    T_old, T_cur = np.ones_like(x), x
+    p = np.outer(c[:, 0] / 2., T_old)
+    errors[:, 0] = np.max(np.abs(y - p), axis=1)
+    for k in range(1, max_order + 1):
+        p += np.outer(c[:, k], T_cur)
+        errors[:, k] = np.max(np.abs(y - p), axis=1)
+        T_old, T_cur = T_cur, 2 * x * T_cur - T_old
+
+    # The sum of the tail coefficients is not a bound, as it is truncated at
+    # max_order: only the measured error is trusted.
+    below = errors <= tol
+    below[:, 0] = False  # At least order 1.
+    below[:, -1] = True
+    orders = np.argmax(below, axis=1)
+    errors = errors[np.arange(f.Nf), orders]
+
+    for i in np.flatnonzero(errors > tol):
+        _logger.warning('The Chebyshev approximation of order {} of filter {} '
+                        'does not reach the tolerance {} (error is {:.2e}). '
+                        'Consider the Lanczos method for non-smooth '
+                        'filters.'.format(orders[i], i, tol, errors[i]))
+
+    return orders, errors
 
 
 def cheby_op(G, c, signal, **kwargs):
@@ -66,52 +179,1109 @@ def cheby_op(G, c, signal, **kwargs):
         Chebyshev coefficients for a Filter or a Filterbank
     signal : ndarray
         Signal to filter
+    kwargs : dict
+        Passed to :func:`cheby_analysis`, e.g., ``workers``.
 
     Returns
     -------
     r : ndarray
-        Result of the filtering
+        Result of the filtering, of shape ``(G.N * Nscales, Nv)`` (the
+        responses to the filters are stacked).
+
+    See also
+    --------
+    cheby_analysis : same computation, returned as a ``(G.N, Nv, Nscales)``
+        tensor without any copy.
 
     """
-    # Handle if we do not have a list of filters but only a simple filter in cheby_coeff.
-    if not isinstance(c, np.ndarray):
-        c = np.array(c)
+    r = cheby_analysis(G, c, signal, **kwargs)
+    r = np.moveaxis(r, -1, 0)
+    return r.reshape((-1,) + r.shape[2:])
+
 
+def cheby_analysis(G, c, signal, out=None, accumulate=None, workers=1,
+                   chunk_size=None, nodes=None):
+    r"""
+    Filter signals with a filter bank of Chebyshev polynomials.
+
+    The three-term recurrence :math:`T_k(L) x` is computed once for all the
+    signals, which are kept in a contiguous ``(G.N, Nv)`` block. At each
+    order, all the filters are applied at once by a single rank-one update
+    (BLAS ``ger``) of the output, which is written in its final layout.
+
+    As a polynomial of degree :math:`K` is exactly localized in :math:`K`
+    hops, the result at a few ``nodes`` only needs their :math:`K`-hop
+    neighborhood (see :meth:`pygsp.graphs.Graph.get_neighborhood`). The
+    recurrence then runs on the rows and columns of the Laplacian indexed by
+    the neighborhood. While the values at its boundary are wrong (the
+    Laplacian is truncated), the errors propagate by one hop per order and
+    never reach the requested nodes. The cost thus depends on the size of
+    the neighborhood, not of the graph.
+
+    Parameters
+    ----------
+    G : Graph
+    c : ndarray
+        Chebyshev coefficients, of shape ``(Nscales, M)``, or ``(M,)`` for a
+        single filter.
+    signal : ndarray
+        Signals to filter, of shape ``(G.N,)`` or ``(G.N, Nv)``.
+    out : ndarray
+        C-contiguous array of shape ``(G.N, Nv, Nscales)`` where to write the
+        result. Allocated if None (the default).
+    accumulate : data-type
+        Type in which the terms of the expansion are summed, and of the
+        result. The sparse products are computed in the type given by the
+        Laplacian and the signal (float32 if both are float32). Use
+        ``np.float64`` to filter in single precision and accumulate in double
+        precision. Ignored if ``out`` is given.
+    workers : int
+        Number of processes among which the signals are split. The Laplacian,
+        the signals, and the result are shared, not copied. -1 means all the
+        CPUs. The result is identical to the serial computation (the default).
+    chunk_size : int
+        Number of signals per task if ``workers > 1``. Defaults to an equal
+        split among the workers.
+    nodes : array_like
+        Indices of the nodes where to compute the result. All the nodes if
+        None (the default). ``G.N`` is then replaced by ``len(nodes)`` in
+        the shapes of ``out`` and of the result.
+
+    Returns
+    -------
+    r : ndarray
+        Result of the filtering, of shape ``(G.N, Nv, Nscales)``, or
+        ``(G.N, Nscales)`` if the signal is 1D.
+
+    Examples
+    --------
+    >>> G = graphs.Ring(N=20)
+    >>> G.estimate_lmax()
+    >>> g = filters.Heat(G, scale=[1, 10])
+    >>> c = filters.compute_cheby_coeff(g, m=30)
+    >>> s = np.random.RandomState(42).normal(size=(G.N, 5))
+    >>> filters.cheby_analysis(G, c, s).shape
+    (20, 5, 2)
+
+    Single precision graphs and signals are filtered in single precision:
+
+    >>> G = graphs.Ring(N=20, dtype=np.float32)
+    >>> G.estimate_lmax()
+    >>> s = s.astype(np.float32)
+    >>> filters.cheby_analysis(G, c, s).dtype
+    dtype('float32')
+    >>> filters.cheby_analysis(G, c, s, accumulate=np.float64).dtype
+    dtype('float64')
+
+    The result at two nodes is exact, and only depends on their neighbors:
+
+    >>> G = graphs.Grid2d(100)
+    >>> G.estimate_lmax()
+    >>> s = np.random.RandomState(42).normal(size=G.N)
+    >>> y = filters.cheby_analysis(G, c, s, nodes=[10, 5000])
+    >>> y.shape
+    (2, 2)
+    >>> np.allclose(y, filters.cheby_analysis(G, c, s)[[10, 5000]])
+    True
+
+    """
     c = np.atleast_2d(c)
     Nscales, M = c.shape
 
     if M < 2:
         raise TypeError("The coefficients have an invalid shape")
 
-    # thanks to that, we can also have 1d signal.
-    try:
-        Nv = np.shape(signal)[1]
-        r = np.zeros((G.N * Nscales, Nv))
-    except IndexError:
-        r = np.zeros((G.N * Nscales))
+    signal = np.asarray(signal)
+    if signal.shape[0] != G.N:
+        raise ValueError('First dimension should be the number of nodes '
+                         'G.N = {}, got {}.'.format(G.N, signal.shape))
+    shape = signal.shape[1:]
+    Nv = int(np.prod(shape))
+    dtype = np.result_type(G.L.dtype, signal.dtype, np.float32)
+    n_nodes = G.N if nodes is None else np.size(nodes)
+
+    if out is None:
+        out = np.empty((n_nodes, Nv, Nscales), dtype=accumulate or dtype)
+    elif out.shape != (n_nodes, Nv, Nscales) or not out.flags.c_contiguous:
+        raise ValueError('out should be a C-contiguous array of shape '
+                         '{}, got {}.'.format((n_nodes, Nv, Nscales),
+                                              out.shape))
+
+    signal = signal.reshape(G.N, Nv)
+    if nodes is None:
+        factor = _cheby_factor(G, dtype)
+        _cheby_run(_cheby_analysis, factor, c, signal, out, workers,
+                   chunk_size)
+    else:
+        nodes = np.asanyarray(nodes, dtype=int).ravel()
+        index = G.get_neighborhood(nodes, hops=M-1)
+        factor = _cheby_factor(G, dtype, index)
+        local = np.empty((len(index), Nv, Nscales), dtype=out.dtype)
+        _cheby_run(_cheby_analysis, factor, c, signal[index], local, workers,
+                   chunk_size)
+        out[...] = local[np.searchsorted(index, nodes)]
+
+    return out.reshape((n_nodes,) + shape + (Nscales,))
+
+
+def cheby_synthesis(G, c, signal, out=None, max_memory=None, workers=1,
+                    chunk_size=None):
+    r"""
+    Synthesize signals with a filter bank of Chebyshev polynomials.
 
-    a_arange = [0, G.lmax]
+    Computes :math:`y = \sum_i g_i(L) x_i`, the adjoint of
+    :func:`cheby_analysis`. As the Laplacian is symmetric, the sum is
+    rewritten as :math:`y = \sum_k T_k(L) d_k` with :math:`d_k = \sum_i c_{i,k}
+    x_i`, which is evaluated by a single Clenshaw (backward) recurrence. The
+    cost is thus one sparse product per order, whatever the number of
+    filters.
 
-    a1 = float(a_arange[1] - a_arange[0]) / 2.
-    a2 = float(a_arange[1] + a_arange[0]) / 2.
+    Parameters
+    ----------
+    G : Graph
+    c : ndarray
+        Chebyshev coefficients, of shape ``(Nscales, M)``.
+    signal : ndarray
+        Filter bank coefficients, of shape ``(G.N, Nv, Nscales)`` or
+        ``(G.N, Nscales)``.
+    out : ndarray
+        C-contiguous array of shape ``(G.N, Nv)`` where to write the result.
+        Allocated if None (the default).
+    max_memory : int
+        Maximum size in bytes of the working buffers. The signals are
+        processed by chunks of columns to stay below. No limit if None (the
+        default).
+    workers : int
+        Number of processes among which the signals are split (see
+        :func:`cheby_analysis`). ``max_memory`` is per process.
+    chunk_size : int
+        Number of signals per task if ``workers > 1``.
+
+    Returns
+    -------
+    r : ndarray
+        Synthesized signals, of shape ``(G.N, Nv)``, or ``(G.N,)`` if the
+        signal is of shape ``(G.N, Nscales)``.
+
+    Examples
+    --------
+    >>> G = graphs.Ring(N=20)
+    >>> G.estimate_lmax()
+    >>> g = filters.Heat(G, scale=[1, 10])
+    >>> c = filters.compute_cheby_coeff(g, m=30)
+    >>> s = np.random.RandomState(42).normal(size=(G.N, 5))
+    >>> y = filters.cheby_analysis(G, c, s)
+    >>> filters.cheby_synthesis(G, c, y).shape
+    (20, 5)
+
+    """
+    c = np.atleast_2d(c)
+    Nscales, M = c.shape
+
+    if M < 2:
+        raise TypeError("The coefficients have an invalid shape")
+
+    signal = np.asarray(signal)
+    if signal.shape[0] != G.N or signal.shape[-1] != Nscales:
+        raise ValueError('Signal should be of shape (G.N, Nv, Nscales) = '
+                         '({}, Nv, {}), got {}.'.format(G.N, Nscales,
+                                                        signal.shape))
+    shape = signal.shape[1:-1]
+    Nv = int(np.prod(shape))
+    dtype = np.result_type(G.L.dtype, signal.dtype, np.float32)
+
+    if out is None:
+        out = np.empty((G.N, Nv), dtype=dtype)
+    else:
+        _check_out(out, [(G.N, Nv), (G.N,) + shape], dtype)
+
+    factor = _cheby_factor(G, dtype)
+    _cheby_run(_cheby_synthesis, factor, c,
+               signal.reshape(G.N, Nv, Nscales), out.reshape(G.N, Nv),
+               workers, chunk_size, max_memory)
+
+    return out.reshape((G.N,) + shape)
+
+
+def cheby_clenshaw(G, c, signal, out=None, max_memory=None, workers=1,
+                   chunk_size=None):
+    r"""
+    Filter signals with Chebyshev polynomials, in bounded memory.
+
+    Low-memory alternative to :func:`cheby_analysis`. Each filter is evaluated
+    by the Clenshaw (backward) recurrence
+
+    .. math:: b_k = c_k x + 2 \tilde{L} b_{k+1} - b_{k+2},
+
+    where :math:`\tilde{L}` is the Laplacian mapped to :math:`[-1, 1]`. The
+    recurrence runs on a fixed set of preallocated buffers which are updated
+    in place, and the signals are processed by chunks of columns such that
+    the working buffers do not exceed ``max_memory``. The output is written
+    in place.
+
+    As each filter has its own recurrence, the cost is ``Nscales`` times the
+    cost of :func:`cheby_analysis`. It is the same for a single filter.
+
+    Parameters
+    ----------
+    G : Graph
+    c : ndarray
+        Chebyshev coefficients, of shape ``(Nscales, M)``, or ``(M,)`` for a
+        single filter.
+    signal : ndarray
+        Signals to filter, of shape ``(G.N,)`` or ``(G.N, Nv)``.
+    out : ndarray
+        C-contiguous array of shape ``(G.N, Nv, Nscales)`` where to write the
+        result. Allocated if None (the default).
+    max_memory : int
+        Maximum size in bytes of the working buffers (three blocks of
+        ``G.N`` rows). No limit if None (the default).
+    workers : int
+        Number of processes among which the signals are split (see
+        :func:`cheby_analysis`). ``max_memory`` is per process.
+    chunk_size : int
+        Number of signals per task if ``workers > 1``.
+
+    Returns
+    -------
+    r : ndarray
+        Result of the filtering, of shape ``(G.N, Nv, Nscales)``, or
+        ``(G.N, Nscales)`` if the signal is 1D.
+
+    Examples
+    --------
+    >>> G = graphs.Ring(N=20)
+    >>> G.estimate_lmax()
+    >>> g = filters.Heat(G, scale=[1, 10])
+    >>> c = filters.compute_cheby_coeff(g, m=30)
+    >>> s = np.random.RandomState(42).normal(size=(G.N, 100))
+    >>> y1 = filters.cheby_analysis(G, c, s)
+    >>> y2 = filters.cheby_clenshaw(G, c, s, max_memory=10*G.N*8)
+    >>> np.allclose(y1, y2)
+    True
+
+    """
+    c = np.atleast_2d(c)
+    Nscales, M = c.shape
+
+    if M < 2:
+        raise TypeError("The coefficients have an invalid shape")
+
+    signal = np.asarray(signal)
+    if signal.shape[0] != G.N:
+        raise ValueError('First dimension should be the number of nodes '
+                         'G.N = {}, got {}.'.format(G.N, signal.shape))
+    shape = signal.shape[1:]
+    Nv = int(np.prod(shape))
+    dtype = np.result_type(G.L.dtype, signal.dtype, np.float32)
+
+    if out is None:
+        out = np.empty((G.N, Nv, Nscales), dtype=dtype)
+    else:
+        _check_out(out, [(G.N, Nv, Nscales), (G.N,) + shape + (Nscales,)],
+                   dtype)
+
+    factor = _cheby_factor(G, dtype)
+    _cheby_run(_cheby_clenshaw, factor, c, signal.reshape(G.N, Nv),
+               out.reshape(G.N, Nv, Nscales), workers, chunk_size, max_memory)
+
+    return out.reshape((G.N,) + shape + (Nscales,))
+
+
+def cheby_mapping(G, c, signal, out=None, max_memory=None, workers=1,
+                  chunk_size=None):
+    r"""
+    Map input features to output features with Chebyshev polynomials.
+
+    Computes :math:`y_j = \sum_i g_{ij}(L) x_i` for a filter bank of
+    ``n_in`` inputs and ``n_out`` outputs, e.g., the convolutional layer of a
+    graph neural network. The sum is rewritten as :math:`Y = \sum_k T_k(L) X
+    C_k`, where the columns of :math:`X` are the input features and
+    :math:`C_k` is the ``(n_in, n_out)`` matrix of the coefficients of order
+    :math:`k`. The recurrence :math:`T_k(L) X` runs once for all the inputs,
+    and is contracted with the coefficients by a matrix product. The number
+    of sparse products thus grows with ``n_in`` but not with ``n_in *
+    n_out``.
+
+    Parameters
+    ----------
+    G : Graph
+    c : ndarray
+        Chebyshev coefficients, of shape ``(M, n_in, n_out)``.
+    signal : ndarray
+        Input features, of shape ``(G.N, Nv, n_in)`` or ``(G.N, n_in)``.
+    out : ndarray
+        C-contiguous array of shape ``(G.N, Nv, n_out)`` where to write the
+        result. Allocated if None (the default).
+    max_memory : int
+        Maximum size in bytes of the working buffers. The signals are
+        processed by chunks of columns to stay below. No limit if None (the
+        default).
+    workers : int
+        Number of processes among which the signals are split (see
+        :func:`cheby_analysis`).
+    chunk_size : int
+        Number of signals per task if ``workers > 1``.
+
+    Returns
+    -------
+    r : ndarray
+        Output features, of shape ``(G.N, Nv, n_out)``, or ``(G.N, n_out)``
+        if the signal is of shape ``(G.N, n_in)``.
+
+    Examples
+    --------
+    >>> G = graphs.Ring(N=20)
+    >>> G.estimate_lmax()
+    >>> c = np.random.RandomState(42).normal(size=(10, 3, 4))
+    >>> s = np.random.RandomState(42).normal(size=(G.N, 5, 3))
+    >>> filters.cheby_mapping(G, c, s).shape
+    (20, 5, 4)
+
+    """
+    c = np.asarray(c)
+    if c.ndim != 3 or c.shape[0] < 2:
+        raise ValueError('The coefficients should be of shape (M, n_in, '
+                         'n_out) with M > 1, got {}.'.format(c.shape))
+    M, n_in, n_out = c.shape
+
+    signal = np.asarray(signal)
+    if signal.shape[0] != G.N or signal.shape[-1] != n_in:
+        raise ValueError('Signal should be of shape (G.N, Nv, n_in) = '
+                         '({}, Nv, {}), got {}.'.format(G.N, n_in,
+                                                        signal.shape))
+    shape = signal.shape[1:-1]
+    Nv = int(np.prod(shape))
+    dtype = np.result_type(G.L.dtype, signal.dtype, np.float32)
+
+    if out is None:
+        out = np.empty((G.N, Nv, n_out), dtype=dtype)
+    elif out.shape != (G.N, Nv, n_out) or not out.flags.c_contiguous:
+        raise ValueError('out should be a C-contiguous array of shape '
+                         '{}, got {}.'.format((G.N, Nv, n_out), out.shape))
+
+    factor = _cheby_factor(G, dtype)
+    _cheby_run(_cheby_mapping, factor, c, signal.reshape(G.N, Nv, n_in), out,
+               workers, chunk_size, max_memory)
+
+    return out.reshape((G.N,) + shape + (n_out,))
+
+
+class ChebyshevOperator(splinalg.LinearOperator):
+    r"""
+    Filter bank compiled to Chebyshev polynomials of the graph Laplacian.
 
-    twf_old = signal
-    twf_cur = (G.L.dot(signal) - a2 * signal) / a1
+    The compiled operator holds everything needed to filter, and only that:
+    the Laplacian shifted and scaled to :math:`[-1, 1]`, stored once as a
+    canonical CSR matrix, and the Chebyshev coefficients of the filters. It
+    doesn't hold a reference to the filter bank nor to the graph (with its
+    eventual Fourier basis), and is meant to be kept in memory to filter
+    many signals.
 
-    tmpN = np.arange(G.N, dtype=int)
-    for i in range(Nscales):
-        r[tmpN + G.N*i] = 0.5 * c[i, 0] * twf_old + c[i, 1] * twf_cur
+    As a :class:`scipy.sparse.linalg.LinearOperator`, it represents the
+    analysis operator of shape ``(Nf * N, N)``, whose rows are those of
+    :meth:`pygsp.filters.Filter.compute_frame`. Its adjoint is the synthesis
+    operator.
+
+    Parameters
+    ----------
+    f : Filter
+        The filter bank to compile. The graph's :attr:`lmax` is used.
+    order : int or 'auto'
+        Degree of the Chebyshev polynomials (default = 30). If 'auto', the
+        smallest degrees which approximate the kernels within ``tol`` (see
+        :func:`compute_cheby_order`).
+    tol : float
+        Maximum error of the approximations if ``order='auto'``.
+
+    Attributes
+    ----------
+    coefficients : ndarray
+        Chebyshev coefficients, of shape ``(Nf, order+1)``.
+    orders : ndarray
+        Degree of the polynomial approximating each filter.
+    errors : ndarray
+        Sup-norm error of each approximation if ``order='auto'``, None
+        otherwise.
+    factor : sparse matrix
+        The scaled and shifted Laplacian :math:`4 L / \lambda_{max} - 2 I`.
+    lmax : float
+        Upper bound of the approximation interval :math:`[0, \lambda_{max}]`.
+    n_vertices : int
+        Number of nodes of the graph.
+    n_filters : int
+        Number of filters in the filter bank.
+
+    Examples
+    --------
+    >>> G = graphs.Sensor(30, seed=42)
+    >>> G.estimate_lmax()
+    >>> g = filters.MexicanHat(G, Nf=4)
+    >>> op = filters.ChebyshevOperator(g, order=30)
+    >>> s = np.random.RandomState(42).normal(size=(G.N, 10))
+    >>> y = op.apply(s)
+    >>> y.shape
+    (30, 10, 4)
+    >>> np.allclose(y, g.filter(s))
+    True
+    >>> op.apply_adjoint(y).shape
+    (30, 10)
+
+    Use it wherever scipy expects a linear operator:
+
+    >>> op.shape
+    (120, 30)
+    >>> frame = g.compute_frame()
+    >>> np.allclose(op.dot(s[:, 0]), frame.dot(s[:, 0]))
+    True
+
+    Operators are combined in the domain of the Chebyshev coefficients. Sums
+    and scalings combine the coefficients, while products (i.e., the
+    composition of the filtering operators) use the product rule :math:`T_m
+    T_n = (T_{m+n} + T_{|m-n|}) / 2` (see :meth:`multiply`). A chain of
+    filters is thus applied by a single recurrence:
+
+    >>> h1 = filters.ChebyshevOperator(filters.Heat(G, 10))
+    >>> h2 = filters.ChebyshevOperator(filters.Heat(G, 5))
+    >>> h = 2 * h2 @ h1 - h1
+    >>> h
+    ChebyshevOperator(n_vertices=30, n_filters=1, order=60)
+    >>> y1 = h1.apply(s)[..., 0]
+    >>> y2 = 2 * h2.apply(y1)[..., 0] - y1
+    >>> np.allclose(h.apply(s)[..., 0], y2)
+    True
+
+    The product of a filter bank with a filter is computed filter-wise:
+
+    >>> (op @ h1).n_filters
+    4
+
+    """
+
+    def __init__(self, f, order=30, tol=1e-6):
+        self.lmax = f.G.lmax
+        self.n_vertices = f.G.N
+        self.n_filters = f.Nf
+        if order == 'auto':
+            self.coefficients, self.orders, self.errors = f._get_cheby_coeff(
+                order, tol=tol, return_orders=True)
+        else:
+            self.coefficients = f._get_cheby_coeff(order)
+            self.orders = np.full(f.Nf, order)
+            self.errors = None
+        self.order = self.coefficients.shape[1] - 1
+        dtype = np.result_type(f.G.L.dtype, np.float32)
+        self.factor = _cheby_factor(f.G, dtype)
+        self.factor.sum_duplicates()  # Canonical format, sorted indices.
+        shape = (self.n_filters * self.n_vertices, self.n_vertices)
+        super(ChebyshevOperator, self).__init__(dtype, shape)
+
+    def __repr__(self):
+        return '{}(n_vertices={}, n_filters={}, order={})'.format(
+            self.__class__.__name__, self.n_vertices, self.n_filters,
+            self.order)
+
+    def _with_coefficients(self, coefficients):
+        r"""Return an operator with the same Laplacian and new coefficients."""
+        op = copy.copy(self)
+        coefficients = np.array(coefficients, dtype=float)
+        if coefficients.shape[1] < 2:  # The recurrences start at T_1.
+            coefficients = np.pad(coefficients, [(0, 0), (0, 1)])
+        coefficients.flags.writeable = False
+        op.coefficients = coefficients
+        op.n_filters, op.order = coefficients.shape
+        op.order -= 1
+        nonzero = coefficients[:, ::-1] != 0
+        op.orders = op.order - np.argmax(nonzero, axis=1)
+        op.orders[~nonzero.any(axis=1)] = 0
+        op.errors = None
+        op.shape = (op.n_filters * op.n_vertices, op.n_vertices)
+        return op
+
+    def _align(self, other):
+        r"""Broadcast and zero-pad the coefficients of two operators."""
+        if (other.n_vertices != self.n_vertices or other.lmax != self.lmax
+                or other.dtype != self.dtype):
+            raise ValueError('Operators must be compiled for the same graph '
+                             '(number of nodes, lmax, and dtype).')
+        if 1 not in (self.n_filters, other.n_filters) and \
+                self.n_filters != other.n_filters:
+            raise ValueError('Cannot combine {} and {} filters.'.format(
+                self.n_filters, other.n_filters))
+        n_filters = max(self.n_filters, other.n_filters)
+        order = max(self.order, other.order)
+        a = np.zeros((n_filters, order + 1))
+        b = np.zeros((n_filters, order + 1))
+        a[:, :self.order+1] = self.coefficients
+        b[:, :other.order+1] = other.coefficients
+        return a, b
+
+    def __add__(self, other):
+        if not isinstance(other, ChebyshevOperator):
+            return super(ChebyshevOperator, self).__add__(other)
+        a, b = self._align(other)
+        return self._with_coefficients(a + b)
+
+    def __sub__(self, other):
+        if not isinstance(other, ChebyshevOperator):
+            return super(ChebyshevOperator, self).__sub__(other)
+        return self + (-other)
+
+    def __neg__(self):
+        return self * -1
+
+    def __mul__(self, other):
+        if isinstance(other, ChebyshevOperator):
+            return self.multiply(other)
+        if np.isscalar(other) and np.isrealobj(other):
+            return self._with_coefficients(other * self.coefficients)
+        return super(ChebyshevOperator, self).__mul__(other)
+
+    def __rmul__(self, other):
+        if np.isscalar(other) and np.isrealobj(other):
+            return self._with_coefficients(other * self.coefficients)
+        return super(ChebyshevOperator, self).__rmul__(other)
+
+    def __matmul__(self, other):
+        if isinstance(other, ChebyshevOperator):
+            return self.multiply(other)
+        return super(ChebyshevOperator, self).__matmul__(other)
+
+    def __pow__(self, p):
+        return self.power(p)
+
+    def multiply(self, other, order=None):
+        r"""Product of the filters, i.e., composition of their operators.
+
+        The kernels are multiplied filter-wise, such that applying the product
+        is equivalent to applying one operator after the other. A filter bank
+        can be multiplied by a single filter.
+
+        Parameters
+        ----------
+        other : ChebyshevOperator
+            Operator compiled for the same graph.
+        order : int
+            Degree at which the product is truncated. The degree of the exact
+            product is the sum of the degrees if None (the default).
+
+        Returns
+        -------
+        op : ChebyshevOperator
+        """
+        a, b = self._align(other)
+        a = a[:, :self.order+1]
+        b = b[:, :other.order+1]
+        # With c_0 / 2 as the constant term, T_i T_j = (T_{i+j} + T_{|i-j|})/2.
+        a[:, 0] /= 2
+        b[:, 0] /= 2
+        n = b.shape[1]
+        c = np.zeros((a.shape[0], a.shape[1] + n - 1))
+        for i in range(a.shape[1]):
+            terms = a[:, i:i+1] * b / 2
+            c[:, i:i+n] += terms
+            np.add.at(c, (slice(None), np.abs(i - np.arange(n))), terms)
+        c[:, 0] *= 2
+        if order is not None:
+            c = c[:, :order+1]
+        return self._with_coefficients(c)
+
+    def power(self, p, order=None):
+        r"""Integer power of the filters, e.g., :math:`g(L)^2`.
+
+        Parameters
+        ----------
+        p : int
+            Non-negative exponent.
+        order : int
+            Degree at which the products are truncated (see
+            :meth:`multiply`).
+
+        Returns
+        -------
+        op : ChebyshevOperator
+        """
+        if int(p) != p or p < 0:
+            raise ValueError('The exponent must be a non-negative integer, '
+                             'got {}.'.format(p))
+        result = self._with_coefficients(np.full((self.n_filters, 1), 2.))
+        square = self
+        p = int(p)
+        while p:
+            if p % 2:
+                result = result.multiply(square, order)
+            p //= 2
+            if p:
+                square = square.multiply(square, order)
+        return result
+
+    def _check(self, X, n_features):
+        X = np.asarray(X)
+        if X.shape[0] != self.n_vertices:
+            raise ValueError('First dimension should be the number of nodes '
+                             'N = {}, got {}.'.format(self.n_vertices,
+                                                      X.shape))
+        if n_features is not None and X.shape[-1] != n_features:
+            raise ValueError('Last dimension (#features) should be the number '
+                             'of filters Nf = {}, got {}.'.format(n_features,
+                                                                  X.shape))
+        return X
+
+    def _check_out(self, out, shapes):
+        r"""Check that the results can be written in place in ``out``."""
+        if out.shape not in shapes:
+            raise ValueError('out should be of shape {}, got {}.'.format(
+                shapes[0], out.shape))
+        if out.dtype != self.dtype:
+            raise ValueError('out should be of dtype {}, got {}.'.format(
+                self.dtype, out.dtype))
+        # Otherwise the reshapes would be written to copies.
+        if not out.flags.c_contiguous:
+            raise ValueError('out should be C-contiguous.')
+
+    def apply(self, X, out=None):
+        r"""Filter signals (analysis).
+
+        Parameters
+        ----------
+        X : ndarray
+            Signals, of shape ``(N,)`` or ``(N, n_signals)``.
+        out : ndarray
+            C-contiguous array of shape ``(N, n_signals, Nf)`` and of the
+            operator's dtype where to write the result. Allocated if None (the
+            default).
+
+        Returns
+        -------
+        Y : ndarray
+            Filtered signals, of shape ``(N, n_signals, Nf)``, or ``(N, Nf)``
+            if X is 1D.
+        """
+        X = self._check(X, None)
+        shape = X.shape[1:]
+        Nv = int(np.prod(shape))
+        if out is None:
+            out = np.empty((self.n_vertices, Nv, self.n_filters),
+                           dtype=self.dtype)
+        else:
+            self._check_out(out, [
+                (self.n_vertices, Nv, self.n_filters),
+                (self.n_vertices,) + shape + (self.n_filters,)])
+        _cheby_analysis(self.factor, self.coefficients,
+                        X.reshape(self.n_vertices, Nv), out)
+        return out.reshape((self.n_vertices,) + shape + (self.n_filters,))
+
+    def apply_adjoint(self, Y, out=None, max_memory=None):
+        r"""Synthesize signals (adjoint of :meth:`apply`).
+
+        Parameters
+        ----------
+        Y : ndarray
+            Coefficients, of shape ``(N, n_signals, Nf)`` or ``(N, Nf)``.
+        out : ndarray
+            C-contiguous array of shape ``(N, n_signals)`` and of the
+            operator's dtype where to write the result. Allocated if None (the
+            default).
+        max_memory : int
+            Maximum size in bytes of the working buffers.
+            See :func:`cheby_synthesis`.
+
+        Returns
+        -------
+        X : ndarray
+            Synthesized signals, of shape ``(N, n_signals)``, or ``(N,)`` if
+            Y is 2D.
+        """
+        Y = self._check(Y, self.n_filters)
+        shape = Y.shape[1:-1]
+        Nv = int(np.prod(shape))
+        if out is None:
+            out = np.empty((self.n_vertices, Nv), dtype=self.dtype)
+        else:
+            self._check_out(out, [(self.n_vertices, Nv),
+                                  (self.n_vertices,) + shape])
+        _cheby_synthesis(self.factor, self.coefficients,
+                         Y.reshape(self.n_vertices, Nv, self.n_filters),
+                         out.reshape(self.n_vertices, Nv), max_memory)
+        return out.reshape((self.n_vertices,) + shape)
+
+    def _matmat(self, X):
+        Y = self.apply(X)  # N x n_signals x Nf
+        Y = np.moveaxis(Y, -1, 0)
+        return Y.reshape(self.shape[0], -1)
+
+    def _matvec(self, x):
+        return self._matmat(x.reshape(-1, 1)).reshape(-1)
+
+    def _rmatmat(self, Y):
+        Y = Y.reshape(self.n_filters, self.n_vertices, -1)
+        return self.apply_adjoint(np.moveaxis(Y, 0, -1))
+
+    def _rmatvec(self, y):
+        return self._rmatmat(y.reshape(-1, 1)).reshape(-1)
+
+
+def _cheby_analysis(factor, c, signal, out):
+    r"""Forward recurrence of :func:`cheby_analysis`, with a given factor.
+
+    ``signal`` is of shape ``(N, Nv)`` and ``out`` is a C-contiguous array of
+    shape ``(N, Nv, Nscales)``. The recurrence is computed in the dtype of
+    ``factor`` and accumulated in the dtype of ``out``.
+    """
+    Nscales, M = c.shape
+
+    # The output seen as a (Nscales, N * Nv) Fortran-ordered matrix.
+    acc = out.reshape(-1, Nscales).T
+
+    # Two preallocated buffers, updated in place: T_k = factor T_{k-1} -
+    # T_{k-2} overwrites T_{k-2}.
+    twf_old = np.array(signal, dtype=factor.dtype)
+    twf_cur = np.zeros_like(twf_old)
+    _csr_dot_add(factor, twf_old, twf_cur)
+    twf_cur *= 0.5
+
+    np.multiply(twf_old[:, :, np.newaxis], 0.5 * c[:, 0], out=out)
+    _rank1_update(acc, c[:, 1], twf_cur)
 
-    factor = 2/a1 * (G.L - a2 * sparse.eye(G.N))
     for k in range(2, M):
-        twf_new = factor.dot(twf_cur) - twf_old
+        np.negative(twf_old, out=twf_old)
+        _csr_dot_add(factor, twf_cur, twf_old)
+        _rank1_update(acc, c[:, k], twf_old)
+        twf_old, twf_cur = twf_cur, twf_old
+
+
+def _cheby_synthesis(factor, c, signal, out, max_memory=None):
+    r"""Clenshaw recurrence of :func:`cheby_synthesis`, with a given factor.
+
+    ``signal`` is of shape ``(N, Nv, Nscales)`` and ``out`` of shape
+    ``(N, Nv)``.
+    """
+    N, Nv, Nscales = signal.shape
+    M = c.shape[1]
+    dtype = factor.dtype
+    c = np.asarray(c, dtype=dtype)
+
+    # Buffers per column: b_k, b_{k+1}, and the contiguous input.
+    itemsize = np.dtype(dtype).itemsize
+    chunk = _chunk_size(Nv, (2 + Nscales) * N * itemsize, max_memory)
+    b_old = np.empty(N * chunk, dtype=dtype)
+    b_cur = np.empty(N * chunk, dtype=dtype)
+    x = np.empty(N * chunk * Nscales, dtype=dtype)
+
+    for start in range(0, Nv, chunk):
+        n = min(chunk, Nv - start)
+        xn = x[:N * n * Nscales].reshape(N, n, Nscales)
+        np.copyto(xn, signal[:, start:start+n])
+        xn = xn.reshape(N * n, Nscales)
+
+        # Coefficient-weighted sums of the inputs: d_k = x . c[:, k].
+        def add_term(k, y):
+            _gemv_add(xn, c[:, k], y.reshape(-1))
+
+        _clenshaw(factor, M, add_term, out[:, start:start+n],
+                  b_old[:N * n].reshape(N, n),
+                  b_cur[:N * n].reshape(N, n))
+
+
+def _cheby_mapping(factor, c, signal, out, max_memory=None):
+    r"""Recurrence of :func:`cheby_mapping`, with a given factor.
+
+    ``signal`` is of shape ``(N, Nv, n_in)`` and ``out`` of shape
+    ``(N, Nv, n_out)``.
+    """
+    N, Nv, n_in = signal.shape
+    M, _, n_out = c.shape
+    dtype = factor.dtype
+    c = np.asarray(c, dtype=dtype)
+
+    itemsize = np.dtype(dtype).itemsize
+    chunk = _chunk_size(Nv, (2 * n_in + n_out) * N * itemsize, max_memory)
+    # Flat buffers, such that the (N, n * n_in) views are contiguous.
+    t_old = np.empty(N * chunk * n_in, dtype=dtype)
+    t_cur = np.empty(N * chunk * n_in, dtype=dtype)
+    acc = np.empty(N * chunk * n_out, dtype=dtype)
+
+    for start in range(0, Nv, chunk):
+        n = min(chunk, Nv - start)
+        old = t_old[:N * n * n_in].reshape(N, n, n_in)
+        np.copyto(old, signal[:, start:start+n])
+        old = old.reshape(N, n * n_in)
+        cur = t_cur[:N * n * n_in].reshape(N, n * n_in)
+        y = acc[:N * n * n_out].reshape(N * n, n_out)
+
+        # Y = T_0 X C_0 / 2 + T_1 X C_1 + ...
+        y[...] = 0
+        _gemm_add(old.reshape(N * n, n_in), c[0] / 2, y)
+        cur[...] = 0
+        _csr_dot_add(factor, old, cur)
+        cur *= 0.5
+        _gemm_add(cur.reshape(N * n, n_in), c[1], y)
+        for k in range(2, M):
+            # T_k = factor T_{k-1} - T_{k-2}, written over T_{k-2}.
+            np.negative(old, out=old)
+            _csr_dot_add(factor, cur, old)
+            old, cur = cur, old
+            _gemm_add(cur.reshape(N * n, n_in), c[k], y)
+
+        out[:, start:start+n] = y.reshape(N, n, n_out)
+
+
+def _cheby_clenshaw(factor, c, signal, out, max_memory=None):
+    r"""Clenshaw recurrences of :func:`cheby_clenshaw`, with a given factor.
+
+    ``signal`` is of shape ``(N, Nv)`` and ``out`` of shape
+    ``(N, Nv, Nscales)``.
+    """
+    N, Nv = signal.shape
+    Nscales, M = c.shape
+    dtype = factor.dtype
+
+    # Each filter only does the work its degree needs (trailing zeros).
+    nonzero = c != 0
+    degrees = M - np.argmax(nonzero[:, ::-1], axis=1)
+    degrees[~nonzero.any(axis=1)] = 1
+
+    itemsize = np.dtype(dtype).itemsize
+    chunk = _chunk_size(Nv, 3 * N * itemsize, max_memory)
+    # Flat buffers, such that the (N, n) views are contiguous.
+    b_old = np.empty(N * chunk, dtype=dtype)
+    b_cur = np.empty(N * chunk, dtype=dtype)
+    x = np.empty(N * chunk, dtype=dtype)
+
+    for start in range(0, Nv, chunk):
+        n = min(chunk, Nv - start)
+        xn = x[:N * n].reshape(N, n)
+        np.copyto(xn, signal[:, start:start+n])
+
         for i in range(Nscales):
-            r[tmpN + G.N*i] += c[i, k] * twf_new
 
-        twf_old = twf_cur
-        twf_cur = twf_new
+            def add_term(k, y):
+                _axpy(c[i, k], xn, y)
 
-    return r
+            _clenshaw(factor, degrees[i], add_term, out[:, start:start+n, i],
+                      b_old[:N * n].reshape(N, n),
+                      b_cur[:N * n].reshape(N, n))
+
+
+def _clenshaw(factor, M, add_term, out, b_old, b_cur):
+    r"""Evaluate :math:`\frac{a_0}{2} + \sum_{k=1}^{M-1} a_k T_k(A)` in place.
+
+    ``factor`` is the CSR matrix :math:`2A`, ``add_term(k, y)`` accumulates
+    :math:`y \mathrel{+}= a_k`, and ``b_old`` and ``b_cur`` are C-contiguous
+    working buffers of the shape of ``out``.
+    """
+    b_old[...] = 0
+    b_cur[...] = 0
+    for k in range(M - 1, 0, -1):
+        # b_k = a_k + factor b_{k+1} - b_{k+2}, written over b_{k+2}.
+        np.negative(b_old, out=b_old)
+        add_term(k, b_old)
+        _csr_dot_add(factor, b_cur, b_old)
+        b_old, b_cur = b_cur, b_old
+    # y = a_0 / 2 + factor / 2 b_1 - b_2.
+    b_old *= -2
+    add_term(0, b_old)
+    _csr_dot_add(factor, b_cur, b_old)
+    np.multiply(b_old, 0.5, out=out)
+
+
+def _cheby_run(core, factor, c, signal, out, workers=1, chunk_size=None,
+               *args):
+    r"""Run ``core(factor, c, signal, out, *args)``, eventually in parallel.
+
+    The signals (second dimension of ``signal`` and ``out``) are split in
+    chunks processed by a pool of ``workers`` processes. The CSR arrays of
+    the factor, the signals, and the output are placed in shared memory once,
+    and a task is only described by a range of columns.
+    """
+    if workers == -1:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError('The number of workers should be positive or -1, '
+                         'got {}.'.format(workers))
+    Nv = signal.shape[1]
+    if workers == 1 or Nv < 2:
+        core(factor, c, signal, out, *args)
+        return
+
+    if shared_memory is None:
+        raise ImportError('Parallel filtering needs Python 3.8 or later '
+                          '(multiprocessing.shared_memory).')
+    if chunk_size is None:
+        chunk_size = -(-Nv // workers)
+    chunks = [(start, min(start + chunk_size, Nv))
+              for start in range(0, Nv, chunk_size)]
+
+    arrays = dict(data=factor.data, indices=factor.indices,
+                  indptr=factor.indptr, signal=signal, out=out)
+    blocks, shared, specs = [], dict(), dict()
+    try:
+        for name, array in arrays.items():
+            shm = shared_memory.SharedMemory(create=True,
+                                             size=max(array.nbytes, 1))
+            blocks.append(shm)
+            shared[name] = np.ndarray(array.shape, array.dtype,
+                                      buffer=shm.buf)
+            if name != 'out':
+                shared[name][...] = array
+            specs[name] = (shm.name, array.shape, array.dtype)
+
+        initargs = (core, specs, factor.shape, np.asarray(c), args)
+        with multiprocessing.Pool(min(workers, len(chunks)), _cheby_init,
+                                  initargs) as pool:
+            pool.starmap(_cheby_chunk, chunks)
+
+        out[...] = shared['out']
+    finally:
+        shared.clear()  # Release the buffers before closing.
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+
+# State of a worker process of _cheby_run.
+_worker = dict()
+
+
+def _cheby_init(core, specs, shape, c, args):
+    r"""Attach a worker process to the shared arrays of :func:`_cheby_run`."""
+    _worker['blocks'] = []
+    for name, (shm_name, array_shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _worker['blocks'].append(shm)
+        _worker[name] = np.ndarray(array_shape, dtype, buffer=shm.buf)
+    _worker['factor'] = sparse.csr_matrix(
+        (_worker['data'], _worker['indices'], _worker['indptr']), shape,
+        copy=False)
+    _worker['core'] = core
+    _worker['c'] = c
+    _worker['args'] = args
+
+
+def _cheby_chunk(start, stop):
+    r"""Process the columns ``start:stop`` in a worker process."""
+    out = _worker['out'][:, start:stop]
+    buffer = np.empty_like(out, order='C')
+    _worker['core'](_worker['factor'], _worker['c'],
+                    _worker['signal'][:, start:stop], buffer, *_worker['args'])
+    out[...] = buffer
+
+
+def _cheby_factor(G, dtype, index=None):
+    r"""Return :math:`2 \tilde{L}`, the Laplacian mapped from [0, lmax] to
+    [-1, 1] (times 2), as a CSR matrix.
+
+    Only the rows and columns of the Laplacian given by ``index`` are kept if
+    it is not None.
+    """
+
+    a_arange = [0, G.lmax]
+
+    a1 = float(a_arange[1] - a_arange[0]) / 2.
+    a2 = float(a_arange[1] + a_arange[0]) / 2.
+
+    if index is None:
+        L = G.L
+    else:
+        L = G.L[index][:, index]
+
+    factor = 2/a1 * (L - a2 * sparse.eye(L.shape[0]))
+    return sparse.csr_matrix(factor, dtype=dtype)
+
+
+def _check_out(out, shapes, dtype):
+    r"""Check that a result of type dtype can be written in place in out."""
+    if out.shape not in shapes:
+        raise ValueError('out should be of shape {}, got {}.'.format(
+            shapes[0], out.shape))
+    if not np.can_cast(dtype, out.dtype):
+        raise ValueError('out should be of dtype {} (or wider), '
+                         'got {}.'.format(dtype, out.dtype))
+    # Otherwise the reshapes would be written to copies.
+    if not out.flags.c_contiguous:
+        raise ValueError('out should be C-contiguous.')
+
+
+def _chunk_size(n_columns, column_size, max_memory):
+    r"""Number of columns to process at once to stay below max_memory."""
+    if max_memory is None:
+        return max(n_columns, 1)
+    chunk = int(max_memory // column_size)
+    if chunk < 1:
+        raise ValueError('max_memory={} is too small to process a single '
+                         'column ({} bytes).'.format(max_memory, column_size))
+    return max(min(chunk, n_columns), 1)
+
+
+def _csr_dot_add(A, X, Y):
+    r"""In-place update ``Y += A X``, where A is a CSR matrix.
+
+    Uses scipy's sparse kernel directly when the arrays are C-contiguous and
+    of the same dtype, such that no temporary is allocated. That kernel is
+    private: if it fails (e.g., its signature changed), it is disabled and the
+    public ``A.dot(X)`` is used instead.
+    """
+    global _csr_matvecs
+    if (_csr_matvecs is not None and A.dtype == X.dtype == Y.dtype
+            and X.flags.c_contiguous and Y.flags.c_contiguous):
+        n_vecs = 1 if X.ndim == 1 else X.shape[1]
+        try:
+            # Arguments are checked before Y is written to.
+            _csr_matvecs(A.shape[0], A.shape[1], n_vecs, A.indptr, A.indices,
+                         A.data, X.reshape(-1), Y.reshape(-1))
+            return
+        except (TypeError, ValueError) as error:
+            _logger.info('Disabling scipy.sparse._sparsetools.csr_matvecs, '
+                         'which failed: {}'.format(error))
+            _csr_matvecs = None
+    Y += A.dot(X)
+
+
+def _axpy(a, x, y):
+    r"""In-place update ``y += a x``."""
+    if x.flags.c_contiguous and y.flags.c_contiguous and x.dtype == y.dtype:
+        axpy = linalg.get_blas_funcs('axpy', (y,))
+        axpy(x.reshape(-1), y.reshape(-1), a=a)
+    else:
+        y += a * x
+
+
+def _gemv_add(A, x, y):
+    r"""In-place update ``y += A x``, with A a C-contiguous matrix."""
+    if A.dtype.char in 'fd' and A.dtype == x.dtype == y.dtype:
+        gemv = linalg.get_blas_funcs('gemv', (A,))
+        # A C-contiguous A is a Fortran-ordered A^T.
+        gemv(1, A.T, x, beta=1, y=y, overwrite_y=True, trans=1)
+    else:
+        y += A.dot(x)
+
+
+def _gemm_add(A, B, C):
+    r"""In-place update ``C += A B``, with A and C C-contiguous matrices."""
+    if A.dtype.char in 'fd' and A.dtype == B.dtype == C.dtype:
+        gemm = linalg.get_blas_funcs('gemm', (A,))
+        # C^T += B^T A^T, where the transposes are Fortran-ordered.
+        gemm(1, np.asfortranarray(B.T), A.T, beta=1, c=C.T, overwrite_c=True)
+    else:
+        C += A.dot(B)
+
+
+def _rank1_update(a, x, y, chunk=2**30):
+    r"""In-place update ``a += x y^T``, with y raveled (C order).
+
+    ``a`` must be a Fortran-ordered matrix, such that the update is done by
+    BLAS ``ger`` without any temporary. The columns are processed by chunks
+    to stay within the range of the BLAS integers.
+    """
+    y = y.reshape(-1)
+    x = np.asarray(x, dtype=a.dtype)
+    if a.dtype.char not in 'fd':
+        a += np.multiply.outer(x, y)
+        return
+    ger = linalg.get_blas_funcs('ger', (a,))
+    for i in range(0, y.size, chunk):
+        block = a[:, i:i+chunk]
+        ger(1, x, y[i:i+chunk], a=block, overwrite_a=True)
 
 
 def cheby_rect(G, bounds, signal, **kwargs):
@@ -148,7 +1318,7 @@ def cheby_rect(G, bounds, signal, **kwargs):
         r = np.zeros((G.N))
 
     b1, b2 = np.arccos(2. * bounds / G.lmax - 1.)
-    factor = 4./G.lmax * G.L - 2.*sparse.eye(G.N)
+    factor = _cheby_factor(G, np.result_type(G.L.dtype, np.float32))
 
     T_old = signal
     T_cur = factor.dot(signal) / 2.
@@ -208,20 +1378,171 @@ def compute_jackson_cheby_coeff(filter_bounds, delta_lambda, m):
         ch[i] = (2/(np.pi * i)) * \
             (np.sin(i * np.arccos(filter_bounds[0])) - np.sin(i * np.arccos(filter_bounds[1])))
 
-    # Then compute jackson coeffs
-    jch = np.empty(m+1, dtype=float)
-    alpha = (np.pi/(m+2))
-    for i in range(len(jch)):
-        jch[i] = (1/np.sin(alpha)) * \
-            ((1 - i/(m+2)) * np.sin(alpha) * np.cos(i * alpha) +
-             (1/(m+2)) * np.cos(alpha) * np.sin(i * alpha))
-
-    # Combine jackson and cheby coeffs
-    jch = ch * jch
+    # Then combine with the jackson coeffs
+    jch = ch * _jackson_damping(m)
 
     return ch, jch
 
 
+def _jackson_damping(m):
+    r"""Jackson damping factors of a Chebyshev expansion of degree m."""
+    i = np.arange(m+1)
+    alpha = np.pi / (m+2)
+    return ((1 - i/(m+2)) * np.sin(alpha) * np.cos(i * alpha) +
+            (1/(m+2)) * np.cos(alpha) * np.sin(i * alpha)) / np.sin(alpha)
+
+
+class SpectralDensity(object):
+    r"""
+    Spectral density of the graph Laplacian by the kernel polynomial method.
+
+    The density of eigenvalues :math:`\rho(\lambda) = \sum_i \delta(\lambda
+    - \lambda_i)` is expanded in Chebyshev polynomials on :math:`[0,
+    \lambda_{max}]`. Its moments :math:`\mu_k = \operatorname{tr}
+    T_k(\tilde{L})` are estimated stochastically as :math:`\frac{1}{R}
+    \sum_r x_r^\top T_k(\tilde{L}) x_r`, with :math:`R` random vectors of
+    independent :math:`\pm 1` entries, and damped by the Jackson kernel to
+    suppress the Gibbs oscillations. Two moments are obtained per product
+    with the Laplacian, for a total cost of ``O(order * n_probes * |E|)``
+    without the Fourier basis.
+
+    Parameters
+    ----------
+    G : Graph
+        The graph's :attr:`lmax` is used.
+    order : int
+        Number of Chebyshev moments (default = 100). The resolution of the
+        density is about ``lmax / order``.
+    n_probes : int
+        Number of random vectors of the trace estimator (default = 20). The
+        standard deviation of the moments decreases as ``1 / sqrt(n_probes)``.
+    seed : int
+        Seed for the random number generator (for reproducible estimates).
+
+    Attributes
+    ----------
+    moments : ndarray
+        Estimated traces of :math:`T_k(\tilde{L})`, of shape ``(order,)``.
+    damping : ndarray
+        Jackson damping factors, of shape ``(order,)``.
+    lmax : float
+        Upper bound of the spectrum :math:`[0, \lambda_{max}]`.
+    n_vertices : int
+        Number of nodes of the graph.
+
+    References
+    ----------
+    See :cite:`tremblay2016compressive` for the eigencount of an interval.
+
+    Examples
+    --------
+    >>> G = graphs.Sensor(300, seed=42)
+    >>> G.estimate_lmax()
+    >>> density = filters.SpectralDensity(G, order=100, seed=42)
+    >>> x = np.linspace(0, G.lmax, 50)
+    >>> y = density.evaluate(x)
+    >>> y.shape
+    (50,)
+    >>> print('{:.0f}'.format(density.count(0, G.lmax)))
+    300
+
+    Compare with the exact count of eigenvalues in an interval:
+
+    >>> G.compute_fourier_basis()
+    >>> n_exact = np.sum(G.e <= 2)
+    >>> n_estimated = density.count(0, 2)
+    >>> abs(n_estimated - n_exact) < 10
+    True
+
+    """
+
+    def __init__(self, G, order=100, n_probes=20, seed=None):
+        if order < 2:
+            raise ValueError('The order should be at least 2, '
+                             'got {}.'.format(order))
+        self.lmax = G.lmax
+        self.n_vertices = G.N
+        self.damping = _jackson_damping(order - 1)
+
+        factor = _cheby_factor(G, np.result_type(G.L.dtype, np.float32))
+        rs = np.random.RandomState(seed)
+        X = rs.randint(0, 2, size=(G.N, n_probes)).astype(factor.dtype)
+        X *= 2
+        X -= 1
+
+        # T_{2k} = 2 T_k^2 - T_0 and T_{2k+1} = 2 T_{k+1} T_k - T_1.
+        moments = np.empty(order)
+        previous, current = X, factor.dot(X) / 2
+        moments[0] = np.vdot(previous, previous)
+        moments[1] = np.vdot(previous, current)
+        k = 1
+        while 2*k < order:
+            moments[2*k] = 2 * np.vdot(current, current) - moments[0]
+            if 2*k + 1 < order:
+                following = factor.dot(current)
+                following -= previous
+                moments[2*k+1] = 2 * np.vdot(following, current) - moments[1]
+                previous, current = current, following
+            k += 1
+        self.moments = moments / n_probes
+
+    @property
+    def order(self):
+        return len(self.moments)
+
+    def evaluate(self, x):
+        r"""Evaluate the spectral density.
+
+        Parameters
+        ----------
+        x : array_like
+            Graph frequencies (eigenvalues) at which to evaluate the density.
+
+        Returns
+        -------
+        y : ndarray
+            Estimated number of eigenvalues per unit of frequency. It
+            integrates to the number of nodes over :math:`[0, \lambda_{max}]`
+            and is zero outside.
+        """
+        x = np.asanyarray(x, dtype=float)
+        y = 2 * x / self.lmax - 1
+        inside = np.abs(y) < 1
+        c = 2 * self.damping * self.moments
+        c[0] /= 2
+        density = np.zeros(x.shape)
+        y = y[inside]
+        density[inside] = (np.polynomial.chebyshev.chebval(y, c)
+                           / (np.pi * np.sqrt(1 - y**2)) * 2 / self.lmax)
+        return density
+
+    def count(self, a, b):
+        r"""Estimate the number of eigenvalues in the interval [a, b].
+
+        Parameters
+        ----------
+        a, b : float or array_like
+            Bounds of the intervals, clipped to :math:`[0, \lambda_{max}]`.
+
+        Returns
+        -------
+        n : float or ndarray
+            Estimated number of eigenvalues in each interval.
+        """
+        a, b = np.broadcast_arrays(np.clip(a, 0, self.lmax),
+                                   np.clip(b, 0, self.lmax))
+        if np.any(a > b):
+            raise ValueError('The lower bounds should not be greater than '
+                             'the upper bounds.')
+        n = np.empty(a.shape)
+        for i in np.ndindex(a.shape):
+            _, jch = compute_jackson_cheby_coeff([a[i], b[i]], [0, self.lmax],
+                                                 self.order - 1)
+            jch[0] /= 2
+            n[i] = np.dot(jch, self.moments)
+        return n if n.ndim else float(n)
+
+
 def lanczos_op(f, s, order=30):
     r"""
     Perform the lanczos approximation of the signal s.
@@ -237,42 +1558,268 @@ def lanczos_op(f, s, order=30):
     Returns
     -------
     L : ndarray
-        lanczos approximation of s
+        lanczos approximation of s, of shape ``(G.N * Nf, Nv)`` (the
+        responses to the filters are stacked).
+
+    See also
+    --------
+    lanczos_analysis : same computation, returned as a ``(G.N, Nv, Nf)``
+        tensor.
 
     """
-    G = f.G
-    Nf = len(f.g)
+    r = lanczos_analysis(f, s, order)
+    r = np.moveaxis(r, -1, 0)
+    return r.reshape((-1,) + r.shape[2:])
 
-    # To have the right shape for the output array depending on the signal dim
-    try:
-        Nv = np.shape(s)[1]
-        is2d = True
-        c = np.zeros((G.N*Nf, Nv))
-    except IndexError:
-        Nv = 1
-        is2d = False
-        c = np.zeros((G.N*Nf))
 
-    tmpN = np.arange(G.N, dtype=int)
-    for j in range(Nv):
-        if is2d:
-            V, H, _ = lanczos(G.L.toarray(), order, s[:, j])
-        else:
-            V, H, _ = lanczos(G.L.toarray(), order, s)
+def lanczos_analysis(f, signal, order=30):
+    r"""
+    Filter signals with the Lanczos method.
+
+    The Lanczos iteration builds, for each signal :math:`x`, an orthonormal
+    basis :math:`V` of the Krylov subspace :math:`\{x, Lx, \dots,
+    L^{K-1}x\}` and the tridiagonal matrix :math:`T = V^\top L V`. The
+    filtered signal is then approximated as
+
+    .. math:: g(L) x \approx \|x\|_2 V g(T) e_1,
+
+    where :math:`g(T)` is computed from the eigendecomposition of the small
+    tridiagonal matrix (:func:`scipy.linalg.eigh_tridiagonal`). Contrary to a
+    polynomial of the same order, the approximation adapts to the spectrum
+    of the Laplacian seen by the signal, and is much more accurate for sharp
+    filters.
+
+    The iterations are run on all the signals at once, as one sparse product
+    of the Laplacian with the ``(G.N, Nv)`` block of current Lanczos vectors.
+    This is a simultaneous, not a block, Lanczos iteration: each signal has
+    its own Krylov subspace and tridiagonal matrix, and only the sparse
+    products are shared. The loss of orthogonality is controlled by
+    selective reorthogonalization: the new vectors are orthogonalized
+    against the Ritz vectors which have converged, and only those. The Ritz
+    values are checked for convergence every few iterations.
+
+    Parameters
+    ----------
+    f : Filter
+        The filter bank, evaluated on the Ritz values.
+    signal : ndarray
+        Signals to filter, of shape ``(G.N,)`` or ``(G.N, Nv)``.
+    order : int
+        Number of Lanczos iterations, i.e., dimension of the Krylov subspace
+        (default = 30). The memory needed is ``order`` times the size of the
+        signals.
+
+    Returns
+    -------
+    r : ndarray
+        Result of the filtering, of shape ``(G.N, Nv, Nf)``, or ``(G.N, Nf)``
+        if the signal is 1D.
+
+    Examples
+    --------
+    >>> G = graphs.Sensor(100, seed=42)
+    >>> G.compute_fourier_basis()
+    >>> g = filters.Rectangular(G, band_max=0.5)
+    >>> s = np.random.RandomState(42).normal(size=(G.N, 5))
+    >>> y = filters.lanczos_analysis(g, s, order=40)
+    >>> y.shape
+    (100, 5, 1)
+    >>> exact = g.filter(s, method='exact')
+    >>> error = lambda y: np.linalg.norm(y.squeeze() - exact)
+    >>> error(y) < error(g.filter(s, method='chebyshev', order=40))
+    True
+
+    """
+    signal = np.asarray(signal)
+    if signal.shape[0] != f.G.N:
+        raise ValueError('First dimension should be the number of nodes '
+                         'G.N = {}, got {}.'.format(f.G.N, signal.shape))
+    shape = signal.shape[1:]
+    Nv = int(np.prod(shape))
+
+    def evaluate(theta, column):
+        return f.evaluate(theta)
+
+    r = _lanczos_filter(f.G.L, signal.reshape(f.G.N, Nv), order, f.Nf,
+                        evaluate)
+    return r.reshape((f.G.N,) + shape + (f.Nf,))
+
+
+def lanczos_synthesis(f, signal, order=30):
+    r"""
+    Synthesize signals with the Lanczos method.
 
-        Eh, Uh = np.linalg.eig(H)
+    Computes :math:`y = \sum_i g_i(L) x_i`, the adjoint of
+    :func:`lanczos_analysis`. Each :math:`g_i(L) x_i` is approximated from
+    its own Krylov subspace, and all the ``Nv * Nf`` Lanczos iterations are
+    run at once.
 
-        Eh[Eh < 0] = 0
-        fe = f.evaluate(Eh)
-        V = np.dot(V, Uh)
+    Parameters
+    ----------
+    f : Filter
+    signal : ndarray
+        Filter bank coefficients, of shape ``(G.N, Nv, Nf)`` or
+        ``(G.N, Nf)``.
+    order : int
+        Number of Lanczos iterations (default = 30).
 
-        for i in range(Nf):
-            if is2d:
-                c[tmpN + i*G.N, j] = np.dot(V, fe[:][i] * np.dot(V.T, s[:, j]))
-            else:
-                c[tmpN + i*G.N] = np.dot(V, fe[:][i] * np.dot(V.T, s))
+    Returns
+    -------
+    r : ndarray
+        Synthesized signals, of shape ``(G.N, Nv)``, or ``(G.N,)`` if the
+        signal is of shape ``(G.N, Nf)``.
+
+    Examples
+    --------
+    >>> G = graphs.Sensor(100, seed=42)
+    >>> G.compute_fourier_basis()
+    >>> g = filters.Heat(G, scale=[1, 10])
+    >>> s = np.random.RandomState(42).normal(size=(G.N, 5, 2))
+    >>> y = filters.lanczos_synthesis(g, s)
+    >>> np.allclose(y, g.synthesize(s, method='exact'))
+    True
 
-    return c
+    """
+    signal = np.asarray(signal)
+    if signal.shape[0] != f.G.N or signal.shape[-1] != f.Nf:
+        raise ValueError('Signal should be of shape (G.N, Nv, Nf) = '
+                         '({}, Nv, {}), got {}.'.format(f.G.N, f.Nf,
+                                                        signal.shape))
+    shape = signal.shape[1:-1]
+    Nv = int(np.prod(shape))
+
+    # Column j * Nf + i is filtered by the i-th filter only.
+    def evaluate(theta, column):
+        return f.evaluate(theta)[column % f.Nf][np.newaxis]
+
+    r = _lanczos_filter(f.G.L, signal.reshape(f.G.N, Nv * f.Nf), order, 1,
+                        evaluate)
+    r = r.reshape(f.G.N, Nv, f.Nf).sum(axis=2)
+    return r.reshape((f.G.N,) + shape)
+
+
+def _lanczos_filter(L, X, order, n_filters, evaluate):
+    r"""Approximate :math:`g(L) x` for all the columns of X.
+
+    ``evaluate(theta, j)`` returns the responses, of shape ``(n_filters,
+    len(theta))``, of the filters applied to the j-th column. Returns an
+    array of shape ``(N, Nv, n_filters)``.
+    """
+    N, Nv = X.shape
+    dtype = np.result_type(L.dtype, X.dtype, np.float32)
+    L = sparse.csr_matrix(L, dtype=dtype)
+    V, alpha, beta, n_steps, norms = _lanczos_basis(L, X, order)
+
+    # Coefficients of the approximations in the Lanczos bases.
+    # The basis has at most N vectors, whatever the requested order.
+    coeffs = np.zeros((n_filters, V.shape[0], Nv), dtype=dtype)
+    for j in range(Nv):
+        K = n_steps[j]
+        if K == 0:
+            continue
+        theta, S = linalg.eigh_tridiagonal(alpha[:K, j], beta[:K-1, j])
+        # Eigenvalues of L are non-negative.
+        np.maximum(theta, 0, out=theta)
+        response = evaluate(theta, j)
+        coeffs[:, :K, j] = norms[j] * np.dot(response * S[0], S.T)
+
+    return np.einsum('knj,ikj->nji', V, coeffs)
+
+
+def _lanczos_basis(L, X, order, period=5):
+    r"""Run the Lanczos iteration on each column of X simultaneously.
+
+    The columns share the sparse products with L, but this is not a block
+    Lanczos iteration: each column has its own Krylov subspace and
+    tridiagonal matrix. Hence the convergence of the Ritz values is checked
+    by diagonalizing one tridiagonal matrix per active column, which is only
+    done every ``period`` iterations. In between, the new vectors are
+    orthogonalized against the converged Ritz vectors of the last check.
+
+    Returns the Lanczos vectors ``V`` of shape ``(order, N, Nv)``, the
+    diagonals ``alpha`` (``(order, Nv)``) and off-diagonals ``beta``
+    (``(order - 1, Nv)``) of the tridiagonal matrices, the number of steps
+    done for each column (less than order if an invariant subspace was
+    found), and the norms of the columns.
+    """
+    N, Nv = X.shape
+    dtype = L.dtype
+    order = max(1, min(order, N))
+
+    V = np.zeros((order, N, Nv), dtype=dtype)
+    alpha = np.zeros((order, Nv), dtype=dtype)
+    beta = np.zeros((max(order - 1, 0), Nv), dtype=dtype)
+    n_steps = np.zeros(Nv, dtype=int)
+
+    norms = np.linalg.norm(X, axis=0)
+    active = norms > 0
+    np.divide(X, norms, out=V[0], where=active)
+
+    eps = np.finfo(dtype).eps
+    w = np.empty((N, Nv), dtype=dtype)
+    # Converged Ritz vectors of each column, zero-padded.
+    Y = np.zeros((0, N, Nv), dtype=dtype)
+
+    for k in range(order):
+        n_steps[active] = k + 1
+
+        # Three-term recurrence: w = L v_k - beta_{k-1} v_{k-1} - alpha_k v_k.
+        w[...] = 0
+        _csr_dot_add(L, V[k], w)
+        if k > 0:
+            w -= beta[k-1] * V[k-1]
+        alpha[k] = np.einsum('ij,ij->j', V[k], w)
+        w -= alpha[k] * V[k]
+
+        if k == order - 1:
+            break
+
+        if k % period == period - 1:
+            b = np.linalg.norm(w, axis=0)
+            Y = _converged_ritz_vectors(V[:k+1], alpha[:k+1], beta[:k], b,
+                                        active, eps)
+        if len(Y) > 0:
+            w -= np.einsum('mij,mj->ij', Y, np.einsum('mij,ij->mj', Y, w))
+        b = np.linalg.norm(w, axis=0)
+
+        # An invariant subspace was found: the approximation is exact.
+        scale = np.abs(alpha[:k+1]).max(axis=0) + np.abs(beta[:k]).sum(axis=0)
+        active &= b > np.sqrt(eps) * scale
+        if not active.any():
+            break
+        beta[k] = np.where(active, b, 0)
+        np.divide(w, b, out=V[k+1], where=active)
+
+    return V, alpha, beta, n_steps, norms
+
+
+def _converged_ritz_vectors(V, alpha, beta, b, active, eps):
+    r"""Return the converged Ritz vectors of the active columns.
+
+    A Ritz pair :math:`(\theta_i, V s_i)` of the tridiagonal matrix has
+    converged when its residual :math:`|b s_{k,i}|` is small. The new
+    Lanczos vectors lose orthogonality in the direction of those vectors
+    only (Parlett and Scott, 1979). As the vectors are only checked every
+    few iterations, the threshold is :math:`\epsilon^{1/4}` rather than
+    :math:`\sqrt{\epsilon}`, to catch the vectors which converge before the
+    next check. Orthogonalizing against more vectors of the Krylov subspace
+    is harmless. Returns an array of shape ``(M, N, Nv)``, where ``M`` is
+    the largest number of converged vectors of a column, padded with
+    zeros.
+    """
+    _, N, Nv = V.shape
+    vectors = dict()
+    for j in np.flatnonzero(active):
+        theta, S = linalg.eigh_tridiagonal(alpha[:, j], beta[:, j])
+        residuals = np.abs(b[j] * S[-1])
+        converged = residuals <= eps**0.25 * np.abs(theta).max()
+        if converged.any():
+            vectors[j] = np.dot(S[:, converged].T, V[:, :, j])
+    M = max([y.shape[0] for y in vectors.values()] + [0])
+    Y = np.zeros((M, N, Nv), dtype=V.dtype)
+    for j, y in vectors.items():
+        Y[:len(y), :, j] = y
+    return Y
 
 
 def lanczos(A, order, x):
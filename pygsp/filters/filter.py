@@ -3,6 +3,7 @@
 from functools import partial
 
 import numpy as np
+from scipy import sparse
 
 from pygsp import utils
 # prevent circular import in Python < 3.5
@@ -27,7 +28,9 @@ class Filter(object):
         The graph to which the filter bank is tailored.
     kernels : function or list of functions
         A (list of) function(s) defining the filter bank in the Fourier domain.
-        One function per filter.
+        One function per filter. A list of ``n_features_out`` lists of
+        ``n_features_in`` functions defines a filter bank which maps
+        ``n_features_in`` features to ``n_features_out`` features.
 
     Attributes
     ----------
@@ -52,6 +55,17 @@ class Filter(object):
     >>>
     >>> filtered_signal = my_filter.filter(signal)
 
+    A filter bank which maps 2 features to 3 features:
+
+    >>> g = filters.Filter(G, [[lambda x: x, lambda x: 1 - x],
+    ...                        [lambda x: x**2, np.exp],
+    ...                        [np.sin, np.cos]])
+    >>> g.shape
+    (3, 2)
+    >>> signal = np.random.RandomState(42).normal(size=(G.N, 10, 2))
+    >>> g.filter(signal).shape
+    (1130, 10, 3)
+
     """
 
     def __init__(self, G, kernels):
@@ -62,14 +76,73 @@ class Filter(object):
             iter(kernels)
         except TypeError:
             kernels = [kernels]
+
+        if len(kernels) > 0 and all(isinstance(row, (list, tuple))
+                                    for row in kernels):
+            # Filter bank of n_features_out x n_features_in kernels.
+            n_features_in = len(kernels[0])
+            if any(len(row) != n_features_in for row in kernels):
+                raise ValueError('All the outputs should be computed from '
+                                 'the same number of input features.')
+            self.n_features_in = n_features_in
+            self.n_features_out = len(kernels)
+            kernels = [kernel for row in kernels for kernel in row]
+        else:
+            # Only used by subclasses to instantiate a single filterbank.
+            self.n_features_in, self.n_features_out = (1, len(kernels))
         self._kernels = kernels
 
-        # Only used by subclasses to instantiate a single filterbank.
-        self.n_features_in, self.n_features_out = (1, len(kernels))
         self.shape = (self.n_features_out, self.n_features_in)
         self.n_filters = self.n_features_in * self.n_features_out
         self.Nf = self.n_filters  # TODO: kept for backward compatibility only.
 
+    def _vectorize(self, kernel, **parameters):
+        r"""Define the kernels of a filter bank by a single function.
+
+        The kernels are given by ``kernel(x, **parameters)``, a function
+        which takes one value per filter for each parameter. The parameters
+        are precomputed once by the filter bank. :meth:`evaluate` calls the
+        function once for all the filters, with the frequencies ``x`` of shape
+        ``(1,) + x.shape`` and the parameters of shape ``(Nf, 1, ..., 1)``.
+
+        To be used by children, whose kernels are then evaluated in a single
+        broadcast instead of one call per filter.
+
+        Parameters
+        ----------
+        kernel : function
+            Function of the frequencies and the parameters, which broadcasts.
+        parameters : array_like
+            One value per filter, for each keyword argument of ``kernel``.
+
+        Returns
+        -------
+        kernels : list of functions
+            The individual kernels, to be passed to :class:`Filter`.
+
+        """
+        parameters = {name: np.asarray(value, dtype=float)
+                      for name, value in parameters.items()}
+        n_filters = set(len(value) for value in parameters.values())
+        if len(n_filters) != 1:
+            raise ValueError('All the parameters should have one value per '
+                             'filter.')
+
+        def kernel_i(x, i):
+            return kernel(np.asanyarray(x), **{name: value[i] for name, value
+                                               in parameters.items()})
+
+        kernels = [partial(kernel_i, i=i) for i in range(n_filters.pop())]
+        self._vectorized = (kernel, parameters, kernels)
+        return kernels
+
+    def _check_not_mapping(self, action):
+        if self.n_features_in != 1:
+            raise ValueError('A filter bank which maps {} features to {} '
+                             'cannot be {}.'.format(self.n_features_in,
+                                                    self.n_features_out,
+                                                    action))
+
     def _get_extra_repr(self):
         """To be overloaded by children."""
         return dict()
@@ -138,13 +211,27 @@ class Filter(object):
         [<matplotlib.lines.Line2D object at ...>]
 
         """
+        x = np.asanyarray(x)
+        vectorized = getattr(self, '_vectorized', None)
+        if vectorized is not None and vectorized[2] is self._kernels:
+            # All the filters in a single broadcast.
+            kernel, parameters, _ = vectorized
+            shape = (self.Nf,) + (1,) * x.ndim
+            parameters = {name: value.reshape(shape)
+                          for name, value in parameters.items()}
+            y = np.asarray(kernel(x[np.newaxis], **parameters), dtype=float)
+            if y.shape != (self.Nf,) + x.shape:
+                y = np.broadcast_to(y, (self.Nf,) + x.shape).copy()
+            return y
         # Avoid to copy data as with np.array([g(x) for g in self._kernels]).
         y = np.empty([self.Nf] + list(x.shape))
         for i, kernel in enumerate(self._kernels):
             y[i] = kernel(x)
         return y
 
-    def filter(self, s, method='chebyshev', order=30):
+    def filter(self, s, method='chebyshev', order=30, max_memory=None,
+               accumulate=None, tol=1e-6, workers=1, chunk_size=None,
+               nodes=None):
         r"""Filter signals (analysis or synthesis).
 
         A signal is defined as a rank-3 tensor of shape ``(N_NODES, N_SIGNALS,
@@ -159,8 +246,8 @@ class Filter(object):
         signal. For this you apply again 8 filters, one filter per feature, and
         sum the result up. As such you're transforming your ``(G.N, 1, 8)``
         tensor signal back to ``(G.N, 1, 1)``. That is known as synthesis. More
-        generally, you may want to map a set of features to another, though
-        that is not implemented yet.
+        generally, a filter bank of shape ``(n_features_out, n_features_in)``
+        maps a set of features to another (see :func:`cheby_mapping`).
 
         The method computes the transform coefficients of a signal :math:`s`,
         where the atoms of the transform dictionary are generalized
@@ -184,13 +271,47 @@ class Filter(object):
             N_FEATURES)``, where ``N_NODES`` is the number of nodes in the
             graph, ``N_SIGNALS`` the number of independent signals you want to
             filter, and ``N_FEATURES`` is either 1 (analysis) or the number of
-            filters in the filter bank (synthesis).
-        method : {'exact', 'chebyshev'}
-            Whether to use the exact method (via the graph Fourier transform)
-            or the Chebyshev polynomial approximation. A Lanczos
-            approximation is coming.
-        order : int
-            Degree of the Chebyshev polynomials.
+            filters in the filter bank (synthesis). It is ``n_features_in``
+            for a filter bank which maps features, which can be filtered by
+            the 'exact', 'chebyshev', and 'clenshaw' methods.
+        method : {'exact', 'chebyshev', 'clenshaw', 'lanczos'}
+            Whether to use the exact method (via the graph Fourier transform),
+            the Chebyshev polynomial approximation, or the Lanczos
+            approximation. The 'clenshaw' method computes the Chebyshev
+            approximation with the Clenshaw recurrence in bounded memory (see
+            :func:`cheby_clenshaw`). The Lanczos method adapts to the spectrum
+            and needs a much lower order for sharp filters, at the cost of
+            storing ``order`` Lanczos vectors (see :func:`lanczos_analysis`).
+        order : int or 'auto'
+            Degree of the Chebyshev polynomials, or number of Lanczos
+            iterations. If 'auto', the degree of each Chebyshev polynomial is
+            the smallest one which approximates its kernel within ``tol`` (see
+            :func:`compute_cheby_order`). The achieved errors are logged.
+        max_memory : int
+            Maximum size in bytes of the working buffers of the 'exact' and
+            'clenshaw' methods. The signals are processed by chunks to stay
+            below. No limit if None (the default).
+        accumulate : data-type
+            Type in which the 'chebyshev' analysis accumulates the terms of
+            the expansion (see :func:`cheby_analysis`). The computation is
+            otherwise done in the precision of the graph and the signal, e.g.,
+            in single precision for a float32 graph and signal. Use
+            ``np.float64`` to keep the sparse products in single precision
+            but sum the polynomial in double precision.
+        tol : float
+            Maximum error of the Chebyshev approximations if ``order='auto'``.
+        workers : int
+            Number of processes among which the signals are split by the
+            Chebyshev methods (see :func:`cheby_analysis`). -1 means all the
+            CPUs. The result is identical to the serial computation.
+        chunk_size : int
+            Number of signals per task if ``workers > 1``. Defaults to an
+            equal split among the workers.
+        nodes : array_like
+            Indices of the nodes where to compute the result of a 'chebyshev'
+            analysis. Only their ``order``-hop neighborhood is visited, as the
+            polynomial filters are exactly localized (see
+            :func:`cheby_analysis`). All the nodes if None (the default).
 
         Returns
         -------
@@ -199,7 +320,8 @@ class Filter(object):
             N_FEATURES)``, where ``N_NODES`` and ``N_SIGNALS`` are the number
             of nodes and signals of the signal tensor that pas passed in, and
             ``N_FEATURES`` is either 1 (synthesis) or the number of filters in
-            the filter bank (analysis).
+            the filter bank (analysis). ``N_NODES`` is ``len(nodes)`` if
+            ``nodes`` is given.
 
         References
         ----------
@@ -264,82 +386,310 @@ class Filter(object):
         >>> np.linalg.norm(s1 - s2) < 1e-10
         True
 
+        Filter at a few nodes only, from their neighborhood:
+
+        >>> g = filters.Heat(G, 10)
+        >>> s = np.random.RandomState(42).normal(size=G.N)
+        >>> s3 = g.filter(s, nodes=[2, 7])
+        >>> np.allclose(s3, g.filter(s)[[2, 7]])
+        True
+
+        """
+        s = self._reshape_signal(s)
+        n_features_in = s.shape[-1]
+
+        if nodes is not None and (method != 'chebyshev' or n_features_in != 1
+                                  or self.n_features_in != 1):
+            raise ValueError('Only the chebyshev analysis can be computed at '
+                             'given nodes.')
+
+        if self.n_features_in > 1:  # Mapping n_features_in --> out.
+            if method not in ['exact', 'chebyshev', 'clenshaw']:
+                raise ValueError('Method {} cannot map features (must be '
+                                 'exact, chebyshev, or clenshaw).'.format(
+                                     method))
+            return self._filter_mapping(s, method, order, max_memory, tol,
+                                        workers, chunk_size).squeeze()
+
+        # Filter banks of a single input (n_features_in == 1) are used for
+        # analysis (1 --> Nf) and synthesis (Nf --> 1, the adjoint).
+        n_features_out = self.Nf if n_features_in == 1 else 1
+
+        if method == 'exact':
+            # TODO: will be handled by g.adjoint().
+            s = self._filter_exact(s, max_memory)
+            assert s.shape[2] == n_features_out
+
+        elif method in ['chebyshev', 'clenshaw']:
+
+            # TODO: update Chebyshev implementation (after 2D filter banks).
+            c = self._get_cheby_coeff(order, tol=tol)
+
+            kwargs = dict(workers=workers, chunk_size=chunk_size)
+
+            if n_features_in == 1 and method == 'chebyshev':  # Analysis.
+                s = approximations.cheby_analysis(self.G, c, s[:, :, 0],
+                                                  accumulate=accumulate,
+                                                  nodes=nodes, **kwargs)
+
+            elif n_features_in == 1:  # Analysis in bounded memory.
+                s = approximations.cheby_clenshaw(self.G, c, s[:, :, 0],
+                                                  max_memory=max_memory,
+                                                  **kwargs)
+
+            elif n_features_in == self.Nf:  # Synthesis.
+                s = approximations.cheby_synthesis(self.G, c, s,
+                                                   max_memory=max_memory,
+                                                   **kwargs)
+                s = np.expand_dims(s, 2)
+
+        elif method == 'lanczos':
+
+            if order == 'auto':
+                raise ValueError('The Lanczos method needs an integer order.')
+
+            if n_features_in == 1:  # Analysis.
+                s = approximations.lanczos_analysis(self, s[:, :, 0], order)
+
+            elif n_features_in == self.Nf:  # Synthesis.
+                s = approximations.lanczos_synthesis(self, s, order)
+                s = np.expand_dims(s, 2)
+
+        else:
+            raise ValueError('Unknown method {}.'.format(method))
+
+        # Return a 1D signal if e.g. a 1D signal was filtered by one filter.
+        return s.squeeze()
+
+    def _reshape_signal(self, s):
+        r"""Return signals as a tensor ``(N_NODES, N_SIGNALS, N_FEATURES)``.
+
+        See :meth:`filter` for the accepted shapes.
         """
         if s.shape[0] != self.G.N:
             raise ValueError('First dimension should be the number of nodes '
                              'G.N = {}, got {}.'.format(self.G.N, s.shape))
 
-        # TODO: not in self.Nin (Nf = Nin x Nout).
-        if s.ndim == 1 or s.shape[-1] not in [1, self.Nf]:
+        if self.n_features_in > 1:
+            if s.ndim == 1 or s.shape[-1] != self.n_features_in:
+                raise ValueError('Last dimension (#features) should be the '
+                                 'number of input features {}, got {}.'
+                                 .format(self.n_features_in, s.shape))
+            if s.ndim == 2:
+                s = np.expand_dims(s, 1)
+
+        elif s.ndim == 1 or s.shape[-1] not in [1, self.Nf]:
             if s.ndim == 3:
                 raise ValueError('Third dimension (#features) should be '
                                  'either 1 or the number of filters Nf = {}, '
                                  'got {}.'.format(self.Nf, s.shape))
             s = np.expand_dims(s, -1)
-        n_features_in = s.shape[-1]
 
         if s.ndim < 3:
             s = np.expand_dims(s, 1)
-        n_signals = s.shape[1]
 
         if s.ndim > 3:
             raise ValueError('At most 3 dimensions: '
                              '#nodes x #signals x #features.')
         assert s.ndim == 3
+        return s
 
-        # TODO: generalize to 2D (m --> n) filter banks.
-        # Only 1 --> Nf (analysis) and Nf --> 1 (synthesis) for now.
-        n_features_out = self.Nf if n_features_in == 1 else 1
-
+    def _filter_mapping(self, s, method, order, max_memory, tol, workers,
+                        chunk_size):
+        r"""Map the features of ``s``, of shape ``(N, Nv, n_features_in)``."""
+        n_out, n_in = self.shape
         if method == 'exact':
+            # y_j = U sum_i g_ji(Lambda) U^* x_i.
+            x = self.G.gft(s)
+            response = self._get_response().astype(x.dtype, copy=False)
+            response = response.reshape(n_out, n_in, -1)
+            x = np.einsum('kvi,oik->kvo', x, response)
+            return self.G.igft(x)
+        elif method == 'chebyshev':
+            c = self._get_cheby_coeff(order, tol=tol)
+            c = c.reshape(n_out, n_in, -1).transpose(2, 1, 0)
+            return approximations.cheby_mapping(self.G, c, s,
+                                                max_memory=max_memory,
+                                                workers=workers,
+                                                chunk_size=chunk_size)
+        elif method == 'clenshaw':
+            # y_j = sum_i g_ji(L) x_i, one bounded-memory analysis per input.
+            c = self._get_cheby_coeff(order, tol=tol)
+            c = c.reshape(n_out, n_in, -1)
+            y = None
+            for i in range(n_in):
+                y_i = approximations.cheby_clenshaw(self.G, c[:, i],
+                                                    s[:, :, i],
+                                                    max_memory=max_memory,
+                                                    workers=workers,
+                                                    chunk_size=chunk_size)
+                if y is None:
+                    y = y_i
+                else:
+                    y += y_i
+            return y
+        else:
+            raise ValueError('Method {} cannot map features (must be exact, '
+                             'chebyshev, or clenshaw).'.format(method))
 
-            # TODO: will be handled by g.adjoint().
-            axis = 1 if n_features_in == 1 else 2
-            f = self.evaluate(self.G.e)
-            f = np.expand_dims(f.T, axis)
-            assert f.shape == (self.G.N, n_features_in, n_features_out)
-
-            s = self.G.gft(s)
-            s = np.matmul(s, f)
-            s = self.G.igft(s)
+    def _filter_exact(self, s, max_memory=None):
+        r"""Filter in the spectral domain: :math:`U g(\Lambda) U^* s`.
 
-        elif method == 'chebyshev':
+        The graph Fourier transform, the multiplication by the frequency
+        response, and the inverse transform are fused: each block of signals
+        costs two matrix products, in workspaces reused across blocks. The
+        transpose of a real Fourier basis is a view, not a copy. The
+        transforms are blockwise if the graph has many connected components.
 
-            # TODO: update Chebyshev implementation (after 2D filter banks).
-            c = approximations.compute_cheby_coeff(self, m=order)
+        ``s`` is of shape ``(N, Nv, 1)`` (analysis) or ``(N, Nv, Nf)``
+        (synthesis).
+        """
+        N, Nv, n_features_in = s.shape
+        K = len(self.G.e)
+        Nf = self.Nf
+        dtype = np.result_type(self.G.e.dtype, s.dtype)
+        response = self._get_response().astype(dtype, copy=False)
+        itemsize = np.dtype(dtype).itemsize
+
+        if n_features_in == 1:  # Analysis.
+            out = np.empty((N, Nv, Nf), dtype=dtype)
+            column_size = (K + K * Nf + N * Nf) * itemsize
+        else:  # Synthesis.
+            out = np.empty((N, Nv, 1), dtype=dtype)
+            column_size = (K * Nf + K + N) * itemsize
+        chunk = approximations._chunk_size(Nv, column_size, max_memory)
+        n_features_out = out.shape[2]
+
+        # Flat workspaces, such that the views are contiguous. The output is
+        # written directly if there is a single block.
+        ws_in = np.empty(K * chunk * n_features_in, dtype=dtype)
+        ws_out = np.empty(K * chunk * n_features_out, dtype=dtype)
+        ws_y = np.empty(N * chunk * n_features_out if chunk < Nv else 0,
+                        dtype=dtype)
+
+        for start in range(0, Nv, chunk):
+            n = min(chunk, Nv - start)
+
+            # Graph Fourier transform.
+            x = s[:, start:start+n].reshape(N, n * n_features_in)
+            x_hat = ws_in[:x.size // N * K].reshape(K, x.shape[1])
+            self.G._gft(x, out=x_hat)
+
+            # Multiplication by the frequency response.
+            y_hat = ws_out[:K * n * n_features_out]
+            if n_features_in == 1:
+                y_hat = y_hat.reshape(K, n, Nf)
+                np.multiply(x_hat[:, :, np.newaxis],
+                            response.T[:, np.newaxis, :], out=y_hat)
+            else:
+                y_hat = y_hat.reshape(K, n)
+                np.einsum('kni,ik->kn', x_hat.reshape(K, n, Nf), response,
+                          out=y_hat)
 
-            if n_features_in == 1:  # Analysis.
-                s = s.squeeze(axis=2)
-                s = approximations.cheby_op(self.G, c, s)
-                s = s.reshape((self.G.N, n_features_out, n_signals), order='F')
-                s = s.swapaxes(1, 2)
+            # Inverse graph Fourier transform.
+            if n == Nv:
+                y = out.reshape(N, -1)
+            else:
+                y = ws_y[:N * n * n_features_out].reshape(N, -1)
+            self.G._igft(y_hat.reshape(K, -1), out=y)
+            if n != Nv:
+                out[:, start:start+n] = y.reshape(N, n, n_features_out)
 
-            elif n_features_in == self.Nf:  # Synthesis.
-                s = s.swapaxes(1, 2)
-                s_in = s.reshape(
-                    (self.G.N * n_features_in, n_signals), order='F')
-                s = np.zeros((self.G.N, n_signals))
-                tmpN = np.arange(self.G.N, dtype=int)
-                for i in range(n_features_in):
-                    s += approximations.cheby_op(self.G,
-                                                 c[i],
-                                                 s_in[i * self.G.N + tmpN])
-                s = np.expand_dims(s, 2)
+        return out
 
+    def _get_kernels_id(self):
+        r"""Identity of the kernels, to invalidate the caches."""
+        if isinstance(self._kernels, (list, tuple)):
+            return tuple(id(kernel) for kernel in self._kernels)
         else:
-            raise ValueError('Unknown method {}.'.format(method))
+            return id(self._kernels)
 
-        # Return a 1D signal if e.g. a 1D signal was filtered by one filter.
-        return s.squeeze()
+    def _get_response(self):
+        r"""Return the frequency response :math:`g(\Lambda)` (cached).
 
-    def analyze(self, s, method='chebyshev', order=30):
+        The filter bank is evaluated once on the eigenvalues of the graph
+        Laplacian. The cache is invalidated when the Fourier basis is
+        recomputed.
+
+        Returns
+        -------
+        response : ndarray
+            Read-only array of shape ``(Nf, n_eigenvalues)``.
+        """
+        e = self.G.e
+        kernels = self._get_kernels_id()
+        if (getattr(self, '_response_e', None) is not e
+                or self._response_kernels != kernels):
+            response = np.atleast_2d(self.evaluate(e))
+            response.flags.writeable = False
+            self._response = response
+            self._response_e = e
+            self._response_kernels = kernels
+        return self._response
+
+    def _get_cheby_coeff(self, order, N=None, tol=1e-6, max_order=200,
+                         return_orders=False):
+        r"""Return the Chebyshev coefficients of the filter bank (cached).
+
+        The coefficients are cached per order, quadrature size ``N``, graph
+        :attr:`~pygsp.graphs.Graph.lmax`, and kernels. The cache is emptied
+        when lmax changes, as the kernels are then approximated on another
+        interval.
+
+        If ``order='auto'``, the expansion of each filter is truncated at the
+        order given by :func:`compute_cheby_order` (the coefficients above
+        are zero).
+
+        Returns
+        -------
+        c : ndarray
+            Read-only array of shape ``(Nf, order+1)``.
+        orders, errors : ndarray
+            The orders and errors given by :func:`compute_cheby_order`, if
+            ``order='auto'`` and ``return_orders`` is True.
+        """
+        lmax = self.G.lmax
+
+        kernels = self._get_kernels_id()
+
+        if getattr(self, '_cheby_lmax', None) != lmax:
+            self._cheby_lmax = lmax
+            self._cheby_coeff = dict()
+            self._cheby_orders = dict()
+
+        if order == 'auto':
+            key = (order, tol, max_order, lmax, kernels)
+        else:
+            N = order + 1 if N is None else N
+            key = (order, N, lmax, kernels)
+
+        if key not in self._cheby_coeff:
+            if order == 'auto':
+                orders, errors = approximations.compute_cheby_order(
+                    self, tol, max_order)
+                _logger.info('Chebyshev orders {} approximate the filters '
+                             'with errors {}.'.format(orders, errors))
+                c = self._get_cheby_coeff(max_order)[:, :np.max(orders) + 1]
+                degrees = np.arange(c.shape[1])
+                c = np.where(degrees <= orders[:, np.newaxis], c, 0)
+                self._cheby_orders[key] = (orders, errors)
+            else:
+                c = approximations.compute_cheby_coeff(self, m=order, N=N)
+                c = np.atleast_2d(c)
+            c.flags.writeable = False
+            self._cheby_coeff[key] = c
+        if order == 'auto' and return_orders:
+            return (self._cheby_coeff[key],) + self._cheby_orders[key]
+        return self._cheby_coeff[key]
+
+    def analyze(self, s, method='chebyshev', order=30, **kwargs):
         r"""Convenience alias to :meth:`filter`."""
         if s.ndim == 3 and s.shape[-1] != 1:
             raise ValueError('Last dimension (#features) should be '
                              '1, got {}.'.format(s.shape))
-        return self.filter(s, method, order)
+        return self.filter(s, method, order, **kwargs)
 
-    def synthesize(self, s, method='chebyshev', order=30):
+    def synthesize(self, s, method='chebyshev', order=30, **kwargs):
         r"""Convenience wrapper around :meth:`filter`.
 
         Will be an alias to `adjoint().filter()` in the future.
@@ -348,10 +698,167 @@ class Filter(object):
             raise ValueError('Last dimension (#features) should be the number '
                              'of filters Nf = {}, got {}.'.format(self.Nf,
                                                                   s.shape))
-        return self.filter(s, method, order)
+        return self.filter(s, method, order, **kwargs)
+
+    def filter_chunks(self, s, chunk_size=None, max_memory=None,
+                      method='chebyshev', order=30, accumulate=None, tol=1e-6,
+                      workers=1, task_size=None, nodes=None):
+        r"""Filter signals by chunks (analysis), as a generator.
+
+        The signals are read and filtered by chunks of columns, such that only
+        one chunk is in memory at a time. That allows to filter signals stored
+        in a memory-mapped array (see :func:`numpy.load` with ``mmap_mode``)
+        which do not fit in memory, or to consume the coefficients online.
+
+        Parameters
+        ----------
+        s : array_like
+            Graph signals, of shape ``(N_NODES,)`` or ``(N_NODES,
+            N_SIGNALS)``. Can be a :class:`numpy.memmap`.
+        chunk_size : int
+            Number of signals per chunk. By default, the largest number of
+            signals whose input, output, and working buffers fit in
+            ``max_memory``.
+        max_memory : int
+            Maximum size in bytes of a chunk, if ``chunk_size`` is not given.
+            Default is 1 GiB. Also bounds the working buffers of
+            :meth:`filter`.
+        method : {'chebyshev', 'clenshaw', 'lanczos'}
+            Approximation method, see :meth:`filter`.
+        order : int or 'auto'
+            Degree of the approximation, see :meth:`filter`.
+        accumulate : data-type
+            Accumulation type of the 'chebyshev' analysis, see :meth:`filter`.
+        tol : float
+            Maximum error if ``order='auto'``, see :meth:`filter`.
+        workers : int
+            Number of processes, see :meth:`filter`.
+        task_size : int
+            Number of signals per task if ``workers > 1``, i.e., the
+            ``chunk_size`` parameter of :meth:`filter`.
+        nodes : array_like
+            Nodes where to compute the 'chebyshev' analysis, see
+            :meth:`filter`.
+
+        Yields
+        ------
+        columns : slice
+            The signals of the chunk, i.e., ``s[:, columns]``.
+        coefficients : ndarray
+            Filtered signals, of shape ``(N_NODES, len(chunk), N_FILTERS)``.
+            ``N_NODES`` is ``len(nodes)`` if ``nodes`` is given.
+
+        See Also
+        --------
+        filter_to_file : write the coefficients to a file
+
+        Examples
+        --------
+        >>> G = graphs.Sensor(30, seed=42)
+        >>> G.estimate_lmax()
+        >>> g = filters.MexicanHat(G, Nf=4)
+        >>> s = np.random.RandomState(42).normal(size=(G.N, 10))
+        >>> for columns, y in g.filter_chunks(s, chunk_size=4):
+        ...     print(columns, y.shape)
+        slice(0, 4, None) (30, 4, 4)
+        slice(4, 8, None) (30, 4, 4)
+        slice(8, 10, None) (30, 2, 4)
+
+        """
+        if s.ndim == 1:
+            s = s[:, np.newaxis]
+        if s.ndim != 2 or s.shape[0] != self.G.N:
+            raise ValueError('Signals should be of shape (G.N, N_SIGNALS) = '
+                             '({}, N_SIGNALS), got {}.'.format(
+                                 self.G.N, s.shape))
+        n_signals = s.shape[1]
+
+        dtype = np.result_type(self.G.L.dtype, s.dtype, np.float32)
+        if method in ['chebyshev', 'clenshaw']:
+            n_buffers = 3 + self.Nf
+        elif method == 'lanczos':
+            if order == 'auto':
+                raise ValueError('The Lanczos method needs an integer order.')
+            n_buffers = order + 2 + self.Nf
+        else:
+            raise ValueError('Unknown method {}.'.format(method))
+
+        if chunk_size is None:
+            column_size = n_buffers * self.G.N * np.dtype(dtype).itemsize
+            chunk_size = approximations._chunk_size(
+                n_signals, column_size,
+                2**30 if max_memory is None else max_memory)
+
+        kwargs = dict(method=method, order=order, max_memory=max_memory,
+                      accumulate=accumulate, tol=tol, workers=workers,
+                      chunk_size=task_size, nodes=nodes)
+        for start in range(0, n_signals, chunk_size):
+            columns = slice(start, min(start + chunk_size, n_signals))
+            # A single feature: an analysis even if len(chunk) == Nf.
+            x = np.asarray(s[:, columns])[:, :, np.newaxis]
+            y = self.filter(x, **kwargs)
+            yield columns, y.reshape(-1, x.shape[1], self.Nf)
+
+    def filter_to_file(self, s, path, progress=None, **kwargs):
+        r"""Filter signals by chunks (analysis) and write them to a file.
+
+        The coefficients are written incrementally to a memory-mapped ``.npy``
+        file, such that neither the signals nor the coefficients need to fit
+        in memory. Progress is logged after each chunk.
+
+        Parameters
+        ----------
+        s : array_like
+            Graph signals, of shape ``(N_NODES,)`` or ``(N_NODES,
+            N_SIGNALS)``. Can be a :class:`numpy.memmap`.
+        path : str
+            Path of the ``.npy`` file to create.
+        progress : callable
+            Called as ``progress(n_done, n_signals)`` after each chunk.
+        kwargs : dict
+            Parameters of :meth:`filter_chunks`, e.g., ``max_memory``.
+
+        Returns
+        -------
+        coefficients : numpy.memmap
+            Filtered signals, of shape ``(N_NODES, N_SIGNALS, N_FILTERS)``,
+            backed by the file. ``N_NODES`` is ``len(nodes)`` if ``nodes``
+            is given.
+
+        Examples
+        --------
+        >>> import os, tempfile
+        >>> G = graphs.Sensor(30, seed=42)
+        >>> G.estimate_lmax()
+        >>> g = filters.MexicanHat(G, Nf=4)
+        >>> s = np.random.RandomState(42).normal(size=(G.N, 10))
+        >>> path = os.path.join(tempfile.mkdtemp(), 'coefficients.npy')
+        >>> y = g.filter_to_file(s, path, chunk_size=4)
+        >>> y.shape
+        (30, 10, 4)
+        >>> np.allclose(np.load(path), g.filter(s))
+        True
+
+        """
+        n_signals = 1 if s.ndim == 1 else s.shape[1]
+        nodes = kwargs.get('nodes')
+        n_nodes = self.G.N if nodes is None else np.size(nodes)
+        dtype = np.result_type(self.G.L.dtype, s.dtype, np.float32)
+        out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype,
+                                        shape=(n_nodes, n_signals, self.Nf))
+
+        for columns, y in self.filter_chunks(s, **kwargs):
+            out[:, columns] = y
+            _logger.info('Filtered {} / {} signals.'.format(
+                columns.stop, n_signals))
+            if progress is not None:
+                progress(columns.stop, n_signals)
+
+        out.flush()
+        return out
 
     def localize(self, i, **kwargs):
-        r"""Localize the kernels at a node (to visualize them).
+        r"""Localize the kernels at a node, or many (to visualize them).
 
         That is particularly useful to visualize a filter in the vertex domain.
 
@@ -365,15 +872,17 @@ class Filter(object):
 
         Parameters
         ----------
-        i : int
-            Index of the node where to localize the kernel.
+        i : int or array_like
+            Index of the node where to localize the kernel, or indices of the
+            nodes. All the deltas are then filtered at once.
         kwargs: dict
             Parameters to be passed to the :meth:`analyze` method.
 
         Returns
         -------
         s : ndarray
-            Kernel localized at vertex i.
+            Kernel localized at vertex i, of shape ``(N, Nf)``. Of shape ``(N,
+            len(i), Nf)`` if ``i`` is array_like.
 
         Examples
         --------
@@ -388,9 +897,21 @@ class Filter(object):
         >>> s = g.localize(DELTA)
         >>> _ = G.plot(s, highlight=DELTA)
 
+        Localize the kernel at many nodes at once:
+
+        >>> s = g.localize([DELTA, 0, 1])
+        >>> s.shape
+        (400, 3)
+
+        The kernels of a filter bank which maps features (see :class:`Filter`)
+        cannot be localized, as they are not applied to a single signal.
+
         """
-        s = np.zeros(self.G.N)
-        s[i] = 1
+        self._check_not_mapping('localized')
+        i = np.asanyarray(i)
+        s = np.zeros((self.G.N, i.size))
+        s[i.ravel(), np.arange(i.size)] = 1
+        s = s.reshape((self.G.N,) + i.shape)
         return np.sqrt(self.G.N) * self.filter(s, **kwargs)
 
     def estimate_frame_bounds(self, x=None):
@@ -590,7 +1111,11 @@ class Filter(object):
         >>> np.all(gL.T.dot(gL) - np.identity(G.N) < 1e-10)
         True
 
+        The frame of a filter bank which maps features (see :class:`Filter`)
+        is not defined.
+
         """
+        self._check_not_mapping('represented by a frame')
         if self.G.N > 2000:
             _logger.warning('Creating a big matrix. '
                             'You should prefer the filter method.')
@@ -599,6 +1124,77 @@ class Filter(object):
         s = np.identity(self.G.N)
         return self.filter(s, **kwargs).T.reshape(-1, self.G.N)
 
+    def compute_sparse_frame(self, order=30, tol=0, block_size=32):
+        r"""Compute the frame of the Chebyshev approximation (sparse).
+
+        As a polynomial of degree :math:`K` of the Laplacian, the Chebyshev
+        approximation of a filter is exactly localized in :math:`K` hops. The
+        atoms are computed by blocks of ``block_size`` Kronecker deltas, each
+        on the rows and columns of the Laplacian indexed by the
+        :math:`K`-hop neighborhood of the block, where they are supported.
+        Only the entries of magnitude larger than ``tol`` are kept. The cost
+        and the memory grow with the size of the neighborhoods rather than
+        with :math:`N^2`.
+
+        Parameters
+        ----------
+        order : int
+            Degree of the Chebyshev polynomials.
+        tol : float
+            Entries of magnitude smaller or equal are dropped. Only the exact
+            zeros by default.
+        block_size : int
+            Number of deltas filtered at once. Consecutive node indices form a
+            block, which is efficient if they are close in the graph.
+
+        Returns
+        -------
+        frame : sparse matrix
+            CSR matrix of size (#nodes x #filters) x #nodes, with the layout
+            of :meth:`compute_frame`.
+
+        Examples
+        --------
+        >>> G = graphs.Grid2d(20)
+        >>> G.estimate_lmax()
+        >>> g = filters.Heat(G, [1, 10])
+        >>> frame = g.compute_sparse_frame(order=10)
+        >>> frame.shape
+        (800, 400)
+        >>> np.allclose(frame.toarray(), g.compute_frame(order=10))
+        True
+        >>> g.compute_sparse_frame(order=10, tol=1e-3).nnz < frame.nnz
+        True
+
+        """
+        self._check_not_mapping('represented by a frame')
+        N, Nf = self.G.N, self.Nf
+        c = self._get_cheby_coeff(order)
+        degree = c.shape[1] - 1
+        dtype = np.result_type(self.G.L.dtype, np.float32)
+
+        rows, cols, data = [], [], []
+        for start in range(0, N, block_size):
+            block = np.arange(start, min(start + block_size, N))
+            # T_k(L) delta_j is supported within k hops of node j. The rows
+            # and columns of the K-hop neighborhood thus give exact atoms.
+            index = self.G.get_neighborhood(block, degree)
+            factor = approximations._cheby_factor(self.G, dtype, index)
+            deltas = np.zeros((len(index), len(block)), dtype=dtype)
+            deltas[np.searchsorted(index, block), np.arange(len(block))] = 1
+            atoms = np.empty((len(index), len(block), Nf), dtype=dtype)
+            approximations._cheby_analysis(factor, c, deltas, atoms)
+            i, j, k = np.nonzero(np.abs(atoms) > tol)
+            rows.append(k * N + index[i])
+            cols.append(block[j])
+            data.append(atoms[i, j, k])
+
+        frame = sparse.coo_matrix((np.concatenate(data),
+                                   (np.concatenate(rows),
+                                    np.concatenate(cols))),
+                                  shape=(N * Nf, N))
+        return frame.tocsr()
+
     def complement(self, frame_bound=None):
         r"""Return the filter that makes the frame tight.
 
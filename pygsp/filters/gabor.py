@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
-from pygsp import utils
+import numpy as np
+
 from . import Filter  # prevent circular import in Python < 3.5
 
 
@@ -36,6 +37,9 @@ class Gabor(Filter):
     kernel : :class:`pygsp.filters.Filter`
         Kernel function to be centered at each graph frequency (eigenvalue of
         the graph Laplacian).
+    centers : array_like, optional
+        Frequencies at which to center the kernel. By default, the kernel is
+        centered at each eigenvalue of the graph Laplacian.
 
     See Also
     --------
@@ -44,7 +48,10 @@ class Gabor(Filter):
     Notes
     -----
     The eigenvalues of the graph Laplacian (i.e., the Fourier basis) are needed
-    to center the kernels.
+    to center the kernels, unless the centers are given. Filtering with
+    ``method='chebyshev'`` then only needs :attr:`pygsp.graphs.Graph.lmax`,
+    which makes windowed graph Fourier analysis practical on graphs too large
+    for :meth:`pygsp.graphs.Graph.compute_fourier_basis`.
 
     Examples
     --------
@@ -68,9 +75,20 @@ class Gabor(Filter):
     ...     _ = G.plot(s, ax=ax[1])
     >>> fig.tight_layout()
 
+    Vertex-frequency analysis at a few frequencies, without the Fourier basis:
+
+    >>> G = graphs.Sensor(100, seed=42)
+    >>> G.estimate_lmax()
+    >>> g = filters.Filter(G, lambda x: np.exp(-(4 * x / G.lmax)**2))
+    >>> g = filters.Gabor(G, g, centers=np.linspace(0, G.lmax, 5))
+    >>> s = np.random.RandomState(42).normal(size=G.N)
+    >>> s = g.filter(s, method='chebyshev')
+    >>> s.shape
+    (100, 5)
+
     """
 
-    def __init__(self, graph, kernel):
+    def __init__(self, graph, kernel, centers=None):
 
         if kernel.n_filters != 1:
             raise ValueError('A kernel must be one filter. The passed '
@@ -80,12 +98,30 @@ class Gabor(Filter):
             raise ValueError('The graph passed to this filter bank must '
                              'be the one used to build the mother kernel.')
 
+        if centers is None:
+            centers = graph.e
+        centers = np.asanyarray(centers, dtype=float)
+        if centers.ndim != 1:
+            raise ValueError('The centers must be a vector, '
+                             'got shape {}.'.format(centers.shape))
+
+        self._kernel = kernel
+        self.centers = centers
+
         kernels = []
-        for i in range(graph.n_vertices):
-            kernels.append(lambda x, i=i: kernel.evaluate(x - graph.e[i]))
+        for center in centers:
+            kernels.append(lambda x, c=center: kernel.evaluate(x - c))
 
         super(Gabor, self).__init__(graph, kernels)
 
-    def filter(self, s, method='exact', order=None):
-        """TODO: indirection will be removed when poly filtering is merged."""
-        return super(Gabor, self).filter(s, method='exact')
+    def evaluate(self, x):
+        """Evaluate the shifted mother kernel for all centers at once."""
+        x = np.asanyarray(x)
+        shape = (len(self.centers),) + (1,) * x.ndim
+        y = self._kernel.evaluate(x - self.centers.reshape(shape))
+        return y[0]
+
+    def filter(self, s, method='exact', order=30, **kwargs):
+        """Filter signals (see :meth:`Filter.filter`), exactly by default."""
+        return super(Gabor, self).filter(s, method=method, order=order,
+                                         **kwargs)
@@ -45,13 +45,10 @@ class HalfCosine(Filter):
             y = np.multiply((.5 + .5*y), (x >= 0))
             return np.multiply(y, (x <= dila_fact))
 
-        kernels = []
+        def kernel_centered(x, center):
+            return kernel(x - center)
 
-        for i in range(Nf):
-
-            def kernel_centered(x, i=i):
-                return kernel(x - dila_fact/3 * (i - 2))
-
-            kernels.append(kernel_centered)
+        centers = dila_fact / 3 * (np.arange(Nf) - 2)
+        kernels = self._vectorize(kernel_centered, center=centers)
 
         super(HalfCosine, self).__init__(G, kernels)
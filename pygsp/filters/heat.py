@@ -113,14 +113,15 @@ class Heat(Filter):
         self.scale = scale
         self.normalize = normalize
 
-        def kernel(x, scale):
-            return np.minimum(np.exp(-scale * x / G.lmax), 1)
+        def kernel(x, scale, norm=1):
+            return np.minimum(np.exp(-scale * x / G.lmax), 1) / norm
 
-        kernels = []
-        for s in scale:
-            norm = np.linalg.norm(kernel(G.e, s)) if normalize else 1
-            kernels.append(lambda x, s=s, norm=norm: kernel(x, s) / norm)
+        if normalize:
+            norm = [np.linalg.norm(kernel(G.e, s)) for s in scale]
+        else:
+            norm = np.ones(len(scale))
 
+        kernels = self._vectorize(kernel, scale=scale, norm=norm)
         super(Heat, self).__init__(G, kernels)
 
     def _get_extra_repr(self):
@@ -50,14 +50,14 @@ class Itersine(Filter):
             y = np.sin(0.5 * np.pi * y)
             return y * ((x >= -0.5) * (x <= 0.5))
 
-        kernels = []
-        for i in range(1, Nf + 1):
+        # Center of each filter, on the axis scaled by scales.
+        centers = (np.arange(1, Nf + 1) - overlap / 2) / overlap
 
-            def kernel_centered(x, i=i):
-                y = kernel(x / scales - (i - overlap / 2) / overlap)
-                return y * np.sqrt(2 / overlap)
+        def kernel_centered(x, center):
+            y = kernel(x / scales - center)
+            return y * np.sqrt(2 / overlap)
 
-            kernels.append(kernel_centered)
+        kernels = self._vectorize(kernel_centered, center=centers)
 
         super(Itersine, self).__init__(G, kernels)
 
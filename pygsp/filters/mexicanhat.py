@@ -69,21 +69,19 @@ class MexicanHat(Filter):
         if len(scales) != Nf - 1:
             raise ValueError('len(scales) should be Nf-1.')
 
-        def band_pass(x):
-            return x * np.exp(-x)
-
-        def low_pass(x):
-            return np.exp(-x**4)
-
-        kernels = [lambda x: 1.2 * np.exp(-1) * low_pass(x / 0.4 / lmin)]
-
-        for i in range(Nf - 1):
-
-            def kernel(x, i=i):
-                norm = np.sqrt(scales[i]) if normalize else 1
-                return norm * band_pass(scales[i] * x)
-
-            kernels.append(kernel)
+        def kernel(x, scale, gain, low_pass):
+            x = scale * x
+            # Low-pass for the first filter, band-pass for the others.
+            y = np.where(low_pass, np.exp(-x**4), x * np.exp(-x))
+            return gain * y
+
+        scales = np.asarray(scales, dtype=float)
+        norm = np.sqrt(scales) if normalize else np.ones(Nf - 1)
+        kernels = self._vectorize(
+            kernel,
+            scale=np.concatenate([[1 / (0.4 * lmin)], scales]),
+            gain=np.concatenate([[1.2 * np.exp(-1)], norm]),
+            low_pass=np.arange(Nf) == 0)
 
         super(MexicanHat, self).__init__(G, kernels)
 
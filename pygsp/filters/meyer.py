@@ -48,12 +48,7 @@ class Meyer(Filter):
         if len(scales) != Nf - 1:
             raise ValueError('len(scales) should be Nf-1.')
 
-        kernels = [lambda x: kernel(scales[0] * x, 'scaling_function')]
-
-        for i in range(Nf - 1):
-            kernels.append(lambda x, i=i: kernel(scales[i] * x, 'wavelet'))
-
-        def kernel(x, kernel_type):
+        def kernel(x, scale, wavelet):
             r"""
             Evaluates Meyer function and scaling function
 
@@ -61,7 +56,8 @@ class Meyer(Filter):
             * meyer scaling function kernel: supported on [0,4/3]
             """
 
-            x = np.asarray(x)
+            x = np.asanyarray(scale * x)
+            wavelet = np.broadcast_to(wavelet, x.shape).astype(bool)
 
             l1 = 2/3.
             l2 = 4/3.  # 2*l1
@@ -71,21 +67,23 @@ class Meyer(Filter):
                 return x**4 * (35 - 84*x + 70*x**2 - 20*x**3)
 
             r1ind = (x < l1)
-            r2ind = (x >= l1) * (x < l2)
-            r3ind = (x >= l2) * (x < l3)
+            r2ind = (x >= l1) & (x < l2)
+            r3ind = (x >= l2) & (x < l3)
 
             # as we initialize r with zero, computed function will implicitly
             # be zero for all x not in one of the three regions defined above
             r = np.zeros(x.shape)
-            if kernel_type == 'scaling_function':
-                r[r1ind] = 1
-                r[r2ind] = np.cos((np.pi/2) * v(np.abs(x[r2ind])/l1 - 1))
-            elif kernel_type == 'wavelet':
-                r[r2ind] = np.sin((np.pi/2) * v(np.abs(x[r2ind])/l1 - 1))
-                r[r3ind] = np.cos((np.pi/2) * v(np.abs(x[r3ind])/l2 - 1))
-            else:
-                raise ValueError('Unknown kernel type {}'.format(kernel_type))
-
+            # Scaling function for the first filter, wavelets for the others.
+            ind = r1ind & ~wavelet
+            r[ind] = 1
+            y = (np.pi/2) * v(np.abs(x[r2ind])/l1 - 1)
+            r[r2ind] = np.where(wavelet[r2ind], np.sin(y), np.cos(y))
+            ind = r3ind & wavelet
+            r[ind] = np.cos((np.pi/2) * v(np.abs(x[ind])/l2 - 1))
             return r
 
+        kernels = self._vectorize(kernel,
+                                  scale=np.concatenate([scales[:1], scales]),
+                                  wavelet=np.arange(Nf) > 0)
+
         super(Meyer, self).__init__(G, kernels)
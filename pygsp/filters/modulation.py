@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
 import numpy as np
-from scipy import interpolate
 
 from . import Filter  # prevent circular import in Python < 3.5
 
@@ -152,26 +151,67 @@ class Modulation(Filter):
             c = np.sqrt(self.G.n_vertices) * self.G.U * c[:, np.newaxis]
             self._coefficients = self.G.gft(c)
 
-        shape = x.shape
-        x = x.flatten()
+        # Index of the (first) eigenvalue equal to each query, by a binary
+        # search in the sorted eigenvalues.
+        x = np.asanyarray(x)
+        order = np.argsort(self.G.e, kind='mergesort')
+        e = self.G.e[order]
+        index = np.minimum(np.searchsorted(e, x.ravel()), len(e) - 1)
+        found = e[index] == x.ravel()
         y = np.full((self.n_features_out, x.size), np.nan)
-        for i in range(len(x)):
-            query = self._coefficients[x[i] == self.G.e]
-            if len(query) != 0:
-                y[:, i] = query[0]
-        return y.reshape((self.n_features_out,) + shape)
+        y[:, found] = self._coefficients[order[index[found]]].T
+        return y.reshape((self.n_features_out,) + x.shape)
 
     def filter(self, s, method='exact', order=None):
-        """TODO: indirection will be removed when poly filtering is merged.
-        TODO: with _filter and shape handled in Filter.filter, synthesis will work.
+        r"""Compute the vertex-frequency representation of signals.
+
+        When localizing first, the representation is computed at once for all
+        vertices and frequencies as
+
+        .. math:: Sf(i, k) = \langle f \odot T_i g, u_k \rangle
+                           = N \left[ g(L) (f \odot u_k) \right]_i,
+
+        i.e., by filtering the signals modulated by each eigenvector with the
+        kernel. With ``method='exact'``, that is a few dense matrix products.
+        With ``method='chebyshev'``, the kernel is localized with a Chebyshev
+        polynomial, which only needs :attr:`pygsp.graphs.Graph.lmax` and the
+        eigenvectors :math:`u_k` of interest (e.g., from a partial
+        eigendecomposition, see
+        :meth:`pygsp.graphs.Graph.compute_fourier_basis`).
+
+        Parameters
+        ----------
+        s : ndarray
+            Signals, of shape ``(N,)`` or ``(N, N_SIGNALS)``.
+        method : {'exact', 'chebyshev', 'clenshaw', 'lanczos'}
+            Method used to localize the kernel (see :meth:`Filter.filter`).
+            Only when localizing first: when modulating first, the modulated
+            kernels are only defined at the eigenvalues, hence ``method`` and
+            ``order`` are ignored and the representation is always computed
+            with the 'exact' method.
+        order : int
+            Order of the approximation (see :meth:`Filter.filter`). Ignored
+            when modulating first.
+
+        Returns
+        -------
+        s : ndarray
+            Vertex-frequency representation, of shape ``(N, K)`` or ``(N,
+            N_SIGNALS, K)``, where ``K`` is the number of eigenvectors.
+
         """
         if self._modulation_first:
+            # The kernels are defined on the eigenvalues only.
             return super(Modulation, self).filter(s, method='exact')
         else:
             # The dot product with each modulated kernel is equivalent to the
             # GFT, as for the localization and the IGFT.
-            y = np.empty((self.G.n_vertices, self.G.n_vertices))
-            for i in range(self.G.n_vertices):
-                x = s * self._kernels.localize(i)
-                y[i] = np.sqrt(self.G.n_vertices) * self.G.gft(x)
-            return y
+            s = np.asanyarray(s)
+            N = self.G.n_vertices
+            U = self.G.U
+            x = s.reshape(N, -1)[:, :, np.newaxis] * U[:, np.newaxis, :]
+            kwargs = dict(method=method)
+            if order is not None:
+                kwargs['order'] = order
+            y = self._kernels.filter(x.reshape(N, -1), **kwargs)
+            return N * y.reshape(s.shape + (U.shape[1],))
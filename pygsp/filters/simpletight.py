@@ -41,7 +41,7 @@ class SimpleTight(Filter):
 
     def __init__(self, G, Nf=6, scales=None):
 
-        def kernel(x, kerneltype):
+        def kernel(x, scale, wavelet):
             r"""
             Evaluates 'simple' tight-frame kernel.
 
@@ -52,8 +52,10 @@ class SimpleTight(Filter):
             ----------
             x : ndarray
                 Array of independent variable values
-            kerneltype : str
-                Can be either 'sf' or 'wavelet'
+            scale : ndarray
+                Scale of the kernel.
+            wavelet : ndarray
+                Whether the kernel is a wavelet or a scaling function.
 
             Returns
             -------
@@ -61,6 +63,9 @@ class SimpleTight(Filter):
 
             """
 
+            x = np.asanyarray(scale * x)
+            wavelet = np.broadcast_to(wavelet, x.shape).astype(bool)
+
             l1 = 0.25
             l2 = 0.5
             l3 = 1.
@@ -69,31 +74,28 @@ class SimpleTight(Filter):
                 return np.sin(np.pi*x/2.)**2
 
             r1ind = (x < l1)
-            r2ind = (x >= l1) * (x < l2)
-            r3ind = (x >= l2) * (x < l3)
+            r2ind = (x >= l1) & (x < l2)
+            r3ind = (x >= l2) & (x < l3)
 
             r = np.zeros(x.shape)
-            if kerneltype is 'sf':
-                r[r1ind] = 1.
-                r[r2ind] = np.sqrt(1 - h(4*x[r2ind] - 1)**2)
-            elif kerneltype is 'wavelet':
-                r[r2ind] = h(4*(x[r2ind] - 1/4.))
-                r[r3ind] = np.sqrt(1 - h(2*x[r3ind] - 1)**2)
-            else:
-                raise TypeError('Unknown kernel type', kerneltype)
-
+            # Scaling function for the first filter, wavelets for the others.
+            ind = r1ind & ~wavelet
+            r[ind] = 1.
+            y = h(4*x[r2ind] - 1)
+            r[r2ind] = np.where(wavelet[r2ind], y, np.sqrt(1 - y**2))
+            ind = r3ind & wavelet
+            r[ind] = np.sqrt(1 - h(2*x[ind] - 1)**2)
             return r
 
-        if not scales:
+        if scales is None:
             scales = (1./(2.*G.lmax) * np.power(2, np.arange(Nf-2, -1, -1)))
         self.scales = scales
 
         if len(scales) != Nf - 1:
             raise ValueError('len(scales) should be Nf-1.')
 
-        kernels = [lambda x: kernel(scales[0] * x, 'sf')]
-
-        for i in range(Nf - 1):
-            kernels.append(lambda x, i=i: kernel(scales[i] * x, 'wavelet'))
+        kernels = self._vectorize(kernel,
+                                  scale=np.concatenate([scales[:1], scales]),
+                                  wavelet=np.arange(Nf) > 0)
 
         super(SimpleTight, self).__init__(G, kernels)
@@ -7,6 +7,7 @@ from functools import partial
 import numpy as np
 
 from . import Filter  # prevent circular import in Python < 3.5
+from . import approximations
 
 
 class Wave(Filter):
@@ -38,6 +39,15 @@ class Wave(Filter):
     with the kernel :math:`g_{\tau, t}`.
     Hence, applying this filter to a signal simulates wave propagation.
 
+    For an integer time :math:`t`, the kernel is the Chebyshev polynomial
+    :math:`T_t` of the operator :math:`M = I - \frac{\tau^2}{2 \lambda_{max}}
+    L`. The default ``method='recurrence'`` of :meth:`filter` evaluates it
+    exactly by the three-term recurrence :math:`T_{k+1}(M) f = 2 M T_k(M) f -
+    T_{k-1}(M) f`, without the Fourier basis, for :math:`O(t |E|)` operations.
+    All the times of a given speed are read from the same recurrence, and
+    :meth:`simulate` returns every time step. Non-integer times are
+    approximated by a (cached) Chebyshev expansion.
+
     Parameters
     ----------
     G : graph
@@ -67,6 +77,15 @@ class Wave(Filter):
     >>> _ = g.plot(ax=axes[0])
     >>> _ = G.plot(s, ax=axes[1])
 
+    The recurrence is exact for integer times:
+
+    >>> G.compute_fourier_basis()
+    >>> s = np.random.RandomState(42).normal(size=G.N)
+    >>> s1 = g.filter(s)
+    >>> s2 = g.filter(s, method='exact')
+    >>> np.allclose(s1, s2)
+    True
+
     Wave propagation from two sources on a grid.
 
     >>> import matplotlib.pyplot as plt
@@ -121,8 +140,9 @@ class Wave(Filter):
         def kernel(x, time, speed):
             return np.cos(time * np.arccos(1 - speed**2 * x / G.lmax / 2))
 
+        self._parameters = list(zip(time, speed))
         kernels = [partial(kernel, time=t, speed=s)
-                   for t, s in zip(time, speed)]
+                   for t, s in self._parameters]
 
         super(Wave, self).__init__(G, kernels)
 
@@ -130,3 +150,158 @@ class Wave(Filter):
         time = '[' + ', '.join('{:.2f}'.format(t) for t in self.time) + ']'
         speed = '[' + ', '.join('{:.2f}'.format(s) for s in self.speed) + ']'
         return dict(time=time, speed=speed)
+
+    def filter(self, s, method='recurrence', order=30, **kwargs):
+        r"""Filter signals (analysis or synthesis).
+
+        Parameters
+        ----------
+        s : ndarray
+            Graph signals (see :meth:`Filter.filter`).
+        method : {'recurrence', 'exact', 'chebyshev', 'clenshaw', 'lanczos'}
+            The 'recurrence' method is exact for integer times and needs
+            neither the Fourier basis nor an approximation order. Non-integer
+            times are approximated with Chebyshev polynomials of degree
+            ``order``. The other methods are those of :meth:`Filter.filter`.
+        order : int
+            Degree of the Chebyshev polynomials.
+        kwargs : dict
+            Parameters passed to :meth:`Filter.filter`, e.g., ``nodes`` or
+            ``workers``. As the recurrence does not support them, the
+            'recurrence' method then falls back to the 'chebyshev' method,
+            whose degree is raised to the largest integer time, such that it
+            is still exact for integer times.
+
+        Returns
+        -------
+        s : ndarray
+            Graph signals (see :meth:`Filter.filter`).
+
+        """
+        if method == 'recurrence' and kwargs:
+            # A polynomial of degree t is exactly expanded at that order.
+            if order != 'auto':
+                times = [abs(int(t)) for t, _ in self._parameters
+                         if float(t).is_integer()]
+                order = max([order] + times)
+            method = 'chebyshev'
+        if method != 'recurrence':
+            return super(Wave, self).filter(s, method=method, order=order,
+                                            **kwargs)
+
+        s = self._reshape_signal(s)
+        N, Nv, n_features_in = s.shape
+        dtype = np.result_type(self.G.L.dtype, s.dtype, np.float32)
+        out = np.zeros((N, Nv, self.Nf if n_features_in == 1 else 1), dtype)
+
+        # Group the filters by speed, and separate the integer times.
+        groups = dict()
+        others = []
+        for i, (time, speed) in enumerate(self._parameters):
+            if float(time).is_integer():
+                groups.setdefault(speed, []).append(i)
+            else:
+                others.append(i)
+
+        for speed, filters in groups.items():
+            times = [abs(int(self._parameters[i][0])) for i in filters]
+            if n_features_in == 1:  # Analysis: one recurrence for all times.
+                x = s[:, :, 0]
+                steps = self._recurrence(x, speed, max(times))
+                for step, y in enumerate(steps):
+                    for i, time in zip(filters, times):
+                        if time == step:
+                            out[:, :, i] = y
+            else:  # Synthesis: the recurrence runs on all the features.
+                x = s[:, :, filters].reshape(N, -1)
+                steps = self._recurrence(x, speed, max(times))
+                for step, y in enumerate(steps):
+                    y = y.reshape(N, Nv, len(filters))
+                    for j, time in enumerate(times):
+                        if time == step:
+                            out[:, :, 0] += y[:, :, j]
+
+        if others:
+            c = self._get_cheby_coeff(order)[others]
+            if n_features_in == 1:
+                out[:, :, others] = approximations.cheby_analysis(
+                    self.G, c, s[:, :, 0])
+            else:
+                out[:, :, 0] += approximations.cheby_synthesis(
+                    self.G, c, s[:, :, others])
+
+        return out.squeeze()
+
+    def simulate(self, s, n_steps):
+        r"""Propagate waves and return all the time steps.
+
+        The initial conditions are propagated at each speed by a single
+        recurrence, for a total cost of ``O(n_steps * |E|)`` per signal and
+        speed.
+
+        Parameters
+        ----------
+        s : ndarray
+            Initial conditions :math:`f(0)`, of shape ``(N,)`` or ``(N,
+            N_SIGNALS)``.
+        n_steps : int
+            Number of time steps.
+
+        Returns
+        -------
+        f : ndarray
+            Waves :math:`f(t)` for :math:`t = 0, \dots,` ``n_steps``, of shape
+            ``(n_steps + 1,) + s.shape + (len(speed),)``. The last dimension
+            is dropped if there is a single speed.
+
+        Examples
+        --------
+        >>> G = graphs.Ring(N=20)
+        >>> g = filters.Wave(G, speed=[0.5, 1])
+        >>> s = np.zeros(G.N)
+        >>> s[0] = 1
+        >>> f = g.simulate(s, n_steps=10)
+        >>> f.shape
+        (11, 20, 2)
+        >>> np.allclose(f[5], filters.Wave(G, 5, [0.5, 1]).filter(s))
+        True
+
+        """
+        s = np.asanyarray(s)
+        if s.shape[0] != self.G.N:
+            raise ValueError('First dimension should be the number of nodes '
+                             'G.N = {}, got {}.'.format(self.G.N, s.shape))
+        dtype = np.result_type(self.G.L.dtype, s.dtype, np.float32)
+        out = np.empty((n_steps + 1,) + s.shape + (len(self.speed),), dtype)
+        for i, speed in enumerate(self.speed):
+            steps = self._recurrence(s, speed, n_steps)
+            for step, y in enumerate(steps):
+                out[step, ..., i] = y
+        if len(self.speed) == 1:
+            out = out[..., 0]
+        return out
+
+    def _recurrence(self, x, speed, n_steps):
+        r"""Yield :math:`T_k(M) x` for :math:`k = 0, \dots,` ``n_steps``."""
+        dtype = np.result_type(self.G.L.dtype, x.dtype, np.float32)
+        shape = x.shape
+        x = x.reshape(self.G.N, -1)
+        a = -speed**2 / self.G.lmax / 2
+        previous = x.astype(dtype, copy=True)
+        yield previous.reshape(shape)
+        if n_steps == 0:
+            return
+        # T_1(M) x = M x.
+        current = self.G.L.dot(previous)
+        current *= a
+        current += previous
+        yield current.reshape(shape)
+        for _ in range(n_steps - 1):
+            # T_{k+1}(M) x = 2 M T_k(M) x - T_{k-1}(M) x.
+            following = self.G.L.dot(current)
+            following *= a
+            following += current
+            following *= 2
+            following -= previous
+            previous, current = current, following
+            yield current.reshape(shape)
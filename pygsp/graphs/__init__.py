@@ -77,6 +77,7 @@ Checks
 
     Graph.check_weights
     Graph.is_connected
+    Graph.get_components
     Graph.is_directed
 
 Plotting
@@ -93,9 +94,19 @@ Others
 .. autosummary::
 
     Graph.get_edge_list
+    Graph.get_neighborhood
     Graph.set_coordinates
     Graph.subgraph
     Graph.extract_components
+    Graph.save
+    Graph.load
+
+Caching
+-------
+
+.. autosummary::
+
+    SpectralCache
 
 Graph models
 ============
@@ -171,7 +182,12 @@ _NNGRAPHS = [
     'TwoMoons'
 ]
 
-__all__ = _GRAPHS + _NNGRAPHS
+_CACHES = [
+    'SpectralCache'
+]
+
+__all__ = _GRAPHS + _NNGRAPHS + _CACHES
 
 _utils.import_classes(_GRAPHS, 'graphs', 'graphs')
 _utils.import_classes(_NNGRAPHS, 'graphs.nngraphs', 'graphs')
+_utils.import_classes(_CACHES, 'graphs', 'graphs')
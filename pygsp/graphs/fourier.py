@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 
+import os
+from multiprocessing.pool import ThreadPool
+
 import numpy as np
 from scipy import sparse
 
@@ -11,6 +14,9 @@ logger = utils.build_logger(__name__)
 
 class GraphFourier(object):
 
+    # Opt-in on-disk cache of the spectral data, see SpectralCache.
+    spectral_cache = None
+
     def _check_fourier_properties(self, name, desc):
         if not hasattr(self, '_' + name):
             self.logger.warning('The {} G.{} is not available, we need to '
@@ -24,8 +30,15 @@ class GraphFourier(object):
     def U(self):
         r"""Fourier basis (eigenvectors of the Laplacian).
 
-        Is computed by :meth:`compute_fourier_basis`.
+        Is computed by :meth:`compute_fourier_basis`. If the graph has many
+        connected components, the dense basis is only assembled from the
+        blocks on first access.
         """
+        if not hasattr(self, '_U') and hasattr(self, '_fourier_blocks'):
+            U = np.zeros((self.N, len(self._e)), dtype=self._e.dtype)
+            for nodes, columns, block in self._fourier_blocks:
+                U[np.ix_(nodes, columns)] = block
+            self._U = U
         return self._check_fourier_properties('U', 'Fourier basis')
 
     @property
@@ -89,7 +102,8 @@ class GraphFourier(object):
         return self._check_fourier_properties('coherence',
                                               'Fourier basis coherence')
 
-    def compute_fourier_basis(self, n_eigenvectors=None, recompute=False):
+    def compute_fourier_basis(self, n_eigenvectors=None, recompute=False,
+                              workers=1):
         r"""Compute the (partial) Fourier basis of the graph (cached).
 
         The result is cached and accessible by the :attr:`U`, :attr:`e`,
@@ -102,6 +116,9 @@ class GraphFourier(object):
             are computed. (default: None)
         recompute: bool
             Force to recompute the Fourier basis if already existing.
+        workers : int
+            Number of threads which eigendecompose the blocks of a graph with
+            many connected components. -1 means as many as CPUs.
 
         Notes
         -----
@@ -124,6 +141,14 @@ class GraphFourier(object):
         the same order that the eigenvalues. Finally, the coherence of the
         Fourier basis is found in *G.coherence*.
 
+        If the graph is made of many connected components, its Laplacian is
+        block-diagonal (up to a permutation of the nodes). Each block is then
+        eigendecomposed independently, which costs :math:`\sum_i O(n_i^3)`
+        instead of :math:`O(N^3)`. The eigenvalues are sorted globally, and
+        the eigenvectors are stored as blocks of :math:`\sum_i n_i^2`
+        values, which :meth:`gft`, :meth:`igft`, and exact filtering use
+        directly.
+
         References
         ----------
         See :cite:`chung1997spectral`.
@@ -146,14 +171,38 @@ class GraphFourier(object):
         >>> G.coherence < 1
         True
 
+        A graph with many connected components.
+
+        >>> from scipy import sparse
+        >>> W = sparse.block_diag([graphs.Path(10).W, graphs.Ring(20).W])
+        >>> G = graphs.Graph(W)
+        >>> G.compute_fourier_basis()
+        >>> G.U.shape
+        (30, 30)
+        >>> np.allclose(G.igft(G.gft(np.arange(30.))), np.arange(30.))
+        True
+
         """
         if n_eigenvectors is None:
             n_eigenvectors = self.N
 
-        if (hasattr(self, '_e') and hasattr(self, '_U') and not recompute
+        if (hasattr(self, '_e') and not recompute
+                and (hasattr(self, '_U') or hasattr(self, '_fourier_blocks'))
                 and n_eigenvectors <= len(self.e)):
             return
 
+        # Only the full eigendecomposition is shared through the cache.
+        cache = self.spectral_cache if n_eigenvectors == self.N else None
+        if cache is not None:
+            key = cache.key(self)
+            arrays = cache.get(key)
+            # The coherence is written last: the entry is complete.
+            if 'coherence' in arrays:
+                self._set_fourier_arrays(arrays)
+                self._lmax = self._e[-1]
+                self._coherence = arrays['coherence'].item()
+                return
+
         assert self.L.shape == (self.N, self.N)
         if self.N**2 * n_eigenvectors > 3000**3:
             self.logger.warning(
@@ -164,8 +213,17 @@ class GraphFourier(object):
                     'full' if n_eigenvectors == self.N else 'partial',
                     self.N))
 
+        for name in ['_U', '_fourier_blocks']:
+            if hasattr(self, name):
+                delattr(self, name)
+
+        # The Laplacian (of the symmetrized W) is block-diagonal.
+        labels = self.get_components() if n_eigenvectors == self.N else None
+
         # TODO: handle non-symmetric Laplacians. Test lap_type?
-        if n_eigenvectors == self.N:
+        if labels is not None and labels.max() > 0:
+            self._e, self._fourier_blocks = self._eigh_blocks(labels, workers)
+        elif n_eigenvectors == self.N:
             self._e, self._U = np.linalg.eigh(self.L.toarray())
         else:
             # fast partial eigendecomposition of hermitian matrices
@@ -186,7 +244,144 @@ class GraphFourier(object):
         assert np.max(self._e) == self._e[-1]
         if n_eigenvectors == self.N:
             self._lmax = self._e[-1]
-            self._coherence = np.max(np.abs(self._U))
+            if hasattr(self, '_fourier_blocks'):
+                self._coherence = max(np.max(np.abs(block)) for _, _, block
+                                      in self._fourier_blocks)
+            else:
+                self._coherence = np.max(np.abs(self._U))
+
+        if cache is not None:
+            arrays = self._get_fourier_arrays()
+            arrays['coherence'] = np.array(self._coherence)
+            cache.update(key, arrays)
+
+    def _get_fourier_arrays(self):
+        r"""Return the computed Fourier basis as a dict of arrays.
+
+        The basis of a graph with many connected components is stored as the
+        concatenation of its blocks. See :meth:`_set_fourier_arrays`.
+        """
+        arrays = dict()
+        if hasattr(self, '_e'):
+            arrays['e'] = self._e
+        if hasattr(self, '_fourier_blocks'):
+            nodes, columns, blocks = zip(*self._fourier_blocks)
+            arrays['U_nodes'] = np.concatenate(nodes)
+            arrays['U_columns'] = np.concatenate(columns)
+            arrays['U_sizes'] = np.array([len(n) for n in nodes])
+            arrays['U_blocks'] = np.concatenate([U.ravel() for U in blocks])
+        elif hasattr(self, '_U'):
+            arrays['U'] = self._U
+        return arrays
+
+    def _set_fourier_arrays(self, arrays):
+        r"""Set the Fourier basis from :meth:`_get_fourier_arrays`.
+
+        The blocks are views of the arrays, which can be memory-mapped.
+        """
+        for name in ['_U', '_fourier_blocks']:
+            if hasattr(self, name):
+                delattr(self, name)
+        if 'e' in arrays:
+            self._e = arrays['e']
+        if 'U_blocks' in arrays:
+            self._fourier_blocks = []
+            start, offset = 0, 0
+            for size in arrays['U_sizes']:
+                stop = start + size
+                U = arrays['U_blocks'][offset:offset + size**2]
+                self._fourier_blocks.append((arrays['U_nodes'][start:stop],
+                                             arrays['U_columns'][start:stop],
+                                             U.reshape(size, size)))
+                start, offset = stop, offset + size**2
+        elif 'U' in arrays:
+            self._U = arrays['U']
+
+    def _eigh_blocks(self, labels, workers=1):
+        r"""Eigendecompose the diagonal blocks of the Laplacian.
+
+        Returns the sorted eigenvalues and a list of ``(nodes, columns, U)``,
+        where ``U`` is the Fourier basis of the component made of ``nodes``,
+        and ``columns`` are the indices of its eigenvalues in ``e``.
+        """
+        if workers == -1:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError('The number of workers should be positive or -1, '
+                             'got {}.'.format(workers))
+
+        # Stable to keep the nodes of a component in their original order.
+        order = np.argsort(labels, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(labels))])
+        bounds = list(zip(bounds[:-1], bounds[1:]))
+        L = self.L[order][:, order]
+
+        def eigh(bound):
+            start, stop = bound
+            e, U = np.linalg.eigh(L[start:stop, start:stop].toarray())
+            # Each component has a zero eigenvalue: correct numerical errors,
+            # which grow with the precision, the spectrum, and the size.
+            tol = np.finfo(e.dtype).eps * max(abs(e[-1]), 1) * (stop - start)
+            if abs(e[0]) <= tol:
+                e[0] = 0
+            else:
+                self.logger.warning(
+                    'The smallest eigenvalue of the connected component of '
+                    'node {} is {}, not zero (tolerance {}).'.format(
+                        order[start], e[0], tol))
+            return e, U
+
+        if workers == 1 or len(bounds) == 1:
+            results = list(map(eigh, bounds))
+        else:
+            # NumPy releases the GIL in LAPACK: threads run in parallel.
+            pool = ThreadPool(min(workers, len(bounds)))
+            try:
+                results = pool.map(eigh, bounds)
+            finally:
+                pool.close()
+
+        e = np.concatenate([e for e, _ in results])
+        sort = np.argsort(e, kind='stable')
+        columns = np.empty_like(sort)
+        columns[sort] = np.arange(len(sort))
+
+        blocks = [(order[start:stop], columns[start:stop], U)
+                  for (start, stop), (_, U) in zip(bounds, results)]
+        return e[sort], blocks
+
+    def _gft(self, s, out=None):
+        r"""Compute :math:`U^* s`, blockwise if possible."""
+        blocks = getattr(self, '_fourier_blocks', None)
+        if blocks is None:
+            if np.iscomplexobj(self.U):
+                UH = np.conjugate(self.U.T)  # True Hermitian.
+            else:
+                UH = self.U.T  # U^* = U^T is a view, not a copy.
+            if out is None:
+                return np.tensordot(UH, s, ([1], [0]))
+            return np.dot(UH, s, out=out)
+        if out is None:
+            dtype = np.result_type(self.e.dtype, s.dtype)
+            out = np.empty((len(self.e),) + s.shape[1:], dtype=dtype)
+        for nodes, columns, U in blocks:
+            U = np.conjugate(U) if np.iscomplexobj(U) else U
+            out[columns] = np.tensordot(U, s[nodes], ([0], [0]))
+        return out
+
+    def _igft(self, s_hat, out=None):
+        r"""Compute :math:`U \hat{s}`, blockwise if possible."""
+        blocks = getattr(self, '_fourier_blocks', None)
+        if blocks is None:
+            if out is None:
+                return np.tensordot(self.U, s_hat, ([1], [0]))
+            return np.dot(self.U, s_hat, out=out)
+        if out is None:
+            dtype = np.result_type(self.e.dtype, s_hat.dtype)
+            out = np.empty((self.N,) + s_hat.shape[1:], dtype=dtype)
+        for nodes, columns, U in blocks:
+            out[nodes] = np.tensordot(U, s_hat[columns], ([1], [0]))
+        return out
 
     def gft(self, s):
         r"""Compute the graph Fourier transform.
@@ -222,8 +417,7 @@ class GraphFourier(object):
         if s.shape[0] != self.N:
             raise ValueError('First dimension should be the number of nodes '
                              'G.N = {}, got {}.'.format(self.N, s.shape))
-        U = np.conjugate(self.U)  # True Hermitian. (Although U is often real.)
-        return np.tensordot(U, s, ([0], [0]))
+        return self._gft(s)
 
     def igft(self, s_hat):
         r"""Compute the inverse graph Fourier transform.
@@ -259,4 +453,4 @@ class GraphFourier(object):
         if s_hat.shape[0] != self.N:
             raise ValueError('First dimension should be the number of nodes '
                              'G.N = {}, got {}.'.format(self.N, s_hat.shape))
-        return np.tensordot(self.U, s_hat, ([1], [0]))
+        return self._igft(s_hat)
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 
+import json
+import os
 from collections import Counter
 
 import numpy as np
 from scipy import sparse
+from scipy.sparse import csgraph
 
 from pygsp import utils
 from . import fourier, difference  # prevent circular import in Python < 3.5
@@ -27,6 +30,11 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
         Vertices coordinates (default is None).
     plotting : dict
         Plotting parameters.
+    dtype : data-type
+        Floating point type of the weight matrix and the Laplacian. By default,
+        single precision weights are kept in single precision (which halves the
+        memory and the bandwidth needed to filter), and other weights give a
+        double precision Laplacian.
 
     Attributes
     ----------
@@ -55,21 +63,28 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
     >>> W = np.arange(4).reshape(2, 2)
     >>> G = graphs.Graph(W)
 
+    Single precision is preserved:
+
+    >>> G = graphs.Graph(W, dtype=np.float32)
+    >>> G.W.dtype, G.L.dtype
+    (dtype('float32'), dtype('float32'))
+
     """
 
-    def __init__(self, W, lap_type='combinatorial', coords=None, plotting={}):
+    logger = utils.build_logger(__name__)
 
-        self.logger = utils.build_logger(__name__)
+    def __init__(self, W, lap_type='combinatorial', coords=None, plotting={},
+                 dtype=None):
 
         if len(W.shape) != 2 or W.shape[0] != W.shape[1]:
             raise ValueError('W has incorrect shape {}'.format(W.shape))
 
         # CSR sparse matrices are the most efficient for matrix multiplication.
         # They are the sole sparse matrix type to support eliminate_zeros().
-        if sparse.isspmatrix_csr(W):
+        if sparse.isspmatrix_csr(W) and dtype in [None, W.dtype]:
             self.W = W
         else:
-            self.W = sparse.csr_matrix(W)
+            self.W = sparse.csr_matrix(W, dtype=dtype)
 
         # Don't keep edges of 0 weight. Otherwise Ne will not correspond to the
         # real number of edges. Problematic when e.g. plotting.
@@ -94,6 +109,219 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
 
         self.compute_laplacian(lap_type)
 
+        self._init_attributes(coords, plotting)
+
+    @classmethod
+    def from_csr(cls, W, lap_type='combinatorial', coords=None, plotting={},
+                 symmetric=None, validated=False):
+        r"""Construct a graph from a trusted CSR weight matrix.
+
+        Fast alternative to the constructor for large graphs, or for many
+        small graphs. The weight matrix is used as is, without any copy or
+        conversion. The Laplacian :attr:`L`, the adjacency matrix :attr:`A`,
+        and the degrees :attr:`d` and :attr:`dw` are computed on first access.
+
+        Parameters
+        ----------
+        W : sparse matrix
+            The weight matrix, in CSR format.
+        lap_type : 'combinatorial', 'normalized'
+            The type of Laplacian to be computed by :func:`compute_laplacian`.
+        coords : ndarray
+            Vertices coordinates (default is None).
+        plotting : dict
+            Plotting parameters.
+        symmetric : bool or None
+            Whether the weight matrix is known to be symmetric, i.e., the graph
+            to be undirected. If None (the default), it is checked in a single
+            pass over the edges.
+        validated : bool
+            Whether the weight matrix is known to be valid, i.e., to have
+            finite weights, a zero diagonal, and no explicitly stored zeros.
+            If False (the default), the zeros are eliminated and the weights
+            are checked by :meth:`check_weights`.
+
+        Returns
+        -------
+        graph : :class:`Graph`
+            The constructed graph.
+
+        Examples
+        --------
+        >>> from scipy import sparse
+        >>> W = sparse.csr_matrix([[0, 2, 0], [2, 0, 1], [0, 1, 0]])
+        >>> G = graphs.Graph.from_csr(W, symmetric=True, validated=True)
+        >>> G.W is W
+        True
+        >>> G.L.toarray()
+        array([[ 2., -2.,  0.],
+               [-2.,  3., -1.],
+               [ 0., -1.,  1.]])
+
+        """
+        if not sparse.isspmatrix_csr(W):
+            raise TypeError('W should be a CSR sparse matrix, '
+                            'got {}.'.format(type(W)))
+        if len(W.shape) != 2 or W.shape[0] != W.shape[1]:
+            raise ValueError('W has incorrect shape {}'.format(W.shape))
+        if lap_type not in ['combinatorial', 'normalized']:
+            raise ValueError('Unknown Laplacian type {}'.format(lap_type))
+
+        graph = cls.__new__(cls)
+        graph.W = W
+        graph.n_vertices = W.shape[0]
+        graph.lap_type = lap_type
+
+        if not validated:
+            graph.W.eliminate_zeros()
+        if symmetric is not None:
+            graph._directed = not symmetric
+
+        if graph.is_directed():
+            graph.n_edges = graph.W.nnz
+        else:
+            diagonal = np.count_nonzero(graph.W.diagonal())
+            off_diagonal = graph.W.nnz - diagonal
+            graph.n_edges = off_diagonal // 2 + diagonal
+
+        if not validated:
+            graph.check_weights()
+
+        # The Laplacian is computed by the L property on first access.
+        graph._init_attributes(coords, plotting)
+        return graph
+
+    def save(self, path):
+        r"""Save the graph and its computed operators to a directory.
+
+        The weight matrix :attr:`W`, the Laplacian type, the coordinates, the
+        plotting parameters, and the operators computed so far (the Fourier basis :attr:`U` and
+        :attr:`e`, :attr:`lmax`, and the differential operator :attr:`D`) are
+        saved as raw NumPy arrays (``.npy`` files), which can be memory-mapped
+        by :meth:`load`. The scalars are saved in ``graph.json``.
+
+        Parameters
+        ----------
+        path : str
+            Directory, created if it does not exist.
+
+        See also
+        --------
+        load : load a saved graph
+
+        Examples
+        --------
+        >>> import tempfile
+        >>> G = graphs.Logo()
+        >>> G.compute_fourier_basis()
+        >>> path = tempfile.mkdtemp()
+        >>> G.save(path)
+        >>> G2 = graphs.Graph.load(path)
+        >>> np.all(G2.U == G.U), G2.lmax == G.lmax
+        (True, True)
+
+        """
+        arrays = dict(W_data=self.W.data, W_indices=self.W.indices,
+                      W_indptr=self.W.indptr)
+        meta = dict(n_vertices=self.n_vertices, lap_type=self.lap_type,
+                    directed=bool(self.is_directed()))
+
+        arrays.update(self._get_fourier_arrays())
+        if hasattr(self, '_lmax'):
+            meta['lmax'] = float(self._lmax)
+        if hasattr(self, '_coherence'):
+            meta['coherence'] = float(self._coherence)
+        if hasattr(self, '_D'):
+            D = sparse.csc_matrix(self._D)
+            arrays.update(D_data=D.data, D_indices=D.indices,
+                          D_indptr=D.indptr)
+            meta['D_shape'] = list(D.shape)
+        if hasattr(self, 'coords'):
+            arrays['coords'] = np.asanyarray(self.coords)
+        meta['plotting'] = dict()
+        for key, value in self.plotting.items():
+            if isinstance(value, np.ndarray):
+                arrays['plotting_' + key] = value
+                continue
+            try:
+                json.dumps(value)
+            except TypeError:
+                continue  # Not serializable, e.g., a colormap.
+            meta['plotting'][key] = value
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, name + '.npy'),
+                    np.ascontiguousarray(array))
+        # Written last, such that only complete saves can be loaded.
+        meta['arrays'] = sorted(arrays.keys())
+        with open(os.path.join(path, 'graph.json'), 'w') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        r"""Load a graph saved by :meth:`save`.
+
+        By default, the arrays are memory-mapped: loading is instantaneous,
+        the data is only read from disk when accessed, and processes which
+        load the same graph share the memory through the OS page cache.
+
+        Parameters
+        ----------
+        path : str
+            Directory where the graph was saved.
+        mmap_mode : {None, 'r', 'r+', 'c'}
+            Memory-map the arrays with the given mode, see :func:`numpy.load`.
+            If None, the arrays are read in memory. The default (read-only)
+            prevents to accidentally modify the saved arrays.
+
+        Returns
+        -------
+        graph : :class:`Graph`
+            The loaded graph. It is a plain :class:`Graph`, even if a subclass
+            was saved, as the parameters of the subclasses are not saved.
+
+        See also
+        --------
+        save : save a graph
+
+        """
+        with open(os.path.join(path, 'graph.json')) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, name + '.npy'),
+                                mmap_mode=mmap_mode)
+                  for name in meta['arrays']}
+
+        N = meta['n_vertices']
+        W = sparse.csr_matrix((arrays['W_data'], arrays['W_indices'],
+                               arrays['W_indptr']), shape=(N, N), copy=False)
+        plotting = meta.get('plotting', dict())
+        for name in meta['arrays']:
+            if name.startswith('plotting_'):
+                plotting[name[len('plotting_'):]] = np.array(arrays[name])
+        graph = Graph.from_csr(W, lap_type=meta['lap_type'],
+                               coords=arrays.get('coords'), plotting=plotting,
+                               symmetric=not meta['directed'], validated=True)
+
+        graph._set_fourier_arrays(arrays)
+        if 'lmax' in meta:
+            graph._lmax = meta['lmax']
+        if 'coherence' in meta:
+            graph._coherence = meta['coherence']
+        if 'D_shape' in meta:
+            graph._D = sparse.csc_matrix((arrays['D_data'],
+                                          arrays['D_indices'],
+                                          arrays['D_indptr']),
+                                         shape=meta['D_shape'], copy=False)
+        return graph
+
+    def _init_attributes(self, coords, plotting):
+
+        # Cache of get_neighborhood(), for the current weights.
+        self._neighborhood = None
+        self._visited = None
+
         if coords is not None:
             self.coords = coords
 
@@ -301,16 +529,135 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
         sub_W = self.W.tocsr()[ind, :].tocsc()[:, ind]
         return Graph(sub_W)
 
+    def get_neighborhood(self, nodes, hops=1):
+        r"""Return the nodes within a number of hops of given nodes (cached).
+
+        The neighborhood is found by a breadth-first search, whose cost only
+        depends on the number of edges of the visited nodes, not on the size
+        of the graph. Edges are followed in both directions. The result of the
+        last query is cached, such that repeated queries are free.
+
+        Parameters
+        ----------
+        nodes : int or array_like
+            Indices of the nodes.
+        hops : int
+            Number of hops. A filter which is a polynomial of degree
+            :math:`K` of the Laplacian (e.g., a Chebyshev approximation) is
+            exactly localized in :math:`K` hops.
+
+        Returns
+        -------
+        neighborhood : ndarray
+            Sorted indices of the nodes at most ``hops`` hops away from any of
+            the ``nodes`` (themselves included). Read-only.
+
+        Examples
+        --------
+        >>> G = graphs.Path(10)
+        >>> G.get_neighborhood(2, hops=1)
+        array([1, 2, 3])
+        >>> G.get_neighborhood([0, 9], hops=2)
+        array([0, 1, 2, 7, 8, 9])
+
+        """
+        nodes = np.unique(np.asanyarray(nodes, dtype=int).ravel())
+        if hops < 0:
+            raise ValueError('The number of hops should be non-negative, '
+                             'got {}.'.format(hops))
+        key = (nodes.tobytes(), hops)
+        cache = getattr(self, '_neighborhood', None)
+        if cache is not None and cache[0] == key:
+            return cache[1]
+
+        # Allocated once, then only reset at the visited nodes, such that a
+        # query does not cost O(N).
+        visited = getattr(self, '_visited', None)
+        if visited is None or visited.size != self.n_vertices:
+            visited = self._visited = np.zeros(self.n_vertices, dtype=bool)
+        levels = [nodes]
+        try:
+            visited[nodes] = True
+            for _ in range(hops):
+                # The Laplacian connects the nodes in both directions.
+                neighbors = np.unique(self.L[levels[-1]].indices)
+                neighbors = neighbors[~visited[neighbors]]
+                if neighbors.size == 0:
+                    break
+                visited[neighbors] = True
+                levels.append(neighbors)
+        finally:
+            for level in levels:
+                visited[level] = False
+        neighborhood = np.sort(np.concatenate(levels))
+        neighborhood.flags.writeable = False
+
+        self._neighborhood = (key, neighborhood)
+        return neighborhood
+
+    def get_components(self, connection='weak', recompute=False):
+        r"""Label the connected components of the graph (cached).
+
+        The components are found by :func:`scipy.sparse.csgraph.\
+connected_components`, which works on the CSR arrays of the weight matrix.
+        The strong and weak components of an undirected graph are the same.
+
+        Parameters
+        ----------
+        connection : {'weak', 'strong'}
+            For directed graphs, whether two nodes are in the same component
+            if they are connected by a path which ignores the direction of
+            the edges (weak), or by a path in each direction (strong).
+        recompute : bool
+            Force to recompute the components if already known.
+
+        Returns
+        -------
+        labels : ndarray
+            Component of each node, from 0 to the number of components minus
+            one. The components are numbered by order of their first node.
+            Read-only.
+
+        Examples
+        --------
+        >>> W = np.array([[0, 1, 0, 0], [1, 0, 0, 0],
+        ...               [0, 0, 0, 1], [0, 0, 0, 0]])
+        >>> G = graphs.Graph(W)
+        >>> G.get_components()
+        array([0, 0, 1, 1])
+        >>> G.get_components('strong')
+        array([0, 0, 1, 2])
+
+        """
+        if connection not in ['weak', 'strong']:
+            raise ValueError('Unknown connection {}'.format(connection))
+        if recompute or not hasattr(self, '_components'):
+            self._components = dict()
+        if not self.is_directed(recompute=recompute):
+            connection = 'weak'  # Faster and equivalent.
+        if connection in self._components:
+            return self._components[connection]
+
+        _, labels = csgraph.connected_components(
+            self.W, directed=self.is_directed(), connection=connection)
+        # Number the components by order of their first node.
+        _, first, labels = np.unique(labels, return_index=True,
+                                     return_inverse=True)
+        rank = np.empty_like(first)
+        rank[np.argsort(first)] = np.arange(len(first))
+        labels = rank[labels]
+        labels.flags.writeable = False
+
+        self._components[connection] = labels
+        return labels
+
     def is_connected(self, recompute=False):
         r"""Check the strong connectivity of the graph (cached).
 
-        It uses DFS travelling on graph to ensure that each node is visited.
-        For undirected graphs, starting at any vertex and trying to access all
-        others is enough.
-        For directed graphs, one needs to check that a random vertex is
-        accessible by all others
-        and can access all others. Thus, we can transpose the adjacency matrix
-        and compute again with the same starting point in both phases.
+        A graph is connected if it has a single (strongly connected)
+        component, as found by :meth:`get_components`. For directed graphs,
+        every node must be reachable from every other node by following the
+        edges in their direction.
 
         Parameters
         ----------
@@ -333,31 +680,8 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
         if hasattr(self, '_connected') and not recompute:
             return self._connected
 
-        if self.is_directed(recompute=recompute):
-            adj_matrices = [self.A, self.A.T]
-        else:
-            adj_matrices = [self.A]
-
-        for adj_matrix in adj_matrices:
-            visited = np.zeros(self.A.shape[0], dtype=bool)
-            stack = set([0])
-
-            while len(stack):
-                v = stack.pop()
-                if not visited[v]:
-                    visited[v] = True
-
-                    # Add indices of nodes not visited yet and accessible from
-                    # v
-                    stack.update(set([idx
-                                      for idx in adj_matrix[v, :].nonzero()[1]
-                                      if not visited[idx]]))
-
-            if not visited.all():
-                self._connected = False
-                return self._connected
-
-        self._connected = True
+        labels = self.get_components('strong', recompute=recompute)
+        self._connected = bool(np.all(labels == 0))
         return self._connected
 
     def is_directed(self, recompute=False):
@@ -409,22 +733,29 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
         if hasattr(self, '_directed') and not recompute:
             return self._directed
 
-        self._directed = np.abs(self.W - self.W.T).sum() != 0
+        self._directed = not _is_symmetric(self.W)
         return self._directed
 
-    def extract_components(self):
+    def extract_components(self, connection='weak'):
         r"""Split the graph into connected components.
 
-        See :func:`is_connected` for the method used to determine
-        connectedness.
+        See :meth:`get_components` for the method used to determine the
+        components. All the component subgraphs are extracted from a single
+        permutation of the weight matrix which groups the nodes by component.
+
+        Parameters
+        ----------
+        connection : {'weak', 'strong'}
+            For directed graphs, whether to split in weakly or strongly
+            connected components. The edges between strongly connected
+            components are discarded.
 
         Returns
         -------
         graphs : list
             A list of graph structures. Each having its own node list and
-            weight matrix. If the graph is directed, add into the info
-            parameter the information about the source nodes and the sink
-            nodes.
+            weight matrix. The indices of the nodes in the original graph
+            are stored in ``info['orig_idx']``.
 
         Examples
         --------
@@ -433,43 +764,24 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
         >>> W = utils.symmetrize(W)
         >>> G = graphs.Graph(W=W)
         >>> components = G.extract_components()
-        >>> has_sinks = 'sink' in components[0].info
-        >>> sinks_0 = components[0].info['sink'] if has_sinks else []
+        >>> orig_idx = components[0].info['orig_idx']
 
         """
-        if self.A.shape[0] != self.A.shape[1]:
-            self.logger.error('Inconsistent shape to extract components. '
-                              'Square matrix required.')
-            return None
+        labels = self.get_components(connection)
 
-        if self.is_directed():
-            raise NotImplementedError('Directed graphs not supported yet.')
+        # Stable to keep the nodes of a component in their original order.
+        order = np.argsort(labels, kind='stable')
+        W = self.W[order][:, order]
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(labels))])
 
+        symmetric = None if self.is_directed() else True
         graphs = []
-
-        visited = np.zeros(self.A.shape[0], dtype=bool)
-        # indices = [] # Assigned but never used
-
-        while not visited.all():
-            stack = set(np.nonzero(~visited)[0])
-            comp = []
-
-            while len(stack):
-                v = stack.pop()
-                if not visited[v]:
-                    comp.append(v)
-                    visited[v] = True
-
-                    # Add indices of nodes not visited yet and accessible from
-                    # v
-                    stack.update(set([idx for idx in self.A[v, :].nonzero()[1]
-                                      if not visited[idx]]))
-
-            comp = sorted(comp)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
             self.logger.info(('Constructing subgraph for component of '
-                              'size {}.').format(len(comp)))
-            G = self.subgraph(comp)
-            G.info = {'orig_idx': comp}
+                              'size {}.').format(stop - start))
+            G = Graph.from_csr(W[start:stop, start:stop],
+                               symmetric=symmetric, validated=True)
+            G.info = {'orig_idx': order[start:stop]}
             graphs.append(G)
 
         return graphs
@@ -570,20 +882,24 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
 
         self.lap_type = lap_type
 
+        # Keep single precision. Compute in double precision otherwise.
+        dtype = np.float32 if self.W.dtype == np.float32 else np.float64
+
         if not self.is_directed():
             W = self.W
         else:
             W = utils.symmetrize(self.W, method='average')
 
         if lap_type == 'combinatorial':
-            D = sparse.diags(self.dw)
-            self.L = D - W
+            D = sparse.diags(self.dw.astype(dtype))
+            self.L = sparse.csr_matrix(D - W, dtype=dtype)
         elif lap_type == 'normalized':
-            d = np.zeros(self.n_vertices)
+            d = np.zeros(self.n_vertices, dtype=dtype)
             disconnected = (self.dw == 0)
             np.power(self.dw, -0.5, where=~disconnected, out=d)
             D = sparse.diags(d)
-            self.L = sparse.identity(self.n_vertices) - D * W * D
+            identity = sparse.identity(self.n_vertices, dtype=dtype)
+            self.L = sparse.csr_matrix(identity - D * W * D, dtype=dtype)
             self.L[disconnected, disconnected] = 0
             self.L.eliminate_zeros()
         else:
@@ -645,6 +961,19 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
         """
         return x.T.dot(self.L.dot(x))
 
+    @property
+    def L(self):
+        r"""Graph Laplacian, computed by :meth:`compute_laplacian`."""
+        if not hasattr(self, '_L'):
+            self.compute_laplacian(self.lap_type)
+        return self._L
+
+    @L.setter
+    def L(self, L):
+        self._L = L
+        # Computed from the Laplacian.
+        self._neighborhood = None
+
     @property
     def A(self):
         r"""Graph adjacency matrix (the binary version of W).
@@ -749,6 +1078,9 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
         A faster but less tight alternative is to use known algebraic bounds on
         the graph Laplacian.
 
+        The Lanczos estimate is shared through the
+        :class:`~pygsp.graphs.SpectralCache` if :attr:`spectral_cache` is set.
+
         Examples
         --------
         >>> G = graphs.Logo()
@@ -766,20 +1098,31 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
         if hasattr(self, '_lmax') and not recompute:
             return
 
+        cache = self.spectral_cache if method == 'lanczos' else None
+        if cache is not None:
+            key = cache.key(self)
+            arrays = cache.get(key)
+            if 'lmax_lanczos' in arrays:
+                self._lmax = arrays['lmax_lanczos'].item()
+                return
+
         if method == 'lanczos':
             try:
-                # We need to cast the matrix L to a supported type.
-                # TODO: not good for memory. Cast earlier?
-                lmax = sparse.linalg.eigsh(self.L.asfptype(), k=1, tol=5e-3,
+                # L is float32 or float64, both supported by ARPACK.
+                lmax = sparse.linalg.eigsh(self.L, k=1, tol=5e-3,
                                            ncv=min(self.N, 10),
                                            return_eigenvectors=False)
-                lmax = lmax[0]
-                assert lmax <= self._get_upper_bound() + 1e-12
+                lmax = float(lmax[0])
+                # Single precision eigensolvers can overshoot the bound.
+                eps = np.finfo(self.L.dtype).eps
+                assert lmax <= self._get_upper_bound() * (1 + 10*eps) + 1e-12
                 lmax *= 1.01  # Increase by 1% to be robust to errors.
                 self._lmax = lmax
             except sparse.linalg.ArpackNoConvergence:
                 raise ValueError('The Lanczos method did not converge. '
                                  'Try to use bounds.')
+            if cache is not None:
+                cache.update(key, dict(lmax_lanczos=np.array(self._lmax)))
 
         elif method == 'bounds':
             self._lmax = self._get_upper_bound()
@@ -947,6 +1290,20 @@ class Graph(fourier.GraphFourier, difference.GraphDifference):
         return pos
 
 
+def _is_symmetric(W):
+    # Compare the CSR arrays of W and W.T in a single pass over the edges,
+    # without allocating the difference W - W.T.
+    W = W.tocsr()
+    if not W.has_canonical_format:
+        W = W.copy()
+        W.sum_duplicates()
+    WT = W.T.tocsr()
+    WT.sum_duplicates()
+    return (np.array_equal(W.indptr, WT.indptr)
+            and np.array_equal(W.indices, WT.indices)
+            and np.array_equal(W.data, WT.data))
+
+
 def _sparse_fruchterman_reingold(A, dim, k, pos, fixed, iterations, seed):
     # Position nodes in adjacency matrix A using Fruchterman-Reingold
     nnodes = A.shape[0]
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from scipy import sparse
+
+from pygsp import utils
+
+
+_logger = utils.build_logger(__name__)
+
+
+class SpectralCache(object):
+    r"""On-disk cache of spectral data, shared across graphs and processes.
+
+    The data derived from the Laplacian of a graph (its eigendecomposition
+    and the estimation of its largest eigenvalue) is stored in a directory,
+    under a hash of the weight matrix and the type of Laplacian. Graphs with
+    the same weights then share the data, whether they are constructed in
+    the same process or not. The least recently used entries are evicted
+    once the cache grows beyond ``max_size``.
+
+    The cache is opt-in: it is enabled by setting the
+    :attr:`~pygsp.graphs.Graph.spectral_cache` attribute of a graph, or of
+    the :class:`~pygsp.graphs.Graph` class to enable it for all graphs. It is
+    then consulted by :meth:`~pygsp.graphs.Graph.compute_fourier_basis` and
+    :meth:`~pygsp.graphs.Graph.estimate_lmax`. The cached arrays are
+    memory-mapped in read-only mode.
+
+    Parameters
+    ----------
+    path : str
+        Directory where the data is stored, created if it does not exist.
+    max_size : int or None
+        Maximum size of the cache in bytes. None for no limit. Default is
+        1 GiB.
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> cache = graphs.SpectralCache(tempfile.mkdtemp())
+    >>> G1 = graphs.Sensor(seed=42)
+    >>> G1.spectral_cache = cache
+    >>> G1.compute_fourier_basis()  # Computed and stored.
+    >>> G2 = graphs.Sensor(seed=42)
+    >>> G2.spectral_cache = cache
+    >>> G2.compute_fourier_basis()  # Loaded.
+    >>> np.all(G1.U == G2.U)
+    True
+    >>> cache.clear()
+
+    Enable the cache for all graphs (the default is None):
+
+    >>> graphs.Graph.spectral_cache = cache
+    >>> graphs.Graph.spectral_cache = None
+
+    """
+
+    def __init__(self, path, max_size=2**30):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.max_size = max_size
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+    def __repr__(self):
+        return '{}(path={}, max_size={})'.format(
+            self.__class__.__name__, self.path, self.max_size)
+
+    def key(self, G):
+        r"""Return the content hash of a graph's Laplacian.
+
+        The hash is computed from the weight matrix (its shape, dtype, and
+        canonical CSR arrays) and the type of Laplacian.
+        """
+        W = sparse.csr_matrix(G.W)
+        if not W.has_canonical_format:
+            W = W.copy()
+            W.sum_duplicates()
+        h = hashlib.sha1()
+        h.update('{}:{}:{}'.format(G.lap_type, W.shape,
+                                   W.dtype.str).encode('ascii'))
+        # Independent of the dtype of the indices.
+        h.update(np.ascontiguousarray(W.indptr, dtype=np.int64).tobytes())
+        h.update(np.ascontiguousarray(W.indices, dtype=np.int64).tobytes())
+        h.update(np.ascontiguousarray(W.data).tobytes())
+        return h.hexdigest()
+
+    def get(self, key):
+        r"""Return the arrays stored under a key (an empty dict if none)."""
+        directory = os.path.join(self.path, key)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return dict()
+        arrays = dict()
+        for name in names:
+            if name.endswith('.npy'):
+                filename = os.path.join(directory, name)
+                try:
+                    arrays[name[:-4]] = np.load(filename, mmap_mode='r')
+                except (OSError, ValueError):  # Evicted or being written.
+                    continue
+        if arrays:
+            # Mark as recently used.
+            os.utime(directory, None)
+        return arrays
+
+    def update(self, key, arrays):
+        r"""Store arrays under a key, then evict the least recently used."""
+        directory = os.path.join(self.path, key)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        for name, array in arrays.items():
+            # Write then rename, such that readers never see a partial file.
+            fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=directory)
+            with os.fdopen(fd, 'wb') as f:
+                # Not np.ascontiguousarray, which makes scalars 1-d.
+                np.save(f, np.require(array, requirements='C'))
+            os.replace(tmp, os.path.join(directory, name + '.npy'))
+        os.utime(directory, None)
+        self.evict()
+
+    def evict(self):
+        r"""Remove the least recently used entries beyond the size limit."""
+        if self.max_size is None:
+            return
+        entries = []
+        for key in os.listdir(self.path):
+            directory = os.path.join(self.path, key)
+            try:
+                size = sum(os.path.getsize(os.path.join(directory, name))
+                           for name in os.listdir(directory))
+                entries.append((os.path.getmtime(directory), size, directory))
+            except OSError:  # Removed by another process.
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, directory in sorted(entries):
+            if total <= self.max_size:
+                break
+            _logger.info('Evicting {} from the spectral cache.'.format(
+                os.path.basename(directory)))
+            # Memory-mapped files remain valid until they are closed.
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        r"""Remove all the entries."""
+        for key in os.listdir(self.path):
+            shutil.rmtree(os.path.join(self.path, key), ignore_errors=True)
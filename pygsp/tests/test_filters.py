@@ -5,12 +5,16 @@ Test suite for the filters module of the pygsp package.
 
 """
 
-import unittest
+import os
+import shutil
 import sys
+import tempfile
+import unittest
 
 import numpy as np
 
-from pygsp import graphs, filters
+from pygsp import graphs, filters, features
+from pygsp.filters import approximations
 
 
 class TestCase(unittest.TestCase):
@@ -129,6 +133,33 @@ class TestCase(unittest.TestCase):
         F = g.compute_frame(method='exact')
         np.testing.assert_allclose(F, gL)
 
+    def test_filter_exact(self, n_signals=7):
+        G = self._G
+        g = filters.MexicanHat(G, Nf=4)
+        s = self._rs.uniform(size=(G.N, n_signals))
+        # Reference: g(L) = U g(Lambda) U^T.
+        y = np.stack([G.U.dot(np.diag(r).dot(G.U.T.dot(s)))
+                      for r in g.evaluate(G.e)], axis=-1)
+        np.testing.assert_allclose(g.filter(s, method='exact'), y)
+        # By blocks of 3 signals.
+        column = (G.N + 4*G.N + 4*G.N) * 8
+        y2 = g.filter(s, method='exact', max_memory=3*column)
+        np.testing.assert_allclose(y2, y)
+        z = sum(G.U.dot(np.diag(r).dot(G.U.T.dot(y[..., i])))
+                for i, r in enumerate(g.evaluate(G.e)))
+        np.testing.assert_allclose(g.synthesize(y, method='exact'), z)
+        np.testing.assert_allclose(g.synthesize(y, method='exact',
+                                                max_memory=2*column), z)
+        # The frequency response is cached, until the basis changes.
+        response = g._get_response()
+        self.assertIs(g._get_response(), response)
+        graph = graphs.Sensor(50, seed=42)
+        g = filters.Heat(graph)
+        graph.compute_fourier_basis()
+        response = g._get_response()
+        graph.compute_fourier_basis(recompute=True)
+        self.assertIsNot(g._get_response(), response)
+
     def test_frame_bounds(self):
         # Not a frame, it as a null-space.
         g = filters.Rectangular(self._G)
@@ -198,6 +229,24 @@ class TestCase(unittest.TestCase):
         self.assertIs(f._kernels[0], kernel)
         self._test_methods(f, tight=False)
 
+    def test_vectorized_kernels(self):
+        x = np.linspace(-1, 1.2 * self._G.lmax, 200).reshape(10, 20)
+        for f in [filters.Heat(self._G, scale=[1, 5], normalize=True),
+                  filters.MexicanHat(self._G, Nf=5, normalize=True),
+                  filters.Abspline(self._G, Nf=5),
+                  filters.Meyer(self._G, Nf=5),
+                  filters.Itersine(self._G, Nf=5, overlap=3),
+                  filters.HalfCosine(self._G, Nf=5),
+                  filters.SimpleTight(self._G, Nf=5)]:
+            # A single broadcast gives the kernels evaluated one by one.
+            y = f.evaluate(x)
+            self.assertEqual(y.shape, (len(f),) + x.shape)
+            for i in range(len(f)):
+                np.testing.assert_allclose(y[i], f._kernels[i](x))
+                np.testing.assert_allclose(f[i].evaluate(x)[0], y[i])
+            np.testing.assert_allclose(f.evaluate(0.5),
+                                       f.evaluate([0.5])[:, 0])
+
     def test_abspline(self):
         f = filters.Abspline(self._G, Nf=4)
         self._test_methods(f, tight=False)
@@ -210,6 +259,21 @@ class TestCase(unittest.TestCase):
         f = filters.Regular(self._G)
         self.assertRaises(ValueError, filters.Gabor, self._G, f)
 
+    def test_gabor_centers(self):
+        g = filters.Filter(self._G, lambda x: np.exp(-(4 * x / 13)**2))
+        f = filters.Gabor(self._G, g)
+        y = np.array([g.evaluate(self._G.e - c)[0] for c in self._G.e])
+        np.testing.assert_allclose(f.evaluate(self._G.e), y)
+        s1 = f.filter(self._signal)
+        # Subset of centers, with a polynomial approximation.
+        centers = self._G.e[::10]
+        f = filters.Gabor(self._G, g, centers=centers)
+        self.assertEqual(f.n_filters, len(centers))
+        np.testing.assert_allclose(f.evaluate(self._G.e), y[::10])
+        s2 = f.filter(self._signal, method='chebyshev', order=100)
+        np.testing.assert_allclose(s2, s1[:, ::10], atol=1e-8)
+        self.assertRaises(ValueError, filters.Gabor, self._G, g, [[0, 1]])
+
     def test_modulation(self):
         f = filters.Rectangular(self._G, None, 0.1)
         # TODO: synthesis doesn't work yet.
@@ -221,6 +285,28 @@ class TestCase(unittest.TestCase):
         f = filters.Regular(self._G)
         self.assertRaises(ValueError, filters.Modulation, self._G, f)
 
+    def test_modulation_localization(self):
+        """Batched localization against the definition, atom by atom."""
+        g = filters.Heat(self._G, 10)
+        f = filters.Modulation(self._G, g)
+        N = self._G.N
+        y = np.empty((N, N))
+        for i in range(N):
+            x = self._signal * g.localize(i, method='exact')
+            y[i] = np.sqrt(N) * self._G.gft(x)
+        np.testing.assert_allclose(f.filter(self._signal), y, atol=1e-10)
+        s = np.stack([self._signal, 2 * self._signal], axis=1)
+        z = f.filter(s, method='chebyshev', order=50)
+        self.assertEqual(z.shape, (N, 2, N))
+        np.testing.assert_allclose(z[:, 1], 2 * y, atol=1e-6)
+        # Eigenvalues are looked up, other frequencies are undefined.
+        x = np.array([[self._G.e[3], -1], [self._G.e[5], self._G.e[0]]])
+        y = f.evaluate(x)
+        self.assertEqual(y.shape, (N, 2, 2))
+        np.testing.assert_allclose(y[:, 0, 0], f._coefficients[3])
+        np.testing.assert_equal(np.isnan(y[:, 0, 1]), True)
+        np.testing.assert_equal(np.isnan(y[:, 1]), False)
+
     def test_modulation_gabor(self):
         """Both should be equivalent for deltas centered at the eigenvalues."""
         f = filters.Rectangular(self._G, 0, 0)
@@ -310,6 +396,35 @@ class TestCase(unittest.TestCase):
         # Invalid speed.
         self.assertRaises(ValueError, filters.Wave, self._G, speed=2)
 
+    def test_wave_recurrence(self):
+        """The recurrence is exact for integer times."""
+        f = filters.Wave(self._G, time=[0, 1, 5, 12, 3.5, 7],
+                         speed=[1, 1, 1.5, 0.5, 1, 1.5])
+        s = self._rs.normal(size=(self._G.N, 3))
+        np.testing.assert_allclose(f.filter(s), f.filter(s, method='exact'),
+                                   atol=1e-10)
+        s = self._rs.normal(size=(self._G.N, 3, f.Nf))
+        np.testing.assert_allclose(f.filter(s), f.filter(s, method='exact'),
+                                   atol=1e-10)
+        # Parameters of Filter.filter are honored, still exactly.
+        f = filters.Wave(self._G, time=[0, 5, 40], speed=[1, 1.5, 0.5])
+        s = self._rs.normal(size=(self._G.N, 3))
+        y = f.filter(s, nodes=[0, 5])
+        self.assertEqual(y.shape, (2, 3, 3))
+        np.testing.assert_allclose(y, f.filter(s, method='exact')[[0, 5]],
+                                   atol=1e-8)
+        # All time steps at once.
+        f = filters.Wave(self._G, speed=[0.3, 1])
+        y = f.simulate(self._signal, n_steps=20)
+        self.assertEqual(y.shape, (21, self._G.N, 2))
+        for t in [0, 1, 12, 20]:
+            g = filters.Wave(self._G, time=t, speed=[0.3, 1])
+            np.testing.assert_allclose(y[t], g.filter(self._signal,
+                                                      method='exact'),
+                                       atol=1e-10)
+        y = filters.Wave(self._G, speed=1).simulate(self._signal, 0)
+        self.assertEqual(y.shape, (1, self._G.N))
+
     def test_expwin(self):
         f = filters.Expwin(self._G)
         self._test_methods(f, tight=False)
@@ -334,6 +449,343 @@ class TestCase(unittest.TestCase):
         f = filters.Rectangular(self._G, band_min=None, band_max=None)
         self._test_methods(f, tight=True, check=True)
 
+    def test_cheby_coeff(self, order=20):
+        """Vectorized coefficients are the quadrature, and are cached."""
+        g = filters.MexicanHat(self._G, Nf=4)
+        for N in [order + 1, order - 5, 3 * order]:
+            c = filters.compute_cheby_coeff(g, m=order, N=N)
+            self.assertEqual(c.shape, (4, order + 1))
+            a = self._G.lmax / 2
+            n = np.arange(N)
+            x = np.cos(np.pi * (n + 0.5) / N)
+            for i in range(4):
+                y = g._kernels[i](a * x + a)
+                for o in range(order + 1):
+                    cos = np.cos(np.pi * o * (n + 0.5) / N)
+                    np.testing.assert_allclose(c[i, o], 2. / N * y.dot(cos),
+                                               atol=1e-12)
+            np.testing.assert_allclose(
+                filters.compute_cheby_coeff(g, m=order, N=N, i=2), c[2])
+        # Cached per order.
+        c1 = g._get_cheby_coeff(order)
+        self.assertIs(g._get_cheby_coeff(order), c1)
+        self.assertIsNot(g._get_cheby_coeff(order + 1), c1)
+        self.assertFalse(c1.flags.writeable)
+        # Invalidated when lmax changes.
+        G = graphs.Sensor(30, seed=42)
+        G.estimate_lmax()
+        g = filters.Heat(G)
+        c1 = g._get_cheby_coeff(order)
+        G.estimate_lmax(method='bounds', recompute=True)
+        c2 = g._get_cheby_coeff(order)
+        self.assertIsNot(c1, c2)
+        self.assertEqual(len(g._cheby_coeff), 1)
+
+    def test_cheby_analysis(self, n_signals=3):
+        """Chebyshev filtering is exact for polynomial kernels."""
+        G = self._G
+        g = filters.Filter(G, [lambda x: x**2, lambda x: 1 + x])
+        c = filters.compute_cheby_coeff(g, m=5)
+        s = self._rs.uniform(size=(G.N, n_signals))
+        r1 = np.stack([G.L.dot(G.L.dot(s)), s + G.L.dot(s)], axis=-1)
+        r2 = filters.cheby_analysis(G, c, s)
+        np.testing.assert_allclose(r2, r1)
+        out = np.empty_like(r1)
+        r2 = filters.cheby_analysis(G, c, s, out=out)
+        self.assertTrue(np.shares_memory(r2, out))
+        np.testing.assert_allclose(out, r1)
+        self.assertRaises(ValueError, filters.cheby_analysis, G, c, s,
+                          out=np.empty((G.N, 2, n_signals)))
+        # 1D signal and single filter.
+        r2 = filters.cheby_analysis(G, c[0], s[:, 0])
+        np.testing.assert_allclose(r2, r1[:, :1, 0])
+        # Legacy layout of cheby_op: responses stacked along the first axis.
+        r2 = filters.cheby_op(G, c, s)
+        self.assertEqual(r2.shape, (2 * G.N, n_signals))
+        np.testing.assert_allclose(r2[:G.N], r1[..., 0])
+        np.testing.assert_allclose(r2[G.N:], r1[..., 1])
+        r2 = filters.cheby_op(G, c[1], s[:, 1])
+        np.testing.assert_allclose(r2, r1[:, 1, 1])
+
+    def test_cheby_synthesis(self, n_signals=3):
+        """Synthesis is the adjoint of analysis."""
+        G = self._G
+        g = filters.Filter(G, [lambda x: x**2, lambda x: 1 + x])
+        c = filters.compute_cheby_coeff(g, m=5)
+        s = self._rs.uniform(size=(G.N, n_signals, 2))
+        r1 = G.L.dot(G.L.dot(s[..., 0])) + s[..., 1] + G.L.dot(s[..., 1])
+        r2 = filters.cheby_synthesis(G, c, s)
+        np.testing.assert_allclose(r2, r1)
+        r2 = filters.cheby_synthesis(G, c, s[:, 0])
+        np.testing.assert_allclose(r2, r1[:, 0])
+        out = np.empty((G.N, n_signals))
+        filters.cheby_synthesis(G, c, s, out=out)
+        np.testing.assert_allclose(out, r1)
+        for out in [np.empty((G.N, n_signals + 1)),
+                    np.empty((G.N, n_signals), dtype=np.float32),
+                    np.empty((n_signals, G.N)).T]:
+            self.assertRaises(ValueError, filters.cheby_synthesis, G, c, s,
+                              out=out)
+        self.assertRaises(ValueError, filters.cheby_synthesis, G, c, s[..., 0])
+        # Equal to the sum of the analyses by each filter.
+        g = filters.MexicanHat(G, Nf=4)
+        c = filters.compute_cheby_coeff(g, m=40)
+        s = self._rs.uniform(size=(G.N, n_signals, 4))
+        r1 = sum(filters.cheby_analysis(G, c[i], s[..., i])[..., 0]
+                 for i in range(4))
+        r2 = filters.cheby_synthesis(G, c, s)
+        np.testing.assert_allclose(r2, r1)
+
+    def test_clenshaw(self, n_signals=7):
+        """Clenshaw evaluation in bounded memory equals the recurrence."""
+        G = self._G
+        g = filters.MexicanHat(G, Nf=4)
+        s = self._rs.uniform(size=(G.N, n_signals))
+        y1 = g.analyze(s, method='chebyshev')
+        y2 = g.analyze(s, method='clenshaw')
+        np.testing.assert_allclose(y2, y1)
+        # Chunks of 3 columns (the last one is smaller).
+        column = 3 * G.N * 8
+        y2 = g.analyze(s, method='clenshaw', max_memory=3*column)
+        np.testing.assert_allclose(y2, y1)
+        z1 = g.synthesize(y1, method='chebyshev')
+        z2 = g.synthesize(y1, method='clenshaw', max_memory=3*column)
+        np.testing.assert_allclose(z2, z1)
+        # Single signal, written in place.
+        c = g._get_cheby_coeff(30)
+        out = np.empty((G.N, 1, 4))
+        filters.cheby_clenshaw(G, c, s[:, :1], out=out, max_memory=column)
+        np.testing.assert_allclose(out, y1[:, :1])
+        for out in [np.empty((G.N, 2, 4)),
+                    np.empty((G.N, 1, 4), dtype=np.float32),
+                    np.empty((4, 1, G.N)).T]:
+            self.assertRaises(ValueError, filters.cheby_clenshaw, G, c,
+                              s[:, :1], out=out)
+        self.assertRaises(ValueError, g.analyze, s, method='clenshaw',
+                          max_memory=column-1)
+
+    def test_csr_dot_add_fallback(self, n_signals=7):
+        """The public product is used if the private kernel fails."""
+        G = self._G
+        g = filters.MexicanHat(G, Nf=4)
+        s = self._rs.uniform(size=(G.N, n_signals))
+        y1 = g.analyze(s, method='clenshaw')
+
+        def broken(*args):
+            raise TypeError('changed signature')
+
+        kernel = approximations._csr_matvecs
+        try:
+            approximations._csr_matvecs = broken
+            y2 = g.analyze(s, method='clenshaw')
+            self.assertIsNone(approximations._csr_matvecs)
+            y3 = g.analyze(s, method='clenshaw')
+        finally:
+            approximations._csr_matvecs = kernel
+        np.testing.assert_allclose(y2, y1)
+        np.testing.assert_allclose(y3, y1)
+
+    def test_cheby_order(self, tol=1e-6):
+        G = self._G
+        g = filters.MexicanHat(G, Nf=4)
+        orders, errors = filters.compute_cheby_order(g, tol=tol)
+        self.assertEqual(orders.shape, (4,))
+        self.assertTrue(np.all(errors <= tol))
+        # The order is the smallest whose measured error reaches the
+        # tolerance.
+        x = np.cos(np.linspace(0, np.pi, 1000))
+        y = g.evaluate(G.lmax / 2. * (x + 1))
+        for i in range(g.Nf):
+            c = filters.compute_cheby_coeff(g, m=200, i=i)
+            c[0] /= 2
+            error = np.max(np.abs(y[i] - np.polynomial.chebyshev.chebval(
+                x, c[:orders[i]+1])))
+            np.testing.assert_allclose(error, errors[i])
+            self.assertLessEqual(error, tol)
+            error = np.max(np.abs(y[i] - np.polynomial.chebyshev.chebval(
+                x, c[:orders[i]])))
+            self.assertGreater(error, tol)
+        # Filtering with the truncated polynomials.
+        s = self._rs.uniform(size=(G.N, 3))
+        y = g.filter(s, method='exact')
+        for method in ['chebyshev', 'clenshaw']:
+            y1 = g.filter(s, method=method, order='auto', tol=tol)
+            np.testing.assert_allclose(y1, y, atol=tol*np.linalg.norm(s))
+        c = g._get_cheby_coeff('auto', tol=tol)
+        self.assertEqual(c.shape, (4, orders.max() + 1))
+        for i in range(g.Nf):
+            np.testing.assert_equal(c[i, orders[i]+1:], 0)
+        op = filters.ChebyshevOperator(g, order='auto', tol=tol)
+        np.testing.assert_equal(op.orders, orders)
+        np.testing.assert_equal(op.errors, errors)
+        # Smooth filters need a low order.
+        orders, _ = filters.compute_cheby_order(filters.Heat(G), tol=tol)
+        self.assertLess(orders[0], 30)
+        # Discontinuous filters don't reach the tolerance.
+        g = filters.Rectangular(G, band_max=0.3)
+        with self.assertLogs(level='WARNING'):
+            orders, errors = filters.compute_cheby_order(g, max_order=50)
+        self.assertEqual(orders[0], 50)
+        self.assertRaises(ValueError, g.filter, s, method='lanczos',
+                          order='auto')
+
+    def test_cheby_parallel(self, n_signals=7):
+        G = self._G
+        g = filters.MexicanHat(G, Nf=4)
+        s = self._rs.uniform(size=(G.N, n_signals))
+        for method in ['chebyshev', 'clenshaw']:
+            y1 = g.analyze(s, method=method)
+            y2 = g.analyze(s, method=method, workers=2, chunk_size=3)
+            np.testing.assert_array_equal(y2, y1)
+            z1 = g.synthesize(y1, method=method)
+            z2 = g.synthesize(y1, method=method, workers=3)
+            np.testing.assert_array_equal(z2, z1)
+        c = g._get_cheby_coeff(30)
+        np.testing.assert_array_equal(filters.cheby_op(G, c, s, workers=2),
+                                      filters.cheby_op(G, c, s))
+        self.assertRaises(ValueError, g.analyze, s, workers=0)
+
+    def test_filter_chunks(self, n_signals=10):
+        G = self._G
+        g = filters.MexicanHat(G, Nf=4)
+        s = self._rs.uniform(size=(G.N, n_signals))
+        y = g.filter(s)
+        chunks = list(g.filter_chunks(s, chunk_size=3))
+        self.assertEqual(len(chunks), 4)
+        for columns, coefficients in chunks:
+            np.testing.assert_allclose(coefficients, y[:, columns])
+        # Chunks sized by memory: 7 columns of input, output, and buffers.
+        max_memory = 7 * 7 * G.N * 8
+        chunks = list(g.filter_chunks(s, max_memory=max_memory))
+        self.assertEqual([c.stop for c, _ in chunks], [7, 10])
+        y2 = g.filter(s, method='lanczos')
+        for columns, coefficients in g.filter_chunks(s, chunk_size=3,
+                                                     method='lanczos'):
+            np.testing.assert_allclose(coefficients, y2[:, columns])
+        columns, coefficients = next(g.filter_chunks(s[:, 0]))
+        np.testing.assert_allclose(coefficients[:, 0], y[:, 0])
+        # The parameters of filter() are forwarded.
+        y3 = g.filter(s, accumulate=np.float64, nodes=[2, 7])
+        for columns, coefficients in g.filter_chunks(
+                s, chunk_size=3, accumulate=np.float64, nodes=[2, 7],
+                workers=2, task_size=1):
+            self.assertEqual(coefficients.shape, (2, len(s[0, columns]), 4))
+            np.testing.assert_allclose(coefficients, y3[:, columns])
+        # As many signals as filters is not mistaken for a synthesis.
+        columns, coefficients = next(g.filter_chunks(s, chunk_size=4))
+        np.testing.assert_allclose(coefficients, y[:, :4])
+        self.assertRaises(ValueError, next,
+                          g.filter_chunks(s, method='lanczos', nodes=[2]))
+        self.assertRaises(ValueError, next, g.filter_chunks(s, method='exact'))
+        self.assertRaises(ValueError, next, g.filter_chunks(s[:-1]))
+
+    def test_filter_to_file(self, n_signals=10):
+        G = self._G
+        g = filters.MexicanHat(G, Nf=4)
+        s = self._rs.uniform(size=(G.N, n_signals))
+        directory = tempfile.mkdtemp()
+        try:
+            path_in = os.path.join(directory, 'signals.npy')
+            path_out = os.path.join(directory, 'coefficients.npy')
+            np.save(path_in, s)
+            s = np.load(path_in, mmap_mode='r')
+            progress = []
+            y = g.filter_to_file(s, path_out, chunk_size=3,
+                                 progress=lambda *args: progress.append(args))
+            self.assertIsInstance(y, np.memmap)
+            self.assertEqual(progress, [(3, 10), (6, 10), (9, 10), (10, 10)])
+            np.testing.assert_allclose(np.load(path_out), g.filter(s))
+            del y, s
+        finally:
+            shutil.rmtree(directory)
+
+    def test_cheby_operator(self, n_signals=5):
+        G = self._G
+        g = filters.MexicanHat(G, Nf=4)
+        op = filters.ChebyshevOperator(g, order=30)
+        self.assertEqual(op.shape, (4*G.N, G.N))
+        s = self._rs.uniform(size=(G.N, n_signals))
+        y = op.apply(s)
+        np.testing.assert_allclose(y, g.filter(s))
+        np.testing.assert_allclose(op.apply(s[:, 0]), g.filter(s[:, 0]))
+        np.testing.assert_allclose(op.apply_adjoint(y),
+                                   g.synthesize(y, method='chebyshev'))
+        # Same layout as the frame.
+        frame = g.compute_frame(method='chebyshev', order=30)
+        np.testing.assert_allclose(op.dot(s), frame.dot(s))
+        np.testing.assert_allclose(op.matvec(s[:, 0]), frame.dot(s[:, 0]))
+        x = self._rs.uniform(size=4*G.N)
+        np.testing.assert_allclose(op.rmatvec(x), frame.T.dot(x))
+        np.testing.assert_allclose(op.H.dot(x), frame.T.dot(x))
+        self.assertRaises(ValueError, op.apply, s[:-1])
+        self.assertRaises(ValueError, op.apply_adjoint, y[..., :-1])
+        # Results written in place.
+        out = np.empty_like(y)
+        op.apply(s, out=out)
+        np.testing.assert_allclose(out, y)
+        out = np.empty_like(s)
+        op.apply_adjoint(y, out=out)
+        np.testing.assert_allclose(out, op.apply_adjoint(y))
+        # Reshaping those would give copies, not views.
+        out = np.empty((G.N, 4, n_signals)).transpose(0, 2, 1)
+        self.assertRaises(ValueError, op.apply, s, out=out)
+        out = np.empty((n_signals, G.N)).T
+        self.assertRaises(ValueError, op.apply_adjoint, y, out=out)
+        self.assertRaises(ValueError, op.apply, s, out=np.empty_like(y)[1:])
+        self.assertRaises(ValueError, op.apply, s,
+                          out=np.empty(y.shape, dtype=np.float32))
+
+    def test_cheby_operator_algebra(self):
+        G = self._G
+        g = filters.ChebyshevOperator(filters.MexicanHat(G, Nf=3), order=20)
+        h = filters.ChebyshevOperator(filters.Heat(G, 10), order=30)
+        x = self._signal
+        y = g.apply(x)
+        z = h.apply(x)[:, 0]
+        np.testing.assert_allclose((g + h).apply(x), y + z[:, np.newaxis])
+        np.testing.assert_allclose((g - 2 * h).apply(x),
+                                   y - 2 * z[:, np.newaxis])
+        np.testing.assert_allclose((-g * 0.5).apply(x), -0.5 * y)
+        # Products compose the operators.
+        p = g @ h
+        self.assertEqual((p.n_filters, p.order), (3, 50))
+        np.testing.assert_allclose(p.apply(x), g.apply(z), atol=1e-12)
+        np.testing.assert_allclose((g * h).apply(x), p.apply(x))
+        self.assertEqual(g.multiply(h, order=25).order, 25)
+        # g(L)^2 is the frame operator of a single filter.
+        h2 = h ** 2
+        np.testing.assert_allclose(h2.apply(x)[:, 0],
+                                   h.apply(z)[:, 0], atol=1e-12)
+        np.testing.assert_allclose((h ** 0).apply(x)[:, 0], x)
+        self.assertRaises(ValueError, h.power, -1)
+        two = filters.ChebyshevOperator(filters.Heat(G, [1, 2]))
+        self.assertRaises(ValueError, g.__add__, two)
+        other = filters.ChebyshevOperator(filters.Heat(graphs.Ring(G.N)))
+        self.assertRaises(ValueError, h.__add__, other)
+        # Still a linear operator for scipy.
+        np.testing.assert_allclose(h.dot(x), z)
+
+    def test_float32(self, n_signals=5):
+        G = graphs.Sensor(123, seed=42, dtype=np.float32)
+        G.compute_fourier_basis()
+        g32 = filters.MexicanHat(G, Nf=4)
+        g64 = filters.MexicanHat(self._G, Nf=4)
+        s = self._rs.uniform(size=(G.N, n_signals)).astype(np.float32)
+        for method in ['exact', 'chebyshev', 'clenshaw']:
+            y32 = g32.analyze(s, method=method)
+            self.assertEqual(y32.dtype, np.float32)
+            y64 = g64.analyze(s, method=method)
+            np.testing.assert_allclose(y32, y64, rtol=1e-4, atol=1e-5)
+            z32 = g32.synthesize(y32, method=method)
+            self.assertEqual(z32.dtype, np.float32)
+        y = g32.analyze(s, accumulate=np.float64)
+        self.assertEqual(y.dtype, np.float64)
+        np.testing.assert_allclose(y, y64, rtol=1e-4, atol=1e-5)
+        # Double precision signals are not truncated.
+        self.assertEqual(g32.analyze(s.astype(np.float64)).dtype, np.float64)
+        op = filters.ChebyshevOperator(g32)
+        self.assertEqual(op.apply(s).dtype, np.float32)
+
     def test_approximations(self):
         r"""
         Test that the different methods for filter analysis, i.e. 'exact',
@@ -346,7 +798,150 @@ class TestCase(unittest.TestCase):
         c_cheby = f.filter(self._signal, method='chebyshev')
 
         np.testing.assert_allclose(c_exact, c_cheby)
-        self.assertRaises(ValueError, f.filter, self._signal, method='lanczos')
+        self.assertRaises(ValueError, f.filter, self._signal, method='unk')
+
+    def test_filter_nodes(self):
+        G = self._G
+        g = filters.MexicanHat(G, Nf=3)
+        s = self._rs.normal(size=(G.N, 4))
+        nodes = [3, 100, 3, 42]
+        y = g.filter(s, order=5)
+        np.testing.assert_allclose(g.filter(s, order=5, nodes=nodes),
+                                   y[nodes], atol=1e-12)
+        # The neighborhood, not the whole graph, is visited.
+        self.assertLess(len(G.get_neighborhood(nodes, 5)), G.N)
+        c = g._get_cheby_coeff(5)
+        out = np.empty((len(nodes), 4, 3))
+        filters.cheby_analysis(G, c, s, out=out, nodes=nodes)
+        np.testing.assert_allclose(out, y[nodes], atol=1e-12)
+        self.assertRaises(ValueError, g.filter, s, method='exact',
+                          nodes=nodes)
+        self.assertRaises(ValueError, g.filter, y, nodes=nodes)
+
+    def test_sparse_frame(self):
+        G = self._G
+        g = filters.MexicanHat(G, Nf=3)
+        frame = g.compute_frame(method='chebyshev', order=15)
+        sparse_frame = g.compute_sparse_frame(order=15, block_size=37)
+        self.assertEqual(sparse_frame.format, 'csr')
+        self.assertEqual(sparse_frame.shape, (3 * G.N, G.N))
+        np.testing.assert_allclose(sparse_frame.toarray(), frame, atol=1e-12)
+        # Localized: atoms vanish beyond K hops.
+        atom = sparse_frame[10].indices
+        self.assertTrue(np.all(np.isin(atom, G.get_neighborhood(10, 15))))
+        sparse_frame = g.compute_sparse_frame(order=15, tol=1e-3)
+        frame[np.abs(frame) <= 1e-3] = 0
+        np.testing.assert_allclose(sparse_frame.toarray(), frame, atol=1e-12)
+        # Norms of the atoms, from the sparse or the dense frame.
+        g = filters.Heat(G, 10)
+        for kwargs in [dict(order=15), dict(method='exact')]:
+            frame = g.compute_frame(**kwargs)
+            np.testing.assert_allclose(features.compute_norm_tig(g, **kwargs),
+                                       np.linalg.norm(frame, axis=1))
+        g = filters.MexicanHat(G, Nf=3)
+        # Many nodes at once.
+        s = g.localize([10, 20], order=15)
+        self.assertEqual(s.shape, (G.N, 2, 3))
+        np.testing.assert_allclose(s[:, 1], g.localize(20, order=15))
+
+    def test_mapping(self, n_signals=5):
+        G = self._G
+        g = filters.Filter(G, [[lambda x: np.exp(-x), lambda x: 1 / (1 + x)],
+                               [lambda x: x / (1 + x), np.cos],
+                               [np.sin, lambda x: np.exp(-2 * x)]])
+        self.assertEqual(g.shape, (3, 2))
+        self.assertEqual(g.n_filters, 6)
+        s = self._rs.normal(size=(G.N, n_signals, 2))
+        response = g.evaluate(G.e).reshape(3, 2, -1)
+        y = np.zeros((G.N, n_signals, 3))
+        for i in range(3):
+            for j in range(2):
+                y[..., i] += G.U.dot(response[i, j, :, np.newaxis] *
+                                     G.U.T.dot(s[..., j]))
+        np.testing.assert_allclose(g.filter(s, method='exact'), y)
+        np.testing.assert_allclose(g.filter(s, method='chebyshev', order=60),
+                                   y, atol=1e-10)
+        np.testing.assert_allclose(g.filter(s, method='clenshaw', order=60,
+                                            max_memory=G.N*3*8), y,
+                                   atol=1e-10)
+        self.assertEqual(g.filter(s[:, 0]).shape, (G.N, 3))
+        self.assertRaises(ValueError, g.filter, s[..., 0])
+        self.assertRaises(ValueError, g.filter, s, method='lanczos')
+        # Only defined for filter banks of a single input.
+        self.assertRaises(ValueError, g.localize, 3)
+        self.assertRaises(ValueError, g.compute_frame)
+        self.assertRaises(ValueError, g.compute_sparse_frame)
+        self.assertRaises(ValueError, filters.Filter, G, [[np.sin], []])
+        # The coefficients of T_k(L) X are contracted once per order.
+        c = self._rs.normal(size=(10, 2, 3))
+        y = sum(filters.cheby_analysis(G, c[:, i].T, s[..., i])
+                for i in range(2))
+        np.testing.assert_allclose(filters.cheby_mapping(G, c, s), y)
+        np.testing.assert_allclose(filters.cheby_mapping(G, c, s,
+                                                         max_memory=G.N*80),
+                                   y)
+        self.assertRaises(ValueError, filters.cheby_mapping, G, c[0], s)
+
+    def test_spectral_density(self):
+        G = self._G
+        density = filters.SpectralDensity(G, order=100, n_probes=50, seed=1)
+        self.assertEqual(density.moments.shape, (100,))
+        # Rademacher probes give the exact trace of the identity.
+        np.testing.assert_allclose(density.count(0, G.lmax), G.N)
+        bounds = np.array([0, 1, 2, 4, G.lmax])
+        n = density.count(bounds[:-1], bounds[1:])
+        n_exact = np.histogram(G.e, bounds)[0]
+        np.testing.assert_allclose(n, n_exact, atol=5)
+        x = np.linspace(0, G.lmax, 1001)
+        y = density.evaluate(x)
+        integral = np.sum((y[1:] + y[:-1]) / 2 * np.diff(x))  # Trapezoid.
+        np.testing.assert_allclose(integral, G.N, rtol=0.05)
+        self.assertEqual(density.evaluate(-1), 0)
+        self.assertRaises(ValueError, density.count, 2, 1)
+        self.assertRaises(ValueError, filters.SpectralDensity, G, order=1)
+
+    def test_lanczos(self, n_signals=5):
+        G = self._G
+        s = np.random.RandomState(42).uniform(size=(G.N, n_signals))
+        # Smooth filters are well approximated at low order.
+        g = filters.MexicanHat(G, Nf=4)
+        y = g.analyze(s, method='exact')
+        np.testing.assert_allclose(g.analyze(s, method='lanczos', order=60),
+                                   y, atol=1e-6)
+        np.testing.assert_allclose(g.synthesize(y, method='lanczos',
+                                                order=60),
+                                   g.synthesize(y, method='exact'), atol=1e-6)
+        # A full Krylov subspace is exact, even for a discontinuous filter.
+        g = filters.Rectangular(G, band_max=0.3)
+        y = g.filter(s, method='exact')
+        np.testing.assert_allclose(g.filter(s, method='lanczos', order=G.N),
+                                   y, atol=1e-8)
+        # Sharp filters are better approximated than with Chebyshev.
+        y1 = g.filter(s, method='lanczos', order=50)
+        y2 = g.filter(s, method='chebyshev', order=50)
+        self.assertLess(np.linalg.norm(y1 - y), np.linalg.norm(y2 - y))
+        # Same result for a 1D signal, and zero signals are fine.
+        np.testing.assert_allclose(g.filter(s[:, 0], method='lanczos'),
+                                   g.filter(s, method='lanczos')[:, 0])
+        s[:, 1] = 0
+        np.testing.assert_equal(g.filter(s, method='lanczos')[:, 1], 0)
+        # Stacked layout of lanczos_op.
+        c = filters.lanczos_op(g, s)
+        np.testing.assert_allclose(c, g.filter(s, method='lanczos'))
+        # An order larger than the number of nodes is capped.
+        G2 = graphs.Ring(10)
+        G2.compute_fourier_basis()
+        g2 = filters.Heat(G2, [1, 10])
+        s2 = np.random.RandomState(42).uniform(size=(G2.N, 3))
+        np.testing.assert_allclose(g2.filter(s2, method='lanczos', order=30),
+                                   g2.filter(s2, method='exact'), atol=1e-8)
+        # The vectors stay orthogonal with periodic convergence checks.
+        V, _, _, n_steps, _ = approximations._lanczos_basis(
+            G.L.tocsr(), s[:, [0, 2]], G.N)
+        for j in range(2):
+            Vj = V[:n_steps[j], :, j]
+            np.testing.assert_allclose(Vj.dot(Vj.T), np.identity(len(Vj)),
+                                       atol=1e-6)
 
 
 suite = unittest.TestLoader().loadTestsFromTestCase(TestCase)
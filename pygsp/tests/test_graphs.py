@@ -7,6 +7,9 @@ Test suite for the graphs module of the pygsp package.
 
 from __future__ import division
 
+import os
+import shutil
+import tempfile
 import unittest
 
 import numpy as np
@@ -15,7 +18,7 @@ from scipy import sparse
 import networkx as nx
 from skimage import data, img_as_float
 
-from pygsp import graphs
+from pygsp import graphs, filters
 
 
 class TestCase(unittest.TestCase):
@@ -47,6 +50,57 @@ class TestCase(unittest.TestCase):
         self.assertEqual(ki.shape[0], G.Ne)
         self.assertEqual(kj.shape[0], G.Ne)
 
+    def test_from_csr(self):
+        W = self._G.W
+        for symmetric, validated in [(None, False), (True, True)]:
+            G = graphs.Graph.from_csr(W, symmetric=symmetric,
+                                      validated=validated)
+            self.assertIs(G.W, W)
+            self.assertFalse(hasattr(G, '_L'))
+            self.assertFalse(G.is_directed())
+            self.assertEqual(G.n_edges, self._G.n_edges)
+            np.testing.assert_allclose(G.L.toarray(), self._G.L.toarray())
+            np.testing.assert_allclose(G.dw, self._G.dw)
+        W = sparse.csr_matrix(np.array([[0, 3, 0], [3, 0, 4], [0, 0, 0]]))
+        G = graphs.Graph.from_csr(W, lap_type='normalized')
+        self.assertTrue(G.is_directed())
+        self.assertEqual(G.n_edges, 3)
+        np.testing.assert_allclose(G.L.toarray(),
+                                   graphs.Graph(W, 'normalized').L.toarray())
+        self.assertRaises(TypeError, graphs.Graph.from_csr, W.toarray())
+        self.assertRaises(ValueError, graphs.Graph.from_csr, W, 'unknown')
+
+    def test_components(self):
+        W = sparse.block_diag([graphs.Path(3, directed=False).W,
+                               graphs.Ring(4).W, sparse.csr_matrix((1, 1))])
+        order = np.random.RandomState(42).permutation(8)
+        G = graphs.Graph(W.tocsr()[order][:, order])
+        self.assertFalse(G.is_connected())
+        labels = G.get_components()
+        self.assertEqual(labels.max(), 2)
+        self.assertEqual(labels[0], 0)
+        components = G.extract_components()
+        self.assertEqual([c.n_vertices for c in components],
+                         list(np.bincount(labels)))
+        for i, component in enumerate(components):
+            idx = component.info['orig_idx']
+            np.testing.assert_equal(labels[idx], i)
+            np.testing.assert_equal(idx, np.sort(idx))
+            np.testing.assert_allclose(component.W.toarray(),
+                                       G.W[idx][:, idx].toarray())
+        self.assertTrue(graphs.Ring(5).is_connected())
+
+        # Directed: a cycle is strongly connected, a path only weakly.
+        G = graphs.Path(4, directed=True)
+        self.assertFalse(G.is_connected())
+        np.testing.assert_equal(G.get_components('weak'), 0)
+        np.testing.assert_equal(G.get_components('strong'), [0, 1, 2, 3])
+        self.assertEqual(len(G.extract_components()), 1)
+        self.assertEqual(len(G.extract_components('strong')), 4)
+        G = graphs.Graph(np.roll(np.identity(4), 1, axis=1))
+        self.assertTrue(G.is_connected())
+        self.assertRaises(ValueError, G.get_components, 'unknown')
+
     def test_degree(self):
         W = 0.3 * (np.ones((4, 4)) - np.diag(4 * [1]))
         G = graphs.Graph(W)
@@ -113,6 +167,30 @@ class TestCase(unittest.TestCase):
         G.compute_laplacian(lap_type='normalized')
         test_normalized(G)
 
+    def test_dtype(self):
+        W = self._G.W
+        for lap_type in ['combinatorial', 'normalized']:
+            G = graphs.Graph(W.astype(np.float32), lap_type=lap_type)
+            self.assertEqual(G.W.dtype, np.float32)
+            self.assertEqual(G.L.dtype, np.float32)
+            G64 = graphs.Graph(W, lap_type=lap_type)
+            self.assertEqual(G64.L.dtype, np.float64)
+            np.testing.assert_allclose(G.L.toarray(), G64.L.toarray(),
+                                       rtol=1e-6)
+            G.estimate_lmax()
+            G64.estimate_lmax()
+            np.testing.assert_allclose(G.lmax, G64.lmax, rtol=1e-3)
+            G = graphs.Graph(W, lap_type=lap_type, dtype=np.float32)
+            self.assertEqual(G.L.dtype, np.float32)
+            G.compute_fourier_basis()
+            self.assertEqual(G.U.dtype, np.float32)
+            s = self._signal.astype(np.float32)
+            self.assertEqual(G.gft(s).dtype, np.float32)
+            np.testing.assert_allclose(G.igft(G.gft(s)), s, atol=1e-5)
+        # Integer weights give a double precision Laplacian.
+        G = graphs.Graph(np.arange(16).reshape(4, 4))
+        self.assertEqual(G.L.dtype, np.float64)
+
     def test_estimate_lmax(self):
 
         graph = graphs.Sensor()
@@ -180,6 +258,132 @@ class TestCase(unittest.TestCase):
                                    atol=1e-12)
         np.testing.assert_allclose(e, G.e[:n])
 
+    def test_fourier_basis_components(self):
+        W = sparse.block_diag([graphs.Path(5).W, graphs.Ring(7).W,
+                               sparse.csr_matrix((1, 1)), self._G.W])
+        order = np.random.RandomState(42).permutation(W.shape[0])
+        W = W.tocsr()[order][:, order]
+        G1 = graphs.Graph(W)
+        G2 = graphs.Graph(W)
+        G1.compute_fourier_basis(workers=2)
+        G2._e, G2._U = np.linalg.eigh(G2.L.toarray())
+        self.assertTrue(hasattr(G1, '_fourier_blocks'))
+        self.assertFalse(hasattr(G1, '_U'))
+        np.testing.assert_allclose(G1.e, G2.e, atol=1e-10)
+        self.assertEqual(G1.e[0], 0)
+        self.assertEqual(G1.lmax, G1.e[-1])
+        # One zero eigenvalue per component, in single precision too.
+        G3 = graphs.Graph(W.astype(np.float32))
+        G3.compute_fourier_basis()
+        n_components = len(np.unique(G3.get_components()))
+        self.assertEqual(np.sum(G3.e == 0), n_components)
+        s = np.random.RandomState(42).normal(size=(G1.N, 3))
+        # The Fourier coefficients are only unique up to the eigenspaces.
+        s_hat = G1.gft(s)
+        np.testing.assert_allclose(np.linalg.norm(s_hat, axis=0),
+                                   np.linalg.norm(s, axis=0))
+        np.testing.assert_allclose(G1.igft(s_hat), s, atol=1e-10)
+        np.testing.assert_allclose(G1.U.dot(s_hat), s, atol=1e-10)
+        np.testing.assert_allclose(G1.U.T.dot(s), s_hat, atol=1e-10)
+        np.testing.assert_allclose(G1.U.dot(G1.e[:, np.newaxis] * s_hat),
+                                   G1.L.dot(s), atol=1e-10)
+        np.testing.assert_allclose(G1.coherence, np.max(np.abs(G1.U)))
+        g = filters.Heat(G1, scale=5)
+        np.testing.assert_allclose(g.filter(s, method='exact'),
+                                   g.filter(s, method='chebyshev', order=100),
+                                   atol=1e-5)
+        g = filters.Filter(G1, [[lambda x: x, lambda x: np.exp(-x)]])
+        np.testing.assert_allclose(g.filter(s.reshape(-1, 1, 3)[..., :2],
+                                            method='exact'),
+                                   G1.L.dot(s[:, 0]) + G1.igft(
+                                       np.exp(-G1.e) * G1.gft(s[:, 1])),
+                                   atol=1e-10)
+
+    def test_save_load(self):
+        W = sparse.block_diag([graphs.Path(5, directed=True).W,
+                               graphs.Ring(7).W])
+        for G in [graphs.Logo(lap_type='normalized'), graphs.Graph(W),
+                  graphs.Sensor(30, seed=42)]:
+            G.compute_fourier_basis()
+            G.compute_differential_operator()
+            path = tempfile.mkdtemp()
+            try:
+                G.save(path)
+                for mmap_mode in ['r', None]:
+                    G2 = graphs.Graph.load(path, mmap_mode=mmap_mode)
+                    self.assertEqual(G2.lap_type, G.lap_type)
+                    self.assertEqual(G2.is_directed(), G.is_directed())
+                    self.assertEqual(G2.n_edges, G.n_edges)
+                    self.assertEqual(G2.lmax, G.lmax)
+                    self.assertEqual(G2.coherence, G.coherence)
+                    np.testing.assert_equal(G2.W.toarray(), G.W.toarray())
+                    np.testing.assert_equal(G2.L.toarray(), G.L.toarray())
+                    np.testing.assert_equal(G2.D.toarray(), G.D.toarray())
+                    np.testing.assert_equal(G2.e, G.e)
+                    np.testing.assert_equal(G2.U, G.U)
+                    s = np.arange(G.N, dtype=float)
+                    np.testing.assert_equal(G2.gft(s), G.gft(s))
+                    if hasattr(G, 'coords'):
+                        np.testing.assert_equal(G2.coords, G.coords)
+                    self.assertEqual(isinstance(G2._e, np.memmap),
+                                     mmap_mode is not None)
+                self.assertEqual(G2.plotting.keys(), G.plotting.keys())
+                # The parameters of the subclasses are not saved.
+                G3 = type(G).load(path)
+                self.assertIs(type(G3), graphs.Graph)
+                repr(G3)
+            finally:
+                shutil.rmtree(path)
+
+    def test_spectral_cache(self):
+        path = tempfile.mkdtemp()
+        try:
+            cache = graphs.SpectralCache(path)
+            W = sparse.block_diag([graphs.Path(5).W, graphs.Ring(7).W])
+            for G1, G2 in [(graphs.Logo(), graphs.Logo()),
+                           (graphs.Graph(W), graphs.Graph(W.tocsr()))]:
+                G1.spectral_cache = G2.spectral_cache = cache
+                self.assertEqual(cache.key(G1), cache.key(G2))
+                G1.compute_fourier_basis()
+                G2.compute_fourier_basis()
+                self.assertIsInstance(G2._e, np.memmap)
+                np.testing.assert_equal(G2.e, G1.e)
+                np.testing.assert_equal(G2.U, G1.U)
+                self.assertEqual(G2.lmax, G1.lmax)
+                self.assertEqual(G2.coherence, G1.coherence)
+                G1.estimate_lmax(recompute=True)
+                G2.estimate_lmax(recompute=True)
+                self.assertEqual(G2.lmax, G1.lmax)
+            # A cache hit restores the scalars, stored as 0-d arrays.
+            G = graphs.Logo()
+            G.spectral_cache = cache
+            arrays = cache.get(cache.key(G))
+            self.assertEqual(arrays['coherence'].shape, ())
+            self.assertEqual(arrays['lmax_lanczos'].shape, ())
+            G.estimate_lmax()
+            self.assertIsInstance(G._lmax, float)
+            self.assertEqual(G.lmax, arrays['lmax_lanczos'])
+            G.compute_fourier_basis()
+            self.assertIsInstance(G._coherence, float)
+            self.assertEqual(G.coherence, arrays['coherence'])
+            self.assertEqual(G.lmax, G.e[-1])
+            # Another Laplacian is another entry.
+            G = graphs.Logo(lap_type='normalized')
+            self.assertNotEqual(cache.key(G), cache.key(graphs.Logo()))
+            self.assertEqual(len(os.listdir(path)), 2)
+            # Least recently used entries are evicted.
+            key = cache.key(graphs.Logo())
+            os.utime(os.path.join(path, key), (1e10, 1e10))
+            cache.max_size = sum(os.path.getsize(os.path.join(path, key, f))
+                                 for f in os.listdir(os.path.join(path, key)))
+            cache.evict()
+            self.assertEqual(os.listdir(path), [key])
+            cache.max_size = 1
+            cache.evict()
+            self.assertEqual(cache.get(key), dict())
+        finally:
+            shutil.rmtree(path)
+
     def test_eigendecompositions(self):
         G = graphs.Logo()
         U1, e1, V1 = scipy.linalg.svd(G.L.toarray())
@@ -223,6 +427,18 @@ class TestCase(unittest.TestCase):
         s_star = self._G.igft(s_hat)
         np.testing.assert_allclose(s, s_star)
 
+    def test_fourier_transform_real(self):
+        s = self._rs.uniform(size=(self._G.N, 3))
+        np.testing.assert_allclose(self._G.gft(s), self._G.U.T.dot(s))
+        # Complex basis (unitary).
+        G = graphs.Ring(8)
+        G.compute_fourier_basis()
+        U = G.U * np.exp(1j * np.arange(G.N))
+        G._U = U
+        s_hat = G.gft(s[:G.N])
+        np.testing.assert_allclose(s_hat, U.conj().T.dot(s[:G.N]))
+        np.testing.assert_allclose(G.igft(s_hat), s[:G.N])
+
     def test_edge_list(self):
         for directed in [False, True]:
             G = graphs.ErdosRenyi(100, directed=directed)
@@ -233,6 +449,26 @@ class TestCase(unittest.TestCase):
             np.testing.assert_equal(G.W[sources[edges], targets[edges]],
                                     weights[edges][np.newaxis, :])
 
+    def test_get_neighborhood(self):
+        G = graphs.Grid2d(5)
+        np.testing.assert_equal(G.get_neighborhood(12, 0), [12])
+        np.testing.assert_equal(G.get_neighborhood(12, 1), [7, 11, 12, 13, 17])
+        self.assertEqual(len(G.get_neighborhood([0, 24], 2)), 12)
+        np.testing.assert_equal(G.get_neighborhood(0, 10), np.arange(G.N))
+        # Cached.
+        neighborhood = G.get_neighborhood([3, 4], 3)
+        self.assertIs(G.get_neighborhood([4, 3], 3), neighborhood)
+        # The buffer of visited nodes is reset after each query.
+        self.assertFalse(np.any(G._visited))
+        # The cache is cleared when the Laplacian changes.
+        G.L = graphs.Path(G.N).L
+        np.testing.assert_equal(G.get_neighborhood([3, 4], 3),
+                                np.arange(0, 8))
+        # Directed edges are followed in both directions.
+        G = graphs.Graph(np.array([[0, 1, 0], [0, 0, 1], [0, 0, 0]]))
+        np.testing.assert_equal(G.get_neighborhood(2, 1), [1, 2])
+        self.assertRaises(ValueError, G.get_neighborhood, 0, -1)
+
     def test_differential_operator(self, n_vertices=98):
         r"""The Laplacian must always be the divergence of the gradient,
         whether the Laplacian is combinatorial or normalized, and whether the